@@ -1,13 +1,28 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from sqlalchemy import text
-import os, time
+import os
+from app.database import engine_options_from_env, enable_sqlite_foreign_keys
+from app.auth import CachingJWTManager
+from app.cache import Cache
+from app.events import TaskEvents
+from app.passwords import Passwords
+from app.query_stats import QueryStats
+from app.readiness import Readiness
+from app.json_provider import json_provider_class
+from app.admission import Admission, rate_limits_from_env
+from app.idempotency import Idempotency
 
 
 db = SQLAlchemy()
-jwt = JWTManager()  # створюємо JWT менеджер
+jwt = CachingJWTManager()  # JWT менеджер з кешем токенів і списком відкликаних (app/auth.py)
+cache = Cache()     # read-through кеш для задач і користувачів
+task_events = TaskEvents()  # стрім змін задач (SSE)
+passwords = Passwords()     # хешування паролів у пулі процесів
+query_stats = QueryStats()  # SQL-метрики на запит і журнал повільних запитів
+readiness = Readiness()     # кешований стан БД для /api/health/ready
+admission = Admission()     # ліміти частоти (429) і скидання навантаження (503)
+idempotency = Idempotency() # збережені відповіді POST-запитів з Idempotency-Key
 
 
 def create_app():
@@ -19,29 +34,134 @@ def create_app():
     # Беремо URL з .env (передається в контейнер через env_file)
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Пул з'єднань: розмір, таймаути, pre-ping, режим PgBouncer (див. app/database.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env(database_url)
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'very_secret_key')
+    # Перевірка JWT (див. app/auth.py): розмір кешу розкодованих токенів, як часто воркер
+    # перечитує список відкликаних токенів, і чи класти username у токен (тоді /me без запиту до БД)
+    app.config['JWT_DECODE_CACHE_SIZE'] = int(os.getenv('JWT_DECODE_CACHE_SIZE', 10000))
+    app.config['JWT_REVOCATION_SYNC_SECONDS'] = float(os.getenv('JWT_REVOCATION_SYNC_SECONDS', 1))
+    app.config['JWT_EMBED_USER_CLAIMS'] = os.getenv('JWT_EMBED_USER_CLAIMS', 'false').lower() == 'true'
+
+    # Розмір сторінки для списків задач (keyset-пагінація)
+    app.config['TASKS_DEFAULT_PAGE_SIZE'] = int(os.getenv('TASKS_DEFAULT_PAGE_SIZE', 100))
+    app.config['TASKS_MAX_PAGE_SIZE'] = int(os.getenv('TASKS_MAX_PAGE_SIZE', 500))
+    # Скільки рядків читати з курсора за раз при потоковому експорті
+    app.config['TASKS_EXPORT_BATCH_SIZE'] = int(os.getenv('TASKS_EXPORT_BATCH_SIZE', 1000))
+    # Максимальна кількість елементів в одному запиті до /api/tasks/bulk
+    app.config['TASKS_BULK_MAX_ITEMS'] = int(os.getenv('TASKS_BULK_MAX_ITEMS', 1000))
+    # Максимальна кількість задач в одному імпорті /api/tasks/import (виконується фоновою задачею)
+    app.config['TASKS_IMPORT_MAX_ITEMS'] = int(os.getenv('TASKS_IMPORT_MAX_ITEMS', 100000))
+    # Скільки власників з найбільшою кількістю задач потрапляє в метрику tasks_by_owner
+    app.config['TASK_STATS_METRICS_MAX_OWNERS'] = int(os.getenv('TASK_STATS_METRICS_MAX_OWNERS', 100))
+
+    # Кеш задач і користувачів: local (LRU+TTL у процесі), redis або none
+    app.config['CACHE_BACKEND'] = os.getenv('CACHE_BACKEND', 'local')
+    app.config['CACHE_TTL'] = int(os.getenv('CACHE_TTL', 30))
+    app.config['CACHE_MAX_ENTRIES'] = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    app.config['REDIS_URL'] = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Cache-Control для відповідей з ETag. Публічний список задач може мікрокешувати nginx (s-maxage),
+    # решту браузер перевіряє через If-None-Match перед кожним використанням.
+    app.config['HTTP_CACHE_CONTROL_PUBLIC'] = os.getenv(
+        'HTTP_CACHE_CONTROL_PUBLIC', 'public, max-age=0, s-maxage=1, must-revalidate')
+    app.config['HTTP_CACHE_CONTROL_PRIVATE'] = os.getenv('HTTP_CACHE_CONTROL_PRIVATE', 'private, no-cache')
+
+    # Стрім змін задач /api/tasks/events (Server-Sent Events, див. app/events.py).
+    # У sync-режимі кожен SSE-клієнт займає потік gthread, тому за замовчуванням стрімам віддано
+    # половину GUNICORN_THREADS (gunicorn.conf.py передає кількість в оточення); в async-режимі стрім
+    # не займає потоку - ліміт окремий і значно вищий. З'єднання періодично закривається
+    # (клієнт одразу перепідключається з Last-Event-ID), понад ліміт - 503 з Retry-After.
+    app.config['TASK_EVENTS_BUFFER_SIZE'] = int(os.getenv('TASK_EVENTS_BUFFER_SIZE', 1000))
+    app.config['TASK_EVENTS_MAX_STREAMS'] = int(os.getenv(
+        'TASK_EVENTS_MAX_STREAMS', max(1, int(os.getenv('GUNICORN_THREADS', 8)) // 2)))
+    app.config['TASK_EVENTS_MAX_STREAMS_ASYNC'] = int(os.getenv('TASK_EVENTS_MAX_STREAMS_ASYNC', 1000))
+    app.config['TASK_EVENTS_MAX_STREAM_SECONDS'] = float(os.getenv('TASK_EVENTS_MAX_STREAM_SECONDS', 300))
+    app.config['TASK_EVENTS_HEARTBEAT_SECONDS'] = float(os.getenv('TASK_EVENTS_HEARTBEAT_SECONDS', 15))
+
+    # Хешування паролів (див. app/passwords.py): метод werkzeug, процесів у пулі на воркер
+    # (0 - у потоці запиту), ліміт операцій у роботі й черзі (понад нього - 503) і таймаут
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 1))
+    app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 16))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+    # SQL-метрики на запит (кількість і час запитів до БД за endpoint) і JSON-журнал
+    # запитів, довших за SQL_SLOW_QUERY_MS (від'ємне значення вимикає журнал), див. app/query_stats.py
+    app.config['SQL_METRICS_ENABLED'] = os.getenv('SQL_METRICS_ENABLED', 'true').lower() == 'true'
+    app.config['SQL_SLOW_QUERY_MS'] = float(os.getenv('SQL_SLOW_QUERY_MS', 200))
+
+    # /api/health/ready: скільки секунд кешувати результат перевірки БД (оновлюється у фоні), таймаут
+    # підключення перевірки і затримка між перевірками недоступної БД: від INITIAL, подвоюється до MAX секунд
+    app.config['DB_READINESS_CACHE_SECONDS'] = float(os.getenv('DB_READINESS_CACHE_SECONDS', 5))
+    app.config['DB_READINESS_TIMEOUT'] = float(os.getenv('DB_READINESS_TIMEOUT', 3))
+    app.config['DB_READINESS_BACKOFF_INITIAL'] = float(os.getenv('DB_READINESS_BACKOFF_INITIAL', 0.5))
+    app.config['DB_READINESS_BACKOFF_MAX'] = float(os.getenv('DB_READINESS_BACKOFF_MAX', 30))
+
+    # Фонові задачі (app/jobs.py, воркер - python worker.py): рядків на пачку (одна транзакція),
+    # як часто перевіряти порожню чергу, через скільки секунд без прогресу задачу підхоплює інший воркер,
+    # скільки разів її можна почати і скільки секунд зберігати завершені задачі
+    app.config['JOBS_BATCH_SIZE'] = int(os.getenv('JOBS_BATCH_SIZE', 1000))
+    app.config['JOBS_POLL_SECONDS'] = float(os.getenv('JOBS_POLL_SECONDS', 1))
+    app.config['JOBS_TIMEOUT_SECONDS'] = float(os.getenv('JOBS_TIMEOUT_SECONDS', 300))
+    app.config['JOBS_MAX_ATTEMPTS'] = int(os.getenv('JOBS_MAX_ATTEMPTS', 3))
+    app.config['JOBS_RETENTION_SECONDS'] = float(os.getenv('JOBS_RETENTION_SECONDS', 7 * 24 * 3600))
+
+    # Ліміти частоти запитів до /api/<група> (app/admission.py): "N/second|minute|hour" для анонімних
+    # запитів за IP (RATE_LIMIT_<ГРУПА>_IP) і для авторизованих за користувачем (RATE_LIMIT_<ГРУПА>_USER).
+    # Бекенд local - відра у воркері (ліміт ділиться на GUNICORN_WORKERS), redis - спільні (REDIS_URL).
+    # IP клієнта - із заголовка від nginx, якщо з'єднання з адреси RATE_LIMIT_TRUSTED_PROXIES ("*" - будь-якої),
+    # інакше (і при порожньому RATE_LIMIT_IP_HEADER) - адреса з'єднання.
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATE_LIMIT_BACKEND'] = os.getenv('RATE_LIMIT_BACKEND', 'local')
+    app.config['RATE_LIMIT_MAX_KEYS'] = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))
+    app.config['RATE_LIMIT_IP_HEADER'] = os.getenv('RATE_LIMIT_IP_HEADER', 'X-Real-IP')
+    app.config['RATE_LIMIT_TRUSTED_PROXIES'] = os.getenv(
+        'RATE_LIMIT_TRUSTED_PROXIES', '127.0.0.1,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16')
+    # Кількість воркерів gunicorn (gunicorn.conf.py передає її в оточення; 1 - flask run, тести)
+    app.config['GUNICORN_WORKERS'] = int(os.getenv('GUNICORN_WORKERS', 1))
+    app.config['RATE_LIMITS'] = rate_limits_from_env()
+    # Скидання навантаження: 503 одразу, якщо воркер уже обробляє SHED_MAX_IN_FLIGHT запитів або
+    # очікування з'єднання з пулу за останні 1-2 с перевищило SHED_MAX_POOL_WAIT_MS (0 - перевірку вимкнено)
+    app.config['SHED_MAX_IN_FLIGHT'] = int(os.getenv('SHED_MAX_IN_FLIGHT', 100))
+    app.config['SHED_MAX_POOL_WAIT_MS'] = float(os.getenv('SHED_MAX_POOL_WAIT_MS', 500))
+
+    # Idempotency-Key для POST /api/tasks, /tasks/bulk, /tasks/import і /users/register (app/idempotency.py):
+    # бекенд database (таблиця idempotency_keys), redis (REDIS_URL) або local (лише один процес),
+    # скільки секунд зберігати відповідь, скільки записів тримати в пам'яті (local), скільки секунд ключ
+    # зайнятий запитом, що виконується (не менше за GUNICORN_TIMEOUT), скільки паралельний повтор чекає на відповідь
+    # і скільки таких повторів чекає одночасно на процес (решта одразу отримує 409 з Retry-After): у sync-режимі
+    # кожен займає потік, тому за замовчуванням - чверть GUNICORN_THREADS
+    app.config['IDEMPOTENCY_BACKEND'] = os.getenv('IDEMPOTENCY_BACKEND', 'database')
+    app.config['IDEMPOTENCY_TTL'] = float(os.getenv('IDEMPOTENCY_TTL', 24 * 3600))
+    app.config['IDEMPOTENCY_MAX_ENTRIES'] = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', 10000))
+    app.config['IDEMPOTENCY_LOCK_SECONDS'] = float(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 30))
+    app.config['IDEMPOTENCY_WAIT_SECONDS'] = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 2))
+    app.config['IDEMPOTENCY_MAX_WAITERS'] = int(os.getenv(
+        'IDEMPOTENCY_MAX_WAITERS', max(1, int(os.getenv('GUNICORN_THREADS', 8)) // 4)))
+    app.config['IDEMPOTENCY_MAX_WAITERS_ASYNC'] = int(os.getenv('IDEMPOTENCY_MAX_WAITERS_ASYNC', 100))
+
+    # Кодування JSON-відповідей: orjson (якщо встановлено) або stdlib - побайтово однаковий результат
+    app.config['JSON_ENCODER'] = os.getenv('JSON_ENCODER', 'orjson')
 
     # --- Ініціалізація ---
+    # Жодне розширення не підключається до БД під час старту - лише при першому запиті
+    app.json = json_provider_class(app.config['JSON_ENCODER'])(app)
     db.init_app(app)
+    with app.app_context():
+        enable_sqlite_foreign_keys(db.engine)
     jwt.init_app(app)
+    cache.init_app(app)
+    task_events.init_app(app)
+    passwords.init_app(app)
+    query_stats.init_app(app)
+    readiness.init_app(app)
+    admission.init_app(app)
+    idempotency.init_app(app)
     # Дозволяємо запити з фронта (localhost:3000)
-    CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
-
-    # --- Retry логіка перед create_all ---
-    retries = 10  # скільки разів спробувати
-    delay = 5     # секунд між спробами
-
-    for attempt in range(1, retries + 1):
-        try:
-            with app.app_context():
-                db.session.execute(text("SELECT 1"))  # Перевірка підключення
-            print("✅ Database connected successfully and tables created.")
-            break
-        except Exception as e:
-            print(f"⚠️ Database connection failed (attempt {attempt}/{retries}): {e}")
-            if attempt == retries:
-                raise
-            time.sleep(delay)
+    # Заголовки пагінації мають бути доступні фронту через CORS
+    CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}},
+         expose_headers=["Link", "X-Next-Cursor", "ETag", "X-Request-ID", "Idempotent-Replayed"])
 
     # --- Реєстрація Blueprint ---
     from .routes import register_blueprints
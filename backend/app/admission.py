@@ -0,0 +1,401 @@
+import ipaddress
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+from app.database import recent_pool_wait
+from app.metrics import RATE_LIMITED, REQUESTS_SHED, REQUESTS_IN_FLIGHT
+
+
+# --- Контроль допуску запитів до /api ---
+# 1. Ліміти частоти (token bucket, 429 з Retry-After). Ліміти задаються для групи маршрутів
+#    /api/<група> (= blueprint: tasks, users, jobs) окремо для анонімних і авторизованих запитів:
+#      - анонімні (/tasks/public, login, register) рахуються за IP клієнта; заголовку з IP
+#        (RATE_LIMIT_IP_HEADER, X-Real-IP від nginx) вірять лише від адрес RATE_LIMIT_TRUSTED_PROXIES,
+#        інакше клієнт, що звертається до бекенда напряму, підставляв би собі новий IP на кожен запит;
+#      - запити з дійсним токеном - за користувачем: клієнти за одним NAT не ділять ліміт,
+#        а нові токени видає лише login, який сам обмежений за IP.
+#    Формат ліміту - "N/second|minute|hour": відро на N запитів, що поповнюється на N за період
+#    (сплеск до N запитів одразу, далі - рівномірно). Порожнє значення або 0 - без ліміту.
+#    Бекенди: local - відра в пам'яті процесу: кожен воркер gunicorn рахує окремо, тому ліміт
+#                     ділиться на GUNICORN_WORKERS (разом воркери пропускають приблизно заданий ліміт);
+#             redis - спільні для всіх воркерів і екземплярів (REDIS_URL); якщо Redis недоступний,
+#             запити пропускаються - ліміти не мають зупиняти API. В ASGI-режимі виклики Redis
+#             виконуються в пулі потоків (app/asgi/common.py: call_backend).
+# 2. Скидання навантаження (503 з Retry-After): новий запит відхиляється одразу, якщо процес уже
+#    обробляє SHED_MAX_IN_FLIGHT запитів або очікування з'єднання з пулу за останні 1-2 секунди
+#    перевищило SHED_MAX_POOL_WAIT_MS. Так запит отримує швидку відмову замість того, щоб стояти
+#    в черзі до пулу до DB_POOL_TIMEOUT. У sync-режимі запитів в обробці не більше за потоки воркера
+#    (GUNICORN_THREADS), тож там спрацьовує переважно очікування пулу; в ASGI-режимі - обидва.
+#    Перевірки здоров'я і SSE-стрім (має власний ліміт TASK_EVENTS_MAX_STREAMS) не скидаються.
+
+logger = logging.getLogger(__name__)
+
+# Ліміти за замовчуванням: група -> {"ip": анонімні запити, "user": авторизовані}
+DEFAULT_RATE_LIMITS = {
+    # tasks/ip з запасом: за одним NAT чи проксі сидить багато читачів списку, кожен робить
+    # запит сторінки при відкритті і перепідключення стріму змін
+    "tasks": {"ip": "600/minute", "user": "600/minute"},
+    "users": {"ip": "30/minute", "user": "300/minute"},
+    "jobs": {"ip": "60/minute", "user": "300/minute"},
+}
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+SHED_EXEMPT_PATHS = ("/api/health", "/api/tasks/events")
+
+RATE_LIMITED_ERROR = "Too many requests, retry later"
+OVERLOADED_ERROR = "Server is overloaded, retry later"
+
+
+def rate_limits_from_env():
+    """Ліміти з RATE_LIMIT_<ГРУПА>_IP і RATE_LIMIT_<ГРУПА>_USER, наприклад RATE_LIMIT_USERS_IP=10/minute."""
+    return {
+        group: {key: os.getenv(f"RATE_LIMIT_{group.upper()}_{key.upper()}", default)
+                for key, default in limits.items()}
+        for group, limits in DEFAULT_RATE_LIMITS.items()
+    }
+
+
+def parse_rate(value):
+    """"100/minute" -> (100, 100 / 60): місткість відра і поповнення за секунду; None - без ліміту."""
+    value = (value or "").strip()
+    if value in ("", "0"):
+        return None
+    count, _, period = value.partition("/")
+    try:
+        count, seconds = int(count), PERIODS[period.strip()]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit '{value}', expected N/second, N/minute or N/hour")
+    return (count, count / seconds) if count > 0 else None
+
+
+def per_worker(limit, workers):
+    """Ліміт (capacity, rate) на один з workers воркерів з відрами в пам'яті; місткість - не менше 1 запиту."""
+    if limit is None or workers <= 1:
+        return limit
+    capacity, rate = limit
+    return max(1, capacity / workers), rate / workers
+
+
+def parse_trusted_proxies(value):
+    """
+    "127.0.0.1,172.16.0.0/12" -> кортеж мереж, з адрес яких приймається заголовок з IP клієнта;
+    "*" - будь-яка адреса (бекенд доступний лише через проксі), порожнє значення - жодна.
+    """
+    value = (value or "").strip()
+    if value == "*":
+        return None
+    try:
+        return tuple(ipaddress.ip_network(item.strip()) for item in value.split(",") if item.strip())
+    except ValueError:
+        raise ValueError(f"Invalid RATE_LIMIT_TRUSTED_PROXIES '{value}', expected IP addresses or networks")
+
+
+def retry_after_header(seconds):
+    return str(max(1, math.ceil(seconds)))
+
+
+# --- Бекенди token bucket ---
+# take(key, capacity, rate) забирає з відра один токен: 0 - запит дозволено,
+# інакше - через скільки секунд у відрі з'явиться токен (значення Retry-After).
+
+class LocalRateLimitBackend:
+    """Відра в пам'яті процесу; найдавніше використані відкидаються понад max_keys (потокобезпечний)."""
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        with self._lock:
+            now = self.clock()
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens, wait = tokens - 1, 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+# Поповнення і списання - одна атомарна операція в Redis; час - годинник Redis (однаковий для всіх воркерів).
+# Відро зникає, коли встигло б наповнитися повністю.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend:
+    """Спільні відра в Redis (Lua-скрипт TOKEN_BUCKET_SCRIPT)."""
+
+    blocking = True  # мережевий виклик: в ASGI-режимі - поза циклом подій
+
+    def __init__(self, client, prefix="ratelimit:"):
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url):
+        import redis  # необов'язкова залежність, потрібна лише для RATE_LIMIT_BACKEND=redis
+        return cls(redis.Redis.from_url(url, socket_timeout=0.5))
+
+    def take(self, key, capacity, rate):
+        try:
+            return float(self._script(keys=[self.prefix + key], args=[capacity, rate]))
+        except Exception:
+            logger.warning("Rate limit backend unavailable, request allowed", exc_info=True)
+            return 0.0
+
+
+# --- Скидання навантаження ---
+
+class LoadShedder:
+    """Лічильник запитів в обробці і рішення, чи приймати новий. 0 - відповідна перевірка вимкнена."""
+
+    def __init__(self, max_in_flight=0, max_pool_wait=0.0, pool_wait=recent_pool_wait):
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait
+        self.pool_wait = pool_wait
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        """Реєструє запит і повертає None або причину відмови ("in_flight", "pool_wait") - тоді leave() не потрібен."""
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                reason = "in_flight"
+            elif self.max_pool_wait and self.pool_wait.value() >= self.max_pool_wait:
+                reason = "pool_wait"
+            else:
+                self.in_flight += 1
+                REQUESTS_IN_FLIGHT.inc()
+                return None
+        REQUESTS_SHED.labels(reason=reason).inc()
+        return reason
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+            REQUESTS_IN_FLIGHT.dec()
+
+
+class AdmissionControl:
+    """Стан застосунку (app.extensions['admission']): спільний для Flask- і ASGI-режиму."""
+
+    def __init__(self, limits, backend, shedder, ip_header=None, trusted_proxies=()):
+        self.limits = limits        # група -> {"ip": (capacity, rate) | None, "user": ...}
+        self.backend = backend
+        self.shedder = shedder
+        self.ip_header = ip_header
+        self.trusted_proxies = trusted_proxies  # None - будь-яка адреса (див. parse_trusted_proxies)
+
+    def sheds(self, path):
+        return path.startswith("/api/") and not path.startswith(SHED_EXEMPT_PATHS)
+
+    def trusts(self, remote_addr):
+        if self.trusted_proxies is None:
+            return True
+        try:
+            address = ipaddress.ip_address(remote_addr or "")
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    def client_ip(self, headers, remote_addr):
+        """IP клієнта: із заголовка, який виставляє nginx (X-Real-IP), якщо з'єднання від довіреного проксі, або адреса з'єднання."""
+        forwarded = headers.get(self.ip_header) if self.ip_header and self.trusts(remote_addr) else None
+        return forwarded.split(",")[0].strip() if forwarded else remote_addr
+
+    def bucket(self, method, path, client_ip, identify):
+        """
+        Відро для запиту: (група, "ip" | "user", ключ, capacity, rate) або None, якщо ліміту немає.
+        identify() - id користувача з дійсного токена або None (викликається лише для груп з лімітами).
+        """
+        parts = path.split("/", 3)
+        limits = self.limits.get(parts[2]) if len(parts) > 2 and parts[1] == "api" else None
+        if not limits or method == "OPTIONS":  # CORS preflight не рахується
+            return None
+
+        user_id = identify()
+        key, subject = ("user", user_id) if user_id is not None else ("ip", client_ip)
+        if limits.get(key) is None:
+            return None
+        return (parts[2], key, f"{parts[2]}:{key}:{subject}", *limits[key])
+
+    def limited(self, bucket, wait):
+        """Результат backend.take() для відра -> секунди до наступної спроби або None."""
+        if wait <= 0:
+            return None
+        RATE_LIMITED.labels(group=bucket[0], key=bucket[1]).inc()
+        return wait
+
+    def retry_after(self, method, path, client_ip, identify):
+        """Секунди до наступної спроби, якщо ліміт вичерпано, інакше None (синхронний виклик бекенда)."""
+        bucket = self.bucket(method, path, client_ip, identify)
+        if bucket is None:
+            return None
+        return self.limited(bucket, self.backend.take(*bucket[2:]))
+
+
+# --- Розширення Flask ---
+
+class Admission:
+    """admission.init_app(app): ліміти частоти і скидання навантаження для /api/* (Flask і ASGI)."""
+
+    def init_app(self, app, backend=None):
+        limits = {}
+        if app.config.get('RATE_LIMIT_ENABLED', True):
+            limits = {group: {key: parse_rate(value) for key, value in rules.items()}
+                      for group, rules in app.config.get('RATE_LIMITS', {}).items()}
+        if backend is None:
+            if app.config.get('RATE_LIMIT_BACKEND', 'local') == 'redis':
+                backend = RedisRateLimitBackend.from_url(app.config['REDIS_URL'])
+            else:
+                backend = LocalRateLimitBackend(app.config.get('RATE_LIMIT_MAX_KEYS', 100000))
+                workers = app.config.get('GUNICORN_WORKERS', 1)
+                limits = {group: {key: per_worker(limit, workers) for key, limit in rules.items()}
+                          for group, rules in limits.items()}
+        shedder = LoadShedder(app.config.get('SHED_MAX_IN_FLIGHT', 0),
+                              app.config.get('SHED_MAX_POOL_WAIT_MS', 0) / 1000)
+        app.extensions['admission'] = AdmissionControl(
+            limits, backend, shedder, app.config.get('RATE_LIMIT_IP_HEADER'),
+            parse_trusted_proxies(app.config.get('RATE_LIMIT_TRUSTED_PROXIES', '')),
+        )
+        app.before_request(_before_request)
+        app.teardown_request(_teardown_request)
+
+
+def error_response(message, status, retry_after):
+    response = jsonify({"error": message})
+    response.headers["Retry-After"] = retry_after_header(retry_after)
+    return response, status
+
+
+def _before_request():
+    admission = current_app.extensions['admission']
+    if admission.sheds(request.path):
+        if admission.shedder.enter() is not None:
+            return error_response(OVERLOADED_ERROR, 503, 1)
+        g.admission_in_flight = True
+
+    client_ip = admission.client_ip(request.headers, request.remote_addr)
+    wait = admission.retry_after(request.method, request.path, client_ip, _flask_user_id)
+    if wait is not None:
+        return error_response(RATE_LIMITED_ERROR, 429, wait)
+
+
+def bearer_token(authorization):
+    scheme, _, token = (authorization or "").partition(" ")
+    return token.strip() if scheme == "Bearer" and token.strip() else None
+
+
+def cached_claims(jwt_auth, token):
+    """
+    Claims з кешу розкодованих токенів (app/auth.py) без запису метрик: маршрут після
+    middleware звертається до того самого кешу, і хіт на запит має рахуватися один раз.
+    """
+    return jwt_auth.token_cache.get(f"jwt:{token}")
+
+
+def _flask_user_id():
+    """id користувача з токена або None для анонімного запиту."""
+    token = bearer_token(request.headers.get("Authorization"))
+    if token is None:
+        return None
+    try:
+        claims = cached_claims(current_app.extensions['jwt_auth'], token) or decode_token(token)
+        return str(claims["sub"])
+    except (JWTExtendedException, PyJWTError, KeyError):
+        return None  # недійсний токен - ліміт за IP, а 401/422 поверне сам маршрут
+
+
+def _teardown_request(exc):
+    # Для потокових відповідей teardown виконується після відправлення всього тіла
+    if g.pop("admission_in_flight", False):
+        current_app.extensions['admission'].shedder.leave()
+
+
+# --- ASGI-режим ---
+
+class AdmissionMiddleware:
+    """ASGI-middleware з тими самими лімітами, лічильником і відповідями, що й у Flask-частини."""
+
+    def __init__(self, app, flask_app):
+        self.app = app
+        self.flask_app = flask_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        from starlette.datastructures import Headers
+        admission = self.flask_app.extensions['admission']
+        path = scope["path"]
+        in_flight = admission.sheds(path)
+        if in_flight and admission.shedder.enter() is not None:
+            return await self.reject(scope, receive, send, OVERLOADED_ERROR, 503, 1)
+
+        try:
+            headers = Headers(scope=scope)
+            client_ip = admission.client_ip(headers, (scope.get("client") or (None,))[0])
+            wait = await self.retry_after(admission, scope["method"], path, client_ip, lambda: self.user_id(headers))
+            if wait is not None:
+                return await self.reject(scope, receive, send, RATE_LIMITED_ERROR, 429, wait)
+            await self.app(scope, receive, send)
+        finally:
+            if in_flight:
+                admission.shedder.leave()
+
+    async def retry_after(self, admission, method, path, client_ip, identify):
+        """AdmissionControl.retry_after() з викликом бекенда через call_backend (Redis - у пулі потоків)."""
+        from app.asgi.common import call_backend
+        bucket = admission.bucket(method, path, client_ip, identify)
+        if bucket is None:
+            return None
+        return admission.limited(bucket, await call_backend(admission.backend, admission.backend.take, *bucket[2:]))
+
+    def user_id(self, headers):
+        from app.asgi.auth import JWTError, decode_access_token
+        token = bearer_token(headers.get("authorization"))
+        if token is None:
+            return None
+        jwt_auth = self.flask_app.extensions['jwt_auth']
+        try:
+            claims = cached_claims(jwt_auth, token) or decode_access_token(
+                self.flask_app.config, f"Bearer {token}", jwt_auth.token_cache)
+        except JWTError:
+            return None
+        return str(claims["sub"])
+
+    async def reject(self, scope, receive, send, message, status, retry_after):
+        from starlette.responses import Response
+        response = Response(self.flask_app.json.dumps_bytes({"error": message}), status_code=status,
+                            headers={"Retry-After": retry_after_header(retry_after)},
+                            media_type="application/json")
+        await response(scope, receive, send)
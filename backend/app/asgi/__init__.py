@@ -0,0 +1,67 @@
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app import create_app, db
+from app.admission import AdmissionMiddleware
+from app.database import (
+    async_database_url, async_engine_options_from_env, track_pool_metrics, enable_sqlite_foreign_keys,
+)
+from app.passwords import PasswordHasherOverloaded
+from app.query_stats import QueryStatsMiddleware, instrument_engine
+from app.asgi.common import json_response
+
+
+# --- Асинхронний (ASGI) режим API ---
+# Starlette + SQLAlchemy asyncio (asyncpg для PostgreSQL, aiosqlite для SQLite).
+# Поки запит чекає на БД, цикл подій обслуговує інші запити, тому кількість
+# одночасних запитів не обмежена кількістю воркерів/потоків.
+#
+# Контракт /api/tasks, /api/users, /api/health і JWT такі самі, як у Flask-blueprints.
+# Конфігурація, кеш і брокер подій беруться з Flask-застосунку create_app(),
+# тож обидва режими налаштовуються тими самими змінними середовища.
+# Запуск: gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+def create_asgi_app(flask_app=None):
+    flask_app = flask_app or create_app()
+    with flask_app.app_context():
+        database_url = db.engine.url.render_as_string(hide_password=False)
+
+    async_url = async_database_url(database_url)
+    engine = create_async_engine(async_url, **async_engine_options_from_env(async_url))
+    track_pool_metrics(engine.sync_engine)
+    enable_sqlite_foreign_keys(engine.sync_engine)
+
+    middleware = [Middleware(CORSMiddleware, allow_origins=["http://localhost:3000"],
+                             allow_methods=["*"], allow_headers=["*"],
+                             expose_headers=["Link", "X-Next-Cursor", "ETag", "X-Request-ID",
+                                             "Idempotent-Replayed"])]
+    if flask_app.config['SQL_METRICS_ENABLED']:
+        instrument_engine(engine.sync_engine)
+        middleware.append(Middleware(QueryStatsMiddleware, config=flask_app.config))
+    # Ліміти частоти і скидання навантаження - після CORS і X-Request-ID: відмови 429/503 теж їх мають
+    middleware.append(Middleware(AdmissionMiddleware, flask_app=flask_app))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    from app.asgi import tasks, users, health, jobs
+    app = Starlette(
+        routes=tasks.routes + users.routes + health.routes + jobs.routes,
+        middleware=middleware,
+        lifespan=lifespan,
+        exception_handlers={PasswordHasherOverloaded: password_hasher_overloaded},
+    )
+    app.state.flask_app = flask_app
+    app.state.config = flask_app.config
+    app.state.engine = engine
+    app.state.sessions = async_sessionmaker(engine, expire_on_commit=False)
+    return app
+
+
+async def password_hasher_overloaded(request, exc):
+    return json_response(request, {"error": "Too many login attempts in progress, retry later"}, 503,
+                         headers={"Retry-After": "1"})
@@ -0,0 +1,115 @@
+import functools
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+import jwt
+from app.asgi.common import json_response, sessions
+from app.auth import cache_token
+from app.metrics import CACHE_HITS, CACHE_MISSES
+
+
+# --- JWT для ASGI-режиму ---
+# Токени й помилки такі самі, як у flask_jwt_extended з налаштуваннями за замовчуванням
+# (HS256, заголовок "Authorization: Bearer <JWT>", ідентичність у claim "sub"),
+# тож токен, виданий одним режимом, приймається іншим.
+# Кеш розкодованих токенів і список відкликаних - ті самі, що й у Flask-частини (app/auth.py).
+
+ALGORITHM = "HS256"
+
+
+class JWTError(Exception):
+    def __init__(self, msg, status):
+        super().__init__(msg)
+        self.msg = msg
+        self.status = status
+
+
+def create_access_token(config, identity, additional_claims=None):
+    now = datetime.now(timezone.utc)
+    expires = config.get('JWT_ACCESS_TOKEN_EXPIRES', timedelta(minutes=15))
+    claims = {
+        "fresh": False,
+        "iat": now,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "sub": identity,
+        "nbf": now,
+        "csrf": str(uuid.uuid4()),
+        **(additional_claims or {}),
+    }
+    if expires:
+        claims["exp"] = now + expires
+    return jwt.encode(claims, config['JWT_SECRET_KEY'], algorithm=ALGORITHM)
+
+
+def decode_access_token(config, authorization, token_cache=None):
+    """Перевіряє заголовок Authorization і повертає claims або кидає JWTError."""
+    auth_header = (authorization or "").strip().strip(",")
+    if not auth_header:
+        raise JWTError("Missing Authorization Header", 401)
+
+    jwt_headers = [s for s in re.split(r",\s*", auth_header) if s.split()[0] == "Bearer"]
+    if len(jwt_headers) != 1:
+        raise JWTError("Missing 'Bearer' type in 'Authorization' header. "
+                       "Expected 'Authorization: Bearer <JWT>'", 401)
+    parts = jwt_headers[0].split()
+    if len(parts) != 2:
+        raise JWTError("Bad Authorization header. Expected 'Authorization: Bearer <JWT>'", 422)
+
+    if token_cache is not None:
+        claims = token_cache.get(f"jwt:{parts[1]}")
+        if claims is not None:
+            CACHE_HITS.labels(model="jwt").inc()
+            return claims
+        CACHE_MISSES.labels(model="jwt").inc()
+
+    try:
+        claims = jwt.decode(parts[1], config['JWT_SECRET_KEY'], algorithms=[ALGORITHM],
+                            options={"verify_aud": False, "verify_sub": False})
+    except jwt.ExpiredSignatureError:
+        raise JWTError("Token has expired", 401)
+    except jwt.InvalidTokenError as e:
+        raise JWTError(str(e), 422)
+
+    if "sub" not in claims:
+        raise JWTError("Missing claim: sub", 422)
+    if claims.get("type", "access") == "refresh":
+        raise JWTError("Only non-refresh tokens are allowed", 422)
+    if token_cache is not None:
+        cache_token(token_cache, parts[1], claims)
+    return claims
+
+
+def jwt_required(endpoint):
+    """Аналог @jwt_required(): claims зберігаються в request.state.jwt."""
+    @functools.wraps(endpoint)
+    async def wrapper(request):
+        auth = jwt_auth(request)
+        try:
+            claims = decode_access_token(request.app.state.config, request.headers.get("Authorization"),
+                                         auth.token_cache)
+        except JWTError as e:
+            return json_response(request, {"msg": e.msg}, e.status)
+
+        if auth.revocations.needs_sync():
+            async with sessions(request) as session:
+                await session.run_sync(auth.revocations.sync)
+        if auth.revocations.is_revoked(claims):
+            return json_response(request, {"msg": "Token has been revoked"}, 401)
+
+        request.state.jwt = claims
+        return await endpoint(request)
+    return wrapper
+
+
+def get_jwt_identity(request):
+    return request.state.jwt["sub"]
+
+
+def get_jwt(request):
+    return request.state.jwt
+
+
+def jwt_auth(request):
+    """Кеш токенів і список відкликаних токенів Flask-застосунку (app/auth.py)."""
+    return request.app.state.flask_app.extensions['jwt_auth']
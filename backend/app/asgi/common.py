@@ -0,0 +1,188 @@
+import asyncio
+import functools
+import json
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from sqlalchemy import select, update
+from app.etag import etag_matches
+from app.idempotency import HEADER, check_key, not_run_response, poll_delays, record_outcome, store_key
+from app.metrics import CACHE_HITS, CACHE_MISSES
+from app.query_stats import endpoint_name
+from app.models import TableVersion
+
+
+# --- Спільні хелпери ASGI-маршрутів ---
+# Аналоги jsonify(), request.get_json(), кешу та ETag з Flask-частини.
+# Конфігурація і розширення (кеш, брокер подій) беруться з Flask-застосунку,
+# з якого створено ASGI-застосунок (request.app.state.flask_app).
+
+def json_response(request, data, status=200, headers=None):
+    """Як jsonify(): той самий JSON-провайдер Flask, тому тіла відповідей збігаються побайтово."""
+    body = b"" if status == 204 else request.app.state.flask_app.json.dumps_bytes(data)
+    return Response(body, status_code=status, headers=headers, media_type="application/json")
+
+
+async def get_json(request):
+    """Як request.get_json(silent=True): dict/list або None."""
+    if "json" not in request.headers.get("content-type", ""):
+        return None
+    try:
+        return json.loads(await request.body())
+    except ValueError:
+        return None
+
+
+def sessions(request):
+    """AsyncSession на час обробки запиту: async with sessions(request) as session: ..."""
+    return request.app.state.sessions()
+
+
+def config(request):
+    return request.app.state.config
+
+
+async def run_service(request, fn, *args, **kwargs):
+    """
+    Функція сервісу (app/services) у сесії цього запиту: fn(sync_session, flask_app, *args).
+    AsyncSession.run_sync виконує її синхронний код у тому ж циклі подій, а запити до БД - асинхронно.
+    """
+    async with sessions(request) as session:
+        return await session.run_sync(fn, request.app.state.flask_app, *args, **kwargs)
+
+
+async def respond(request, reply):
+    """Reply сервісу -> відповідь Starlette (аналог respond() з app/routes/common.py)."""
+    if reply.invalidate:
+        await invalidate(request, *reply.invalidate)
+    if reply.body is None:
+        return Response(status_code=reply.status, headers=reply.headers)
+    return json_response(request, reply.body, reply.status, reply.headers)
+
+
+async def call_backend(backend, fn, *args):
+    """
+    Виклик fn (метод бекенда кешу, ідемпотентності або лімітів чи обгортка над ним) з корутини.
+    Мережеві бекенди (blocking = True, Redis) - у пулі потоків, щоб не блокувати цикл подій;
+    бекенди в пам'яті процесу - напряму, пул потоків для них дорожчий за сам виклик.
+    """
+    if getattr(backend, "blocking", False):
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+def password_hasher(request):
+    """PasswordHasher Flask-застосунку (app/passwords.py): hash_async()/verify_async()."""
+    return request.app.state.flask_app.extensions['passwords']
+
+
+# --- Кеш (ті самі бекенди та метрики, що й app/cache.py) ---
+
+def cache_backend(request):
+    return request.app.state.flask_app.extensions['cache']
+
+
+async def get_or_load(request, model, id, loader, version=None):
+    """Async-варіант Cache.get_or_load(): loader - корутина, що повертає dict або None."""
+    backend = cache_backend(request)
+    key = f"{model}:{id}"
+    value = await call_backend(backend, backend.get, key)
+    if value is not None and (version is None or value.get("version") == version):
+        CACHE_HITS.labels(model=model).inc()
+        return value
+
+    CACHE_MISSES.labels(model=model).inc()
+    value = await loader()
+    if value is not None:
+        await call_backend(backend, backend.set, key, value, config(request).get('CACHE_TTL', 30))
+    return value
+
+
+async def invalidate(request, model, *ids):
+    backend = cache_backend(request)
+    await call_backend(backend, backend.delete, *[f"{model}:{id}" for id in ids])
+
+
+# --- ETag (див. app/etag.py) ---
+
+async def table_version(session, name):
+    version = await session.scalar(select(TableVersion.version).where(TableVersion.name == name))
+    return version or 0
+
+
+async def row_version(session, model, id):
+    return await session.scalar(select(model.version).where(model.id == id))
+
+
+async def bump_table_version(session, *names):
+    for name in names:
+        result = await session.execute(
+            update(TableVersion).where(TableVersion.name == name).values(version=TableVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            session.add(TableVersion(name=name, version=1))
+
+
+def not_modified(request, etag, cache_control):
+    """Відповідь 304, якщо If-None-Match містить etag (слабке порівняння), інакше None."""
+    if not etag_matches(request.headers.get("If-None-Match"), etag):
+        return None
+    return with_cache_headers(Response(status_code=304), etag, cache_control)
+
+
+def with_cache_headers(response, etag, cache_control):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+# --- Ключі ідемпотентності (див. app/idempotency.py) ---
+
+def idempotent(endpoint):
+    """Аналог @idempotent з app/idempotency.py; ставиться під @jwt_required, якщо він є."""
+    name = endpoint_name(endpoint)  # те саме ім'я, що й Flask endpoint - ключі спільні для обох режимів
+
+    @functools.wraps(endpoint)
+    async def wrapper(request):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return await endpoint(request)
+        error = check_key(key)
+        if error:
+            return json_response(request, error, 400)
+
+        store = request.app.state.flask_app.extensions['idempotency']
+        claims = getattr(request.state, "jwt", None)
+        scoped_key = store_key(name, claims and str(claims["sub"]), key)
+        fingerprint = store.fingerprint(request.method, request.url.path, await get_json(request),
+                                        await request.body())
+        waited = False
+        outcome, record = await call_backend(store.backend, store.claim, scoped_key, fingerprint)
+        # в async-режимі повтор не займає потік, тож ліміт очікувань окремий і вищий
+        if outcome == "pending" and store.acquire_waiter(config(request)['IDEMPOTENCY_MAX_WAITERS_ASYNC']):
+            try:
+                for delay in poll_delays(store.wait_seconds):
+                    await asyncio.sleep(delay)
+                    waited = True
+                    outcome, record = await call_backend(store.backend, store.claim, scoped_key, fingerprint)
+                    if outcome != "pending":
+                        break
+            finally:
+                store.release_waiter()
+
+        if outcome != "run":
+            status, body, headers = not_run_response(name, outcome, record, waited)
+            if isinstance(body, dict):
+                return json_response(request, body, status, headers)
+            return Response(body, status_code=status, headers=headers, media_type="application/json")
+
+        try:
+            response = await endpoint(request)
+        except BaseException:
+            await call_backend(store.backend, store.release, scoped_key)
+            record_outcome(name, False)
+            raise
+        stored = await call_backend(store.backend, store.complete, scoped_key, fingerprint, response.status_code,
+                                    response.body, response.headers)
+        record_outcome(name, stored)
+        return response
+    return wrapper
@@ -0,0 +1,20 @@
+from starlette.routing import Route
+from app.asgi.common import json_response
+
+
+# --- Liveness і readiness (ASGI-режим) ---
+async def health_liveness(request):
+    return json_response(request, {"status": "ok"})
+
+
+async def health_readiness(request):
+    state = request.app.state.flask_app.extensions['readiness']
+    ready, body = await state.check_async(request.app.state.engine.sync_engine.pool)
+    return json_response(request, body, 200 if ready else 503)
+
+
+routes = [
+    Route("/api/health/live", health_liveness, methods=["GET"]),
+    Route("/api/health/ready", health_readiness, methods=["GET"]),
+    Route("/api/health/full", health_readiness, methods=["GET"]),
+]
@@ -0,0 +1,20 @@
+from starlette.routing import Route
+from app.models import Job
+from app.asgi.auth import jwt_required
+from app.asgi.common import json_response, sessions
+
+
+# --- Стан фонових задач (ASGI-режим), як app/routes/jobs.py ---
+@jwt_required
+async def get_job(request):
+    id = request.path_params["id"]
+    async with sessions(request) as session:
+        job = await session.get(Job, id)
+        if not job:
+            return json_response(request, {"error": f"Job with id {id} not found"}, 404)
+        return json_response(request, job.to_dict())
+
+
+routes = [
+    Route("/api/jobs/{id:int}", get_job, methods=["GET"]),
+]
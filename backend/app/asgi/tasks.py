@@ -0,0 +1,218 @@
+import time
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+from app import task_events
+from app.models import Task
+from app.asgi.auth import jwt_required, get_jwt_identity
+from app.asgi.common import (
+    json_response, get_json, sessions, config, get_or_load, row_version, not_modified, with_cache_headers,
+    idempotent, run_service, respond,
+)
+from app.etag import make_etag
+from app.events import format_sse
+from app.pagination import parse_fields
+from app.queries import TASK_FIELDS, select_all_tasks
+from app.services import tasks as service
+from app.streaming import EXPORT_FORMATS, aiter_ndjson, aiter_json_array, aiter_gzip, accepts_gzip
+
+
+# --- Маршрути /api/tasks для ASGI-режиму ---
+# Той самий контракт, що й app/routes/tasks.py: валідація, запити й коміт - спільні
+# функції app/services/tasks.py (через AsyncSession.run_sync), тут - розбір запиту,
+# кеш і потокові відповіді.
+
+# GET /tasks - список задач для авторизованих користувачів (сторінками).
+@jwt_required
+async def get_tasks(request):
+    return await list_tasks_page(request, current_user_id=int(get_jwt_identity(request)))
+
+
+# GET /tasks/public - список задач без авторизації.
+async def get_tasks_public(request):
+    return await list_tasks_page(request)
+
+
+# GET /tasks/stats - кількість задач за статусом і власником.
+async def get_task_stats(request):
+    return await respond(request, await run_service(request, service.task_stats, request.headers.get("If-None-Match")))
+
+
+# GET /tasks/export - потоковий експорт усіх задач (NDJSON або JSON-масив).
+@jwt_required
+async def export_tasks(request):
+    fmt = request.query_params.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return json_response(request, {"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, 400)
+
+    fields, error = parse_fields(request.query_params, TASK_FIELDS)
+    if error:
+        return json_response(request, error, 400)
+
+    batch_size = config(request)['TASKS_EXPORT_BATCH_SIZE']
+    dumps = request.app.state.flask_app.json.dumps
+
+    async def partitions():
+        async with sessions(request) as session:
+            result = await session.stream(select_all_tasks(fields).execution_options(yield_per=batch_size))
+            async for rows in result.partitions():
+                yield [dict(row._mapping) for row in rows]
+
+    encode = aiter_ndjson if fmt == "ndjson" else aiter_json_array
+    chunks = encode(partitions(), lambda item: dumps(item, separators=(",", ":")))
+
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("Accept-Encoding")):
+        chunks = aiter_gzip(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(chunks, media_type=EXPORT_FORMATS[fmt], headers=headers)
+
+
+# GET /tasks/events - стрім змін задач (Server-Sent Events).
+# Очікування подій не займає потік, тому в ASGI-режимі SSE-клієнти значно дешевші.
+async def task_events_stream(request):
+    last_event_id = request.headers.get("Last-Event-ID") or request.query_params.get("last_event_id")
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            last_event_id = -1
+
+    if not task_events.acquire_stream(config(request)['TASK_EVENTS_MAX_STREAMS_ASYNC']):
+        return json_response(request, {"error": "Too many event streams, retry later"}, 503,
+                             headers={"Retry-After": "10"})
+
+    broker = request.app.state.flask_app.extensions['task_events']
+    heartbeat = config(request)['TASK_EVENTS_HEARTBEAT_SECONDS']
+    deadline = time.monotonic() + config(request)['TASK_EVENTS_MAX_STREAM_SECONDS']
+
+    async def stream():
+        last_id = last_event_id
+        try:
+            if last_id is None:
+                last_id = broker.latest_id()
+                yield format_sse(id=last_id, retry=3000)
+            else:
+                yield format_sse(retry=3000)
+
+            while (remaining := deadline - time.monotonic()) > 0:
+                events, reset = await broker.read_async(last_id, timeout=min(heartbeat, remaining))
+                if reset:
+                    last_id = broker.latest_id()
+                    yield format_sse("{}", event="reset", id=last_id)
+                elif events:
+                    yield b"".join(format_sse(e.data, event="task", id=e.id) for e in events)
+                    last_id = events[-1].id
+                else:
+                    yield b": heartbeat\n\n"
+        except ConnectionError:
+            pass
+        finally:
+            task_events.release_stream()
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# POST /tasks - створення нової задачі.
+@jwt_required
+@idempotent
+async def create_task(request):
+    return await respond(request, await run_service(request, service.create_task, await get_json(request)))
+
+
+# GET /tasks/:id - інформація про конкретну задачу.
+@jwt_required
+async def get_task(request):
+    id = request.path_params["id"]
+    cache_control = config(request)['HTTP_CACHE_CONTROL_PRIVATE']
+    async with sessions(request) as session:
+        version = await row_version(session, Task, id)
+        if version is not None:
+            cached = not_modified(request, make_etag("task", id, version), cache_control)
+            if cached:
+                return cached
+            task = await get_or_load(request, "task", id, lambda: load_task_dict(session, id), version=version)
+        else:
+            task = None
+    if not task:
+        return json_response(request, {"error": f"Task with id {id} not found"}, 404)
+    return with_cache_headers(json_response(request, task), make_etag("task", id, task["version"]), cache_control)
+
+
+# PUT /tasks/:id - оновлення задачі.
+@jwt_required
+async def update_task(request):
+    reply = await run_service(request, service.update_task, request.path_params["id"], await get_json(request),
+                              request.headers.get("If-Match"))
+    return await respond(request, reply)
+
+
+# DELETE /tasks/:id - видалення задачі.
+@jwt_required
+async def delete_task(request):
+    return await respond(request, await run_service(request, service.delete_task, request.path_params["id"]))
+
+
+# --- Пакетні операції над задачами ---
+
+# POST /tasks/bulk - створення багатьох задач.
+@jwt_required
+@idempotent
+async def bulk_create_tasks(request):
+    return await respond(request, await run_service(request, service.bulk_create_tasks, await get_json(request)))
+
+
+# PUT /tasks/bulk - оновлення багатьох задач.
+@jwt_required
+async def bulk_update_tasks(request):
+    return await respond(request, await run_service(request, service.bulk_update_tasks, await get_json(request)))
+
+
+# POST /tasks/import - імпорт задач фоновою задачею (202).
+@jwt_required
+@idempotent
+async def import_tasks(request):
+    reply = await run_service(request, service.import_tasks, await get_json(request),
+                              created_by=int(get_jwt_identity(request)))
+    return await respond(request, reply)
+
+
+# DELETE /tasks/bulk - видалення багатьох задач.
+@jwt_required
+async def bulk_delete_tasks(request):
+    return await respond(request, await run_service(request, service.bulk_delete_tasks, await get_json(request)))
+
+
+# Сторінка списку задач (див. list_tasks_page у app/services/tasks.py).
+async def list_tasks_page(request, current_user_id=None):
+    args = request.query_params
+    reply = await run_service(
+        request, service.list_tasks_page, args, args.multi_items(), str(request.url.replace(query="")),
+        f"{request.url.path}?{request.url.query}", request.headers.get("If-None-Match"),
+        current_user_id=current_user_id,
+    )
+    return await respond(request, reply)
+
+
+# Завантаження задачі для кешу (dict або None).
+async def load_task_dict(session, id):
+    task = await session.get(Task, id)
+    return task.to_dict() if task else None
+
+
+routes = [
+    Route("/api/tasks", get_tasks, methods=["GET"]),
+    Route("/api/tasks", create_task, methods=["POST"]),
+    Route("/api/tasks/public", get_tasks_public, methods=["GET"]),
+    Route("/api/tasks/stats", get_task_stats, methods=["GET"]),
+    Route("/api/tasks/export", export_tasks, methods=["GET"]),
+    Route("/api/tasks/events", task_events_stream, methods=["GET"]),
+    Route("/api/tasks/bulk", bulk_create_tasks, methods=["POST"]),
+    Route("/api/tasks/bulk", bulk_update_tasks, methods=["PUT"]),
+    Route("/api/tasks/bulk", bulk_delete_tasks, methods=["DELETE"]),
+    Route("/api/tasks/import", import_tasks, methods=["POST"]),
+    Route("/api/tasks/{id:int}", get_task, methods=["GET"]),
+    Route("/api/tasks/{id:int}", update_task, methods=["PUT"]),
+    Route("/api/tasks/{id:int}", delete_task, methods=["DELETE"]),
+]
@@ -0,0 +1,149 @@
+from starlette.routing import Route
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from app.models import User
+from app.asgi.auth import create_access_token, jwt_required, get_jwt, get_jwt_identity, jwt_auth
+from app.asgi.common import (
+    json_response, get_json, sessions, config, get_or_load, password_hasher, row_version, not_modified,
+    with_cache_headers, idempotent, run_service, respond,
+)
+from app.etag import make_etag, expected_version
+from app.services import users as service
+from app.services.users import validate_user_data, user_claims, claims_user
+
+
+# --- Маршрути /api/users для ASGI-режиму (контракт app/routes/users.py) ---
+# Валідація, запити й коміт - спільні функції app/services/users.py (через AsyncSession.run_sync).
+# Хешування і перевірка пароля виконуються в пулі процесів (app/passwords.py),
+# цикл подій лише чекає на результат.
+
+# Реєстрація користувача
+@idempotent
+async def register(request):
+    data = await get_json(request)
+    is_valid, error = validate_user_data(data)
+    if not is_valid:
+        return json_response(request, error, 400)
+
+    password_hash = await password_hasher(request).hash_async(data["password"])
+    return await respond(request, await run_service(request, service.register, data, password_hash))
+
+
+# Авторизація користувача
+async def login(request):
+    data = await get_json(request)
+    if not data or "username" not in data or "password" not in data:
+        return json_response(request, {"error": "Username and password are required"}, 400)
+
+    hasher = password_hasher(request)
+    async with sessions(request) as session:
+        user = await session.scalar(select(User).filter_by(username=data["username"]).limit(1))
+
+        if not user or not await hasher.verify_async(user.password, data["password"]):
+            return json_response(request, {"error": "Invalid credentials"}, 401)
+
+        # Оновлення хешу зі старими параметрами (див. app/routes/users.py)
+        if hasher.needs_rehash(user.password):
+            try:
+                user.password = await hasher.hash_async(data["password"])
+                await session.commit()
+            except SQLAlchemyError:
+                await session.rollback()
+
+    access_token = create_access_token(config(request), identity=str(user.id),
+                                       additional_claims=user_claims(config(request), user))
+    return json_response(request, {"access_token": access_token})
+
+
+# POST /users/logout - відкликання поточного токена
+@jwt_required
+async def logout(request):
+    return await respond(request, await run_service(request, service.logout, get_jwt(request)))
+
+
+# GET /users/me - дані поточного користувача
+@jwt_required
+async def get_current_user(request):
+    claims = get_jwt(request)
+    user = claims_user(claims)
+    if user and not jwt_auth(request).revocations.claims_stale(claims):
+        cache_control = config(request)['HTTP_CACHE_CONTROL_PRIVATE']
+        etag = make_etag("user", user["id"], user["version"])
+        return (not_modified(request, etag, cache_control)
+                or with_cache_headers(json_response(request, user), etag, cache_control))
+    return await user_detail_response(request, int(get_jwt_identity(request)))
+
+
+# GET /users - список усіх користувачів
+@jwt_required
+async def get_users(request):
+    reply = await run_service(request, service.list_users, request.query_params, request.headers.get("If-None-Match"))
+    return await respond(request, reply)
+
+
+# GET /users/:id
+@jwt_required
+async def get_user(request):
+    return await user_detail_response(request, request.path_params["id"])
+
+
+# PUT /users/:id
+@jwt_required
+async def update_user(request):
+    id = request.path_params["id"]
+    data = await get_json(request)
+    is_valid, error = validate_user_data(data)
+    if not is_valid:
+        return json_response(request, error, 400)
+    version, error = expected_version(request.headers.get("if-match"), data)
+    if error:
+        return json_response(request, error, 400)
+
+    rejected = await run_service(request, service.check_user_update, id, version)
+    if rejected:
+        return await respond(request, rejected)
+    password_hash = await password_hasher(request).hash_async(data['password'])
+    return await respond(request, await run_service(request, service.update_user, id, data, version, password_hash))
+
+
+# DELETE /users/:id - через фонову задачу (202), як у app/routes/users.py
+@jwt_required
+async def delete_user(request):
+    reply = await run_service(request, service.delete_user, request.path_params["id"],
+                              created_by=int(get_jwt_identity(request)))
+    return await respond(request, reply)
+
+
+# Відповідь з даними одного користувача: ETag/304, далі кеш, далі БД.
+async def user_detail_response(request, id):
+    cache_control = config(request)['HTTP_CACHE_CONTROL_PRIVATE']
+    async with sessions(request) as session:
+        version = await row_version(session, User, id)
+        if version is not None:
+            cached = not_modified(request, make_etag("user", id, version), cache_control)
+            if cached:
+                return cached
+            user = await get_or_load(request, "user", id, lambda: load_user_dict(session, id), version=version)
+        else:
+            user = None
+    if not user:
+        return json_response(request, {"error": f"User with id {id} not found"}, 404)
+    return with_cache_headers(json_response(request, user), make_etag("user", id, user["version"]), cache_control)
+
+
+# Завантаження користувача для кешу (dict або None).
+async def load_user_dict(session, id):
+    user = await session.get(User, id)
+    return user.to_dict() if user else None
+
+
+routes = [
+    Route("/api/users/register", register, methods=["POST"]),
+    Route("/api/users/login", login, methods=["POST"]),
+    Route("/api/users/logout", logout, methods=["POST"]),
+    Route("/api/users/me", get_current_user, methods=["GET"]),
+    Route("/api/users", get_users, methods=["GET"]),
+    Route("/api/users/{id:int}", get_user, methods=["GET"]),
+    Route("/api/users/{id:int}", update_user, methods=["PUT"]),
+    Route("/api/users/{id:int}", delete_user, methods=["DELETE"]),
+]
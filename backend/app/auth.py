@@ -0,0 +1,161 @@
+import threading
+import time
+from flask import current_app
+from flask_jwt_extended import JWTManager
+from sqlalchemy import delete, select
+from app.cache import LocalCacheBackend
+from app.metrics import CACHE_HITS, CACHE_MISSES
+
+
+# --- Швидка перевірка JWT ---
+# 1. Кеш розкодованих claims: ключ - сам токен, запис живе до exp токена (LRU на
+#    JWT_DECODE_CACHE_SIZE записів). Повторний запит з тим самим токеном не перевіряє
+#    підпис і не розбирає JSON заново.
+# 2. Список відкликаних токенів у пам'яті процесу - перевірка O(1) без запиту до БД.
+#    Джерело правди - таблиця revoked_tokens; воркер перечитує її не частіше ніж раз на
+#    JWT_REVOCATION_SYNC_SECONDS і лише якщо змінилась її версія (table_versions),
+#    тож відкликання в одному воркері доходить до інших не пізніше цього інтервалу.
+# 3. З JWT_EMBED_USER_CLAIMS токен містить username і version, і /api/users/me відповідає
+#    без запиту до БД (поки claims користувача не застаріли - див. KIND_CLAIMS).
+#
+# Записи revoked_tokens:
+#   - KIND_TOKEN  - відкликано один токен (jti), наприклад, logout;
+#   - KIND_USER   - відкликано всі токени користувача, видані до issued_before (видалення користувача);
+#   - KIND_CLAIMS - токени, видані до issued_before, мають застарілі claims (користувача оновлено):
+#                   вони дійсні, але /me для них читає дані з БД.
+# Запис видаляється, коли всі токени, яких він стосується, прострочені (expires_at).
+
+KIND_TOKEN = "token"
+KIND_USER = "user"
+KIND_CLAIMS = "claims"
+VERSION_NAME = "revoked_tokens"
+
+
+class RevocationList:
+    """Відкликані токени в пам'яті процесу, синхронізовані з таблицею revoked_tokens."""
+
+    def __init__(self, sync_interval=1.0):
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._tokens = set()   # jti
+        self._users = {}       # user_id -> issued_before
+        self._claims = {}      # user_id -> issued_before
+        self._version = None
+        self._synced_at = None
+
+    def needs_sync(self):
+        return self._synced_at is None or time.monotonic() - self._synced_at >= self.sync_interval
+
+    def sync(self, session):
+        """Перечитує таблицю, якщо змінилась її версія. session - синхронна Session/Connection."""
+        from app.models import RevokedToken, TableVersion
+        version = session.scalar(select(TableVersion.version).where(TableVersion.name == VERSION_NAME)) or 0
+        if version != self._version:
+            now = int(time.time())
+            rows = session.execute(
+                select(RevokedToken.kind, RevokedToken.jti, RevokedToken.user_id, RevokedToken.issued_before)
+                .where((RevokedToken.expires_at.is_(None)) | (RevokedToken.expires_at > now))
+            ).all()
+            tokens, users, claims = set(), {}, {}
+            for kind, jti, user_id, issued_before in rows:
+                if kind == KIND_TOKEN:
+                    tokens.add(jti)
+                else:
+                    target = users if kind == KIND_USER else claims
+                    target[user_id] = max(target.get(user_id, 0), issued_before)
+            with self._lock:
+                self._tokens, self._users, self._claims = tokens, users, claims
+                self._version = version
+        self._synced_at = time.monotonic()
+
+    def is_revoked(self, claims):
+        if claims.get("jti") in self._tokens:
+            return True
+        return claims.get("iat", 0) <= self._users.get(_user_id(claims), -1)
+
+    def claims_stale(self, claims):
+        return claims.get("iat", 0) <= self._claims.get(_user_id(claims), -1)
+
+    def revoke(self, session, kind, jti=None, user_id=None, expires_in=None):
+        """
+        Додає запис у поточну транзакцію (викликати перед commit, як bump_table_version).
+        expires_in - скільки секунд ще можуть жити токени, яких стосується запис (None - завжди).
+        """
+        from app.etag import bump_table_version
+        from app.models import RevokedToken
+        now = int(time.time())
+        session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        session.add(RevokedToken(kind=kind, jti=jti, user_id=user_id, issued_before=now,
+                                 expires_at=now + expires_in if expires_in is not None else None))
+        bump_table_version(VERSION_NAME, session=session)
+        # Наступна перевірка в цьому воркері одразу перечитає таблицю
+        self._synced_at = None
+
+
+def _user_id(claims):
+    try:
+        return int(claims.get("sub"))
+    except (TypeError, ValueError):
+        return None
+
+
+def access_token_lifetime(config):
+    """Максимальний час життя access-токена в секундах (None - без терміну дії)."""
+    expires = config.get('JWT_ACCESS_TOKEN_EXPIRES')
+    return int(expires.total_seconds()) if expires else None
+
+
+class CachingJWTManager(JWTManager):
+    """
+    JWTManager з кешем розкодованих токенів і списком відкликаних токенів.
+    Стан окремий для кожного застосунку: app.extensions['jwt_auth'].
+    """
+
+    def init_app(self, app, add_context_processor=False):
+        super().init_app(app, add_context_processor)
+        app.extensions['jwt_auth'] = JWTAuthState(
+            token_cache=LocalCacheBackend(app.config.get('JWT_DECODE_CACHE_SIZE', 10000)),
+            revocations=RevocationList(app.config.get('JWT_REVOCATION_SYNC_SECONDS', 1.0)),
+        )
+        self.token_in_blocklist_loader(token_in_blocklist)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if allow_expired or csrf_value is not None:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        token_cache = current_app.extensions['jwt_auth'].token_cache
+        claims = token_cache.get(f"jwt:{encoded_token}")
+        if claims is not None:
+            CACHE_HITS.labels(model="jwt").inc()
+            return claims
+
+        CACHE_MISSES.labels(model="jwt").inc()
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        cache_token(token_cache, encoded_token, claims)
+        return claims
+
+
+class JWTAuthState:
+    def __init__(self, token_cache, revocations):
+        self.token_cache = token_cache
+        self.revocations = revocations
+
+
+def cache_token(token_cache, encoded_token, claims):
+    """Кешує claims до exp токена; токени без exp кешуються на годину."""
+    ttl = claims["exp"] - time.time() if "exp" in claims else 3600
+    if ttl > 0:
+        token_cache.set(f"jwt:{encoded_token}", claims, ttl)
+
+
+def token_in_blocklist(jwt_header, jwt_data):
+    from app import db
+    revocations = current_revocations()
+    if revocations.needs_sync():
+        revocations.sync(db.session)
+    return revocations.is_revoked(jwt_data)
+
+
+def current_revocations():
+    """RevocationList поточного застосунку."""
+    return current_app.extensions['jwt_auth'].revocations
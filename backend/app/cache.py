@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from app.metrics import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS
+
+
+# --- Read-through кеш для окремих записів (задача, користувач) ---
+# Ключ - "<model>:<id>", значення - dict, готовий до jsonify.
+# Маршрути запису (update/delete/register) інвалідовують відповідні ключі після commit.
+# Зміна з іншого воркера не інвалідовує локальний кеш, тому маршрути читання передають
+# поточну версію запису (колонка version), і значення іншої версії завантажується заново.
+#
+# Бекенди:
+#   - local - LRU + TTL у пам'яті процесу. У кожного воркера gunicorn свій кеш, тому
+#             після зміни в іншому воркері дані можуть бути застарілими не довше CACHE_TTL;
+#   - redis - спільний для всіх воркерів кеш (REDIS_URL);
+#   - none  - кеш вимкнено.
+
+class LocalCacheBackend:
+    """LRU-кеш з TTL у пам'яті процесу (потокобезпечний)."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while len(self._data) > self.max_entries:
+            evicted, _ = self._data.popitem(last=False)
+            CACHE_EVICTIONS.labels(model=evicted.split(":", 1)[0]).inc()
+
+    def add(self, key, value, ttl):
+        """Записує значення, лише якщо ключа немає; повертає наявне значення або None, якщо записано."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > time.monotonic():
+                return item[1]
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            self._evict()
+            return None
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCacheBackend:
+    """Кеш у Redis; значення зберігаються як JSON з TTL (SET ... EX)."""
+
+    blocking = True  # мережеві виклики: ASGI-режим виконує їх у пулі потоків
+
+    def __init__(self, client, prefix="cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url):
+        import redis  # необов'язкова залежність, потрібна лише для CACHE_BACKEND=redis
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class NullCacheBackend:
+    """Кеш вимкнено: завжди промах."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class Cache:
+    """Розширення Flask: cache.init_app(app), далі cache.get_or_load(...) у маршрутах."""
+
+    def init_app(self, app, backend=None):
+        if backend is None:
+            kind = app.config.get('CACHE_BACKEND', 'local')
+            if kind == 'redis':
+                backend = RedisCacheBackend.from_url(app.config['REDIS_URL'])
+            elif kind == 'none':
+                backend = NullCacheBackend()
+            else:
+                backend = LocalCacheBackend(app.config.get('CACHE_MAX_ENTRIES', 10000))
+        app.extensions['cache'] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions['cache']
+
+    @staticmethod
+    def key(model, id):
+        return f"{model}:{id}"
+
+    def get_or_load(self, model, id, loader, version=None):
+        """
+        Повертає закешоване значення або викликає loader() і кешує результат.
+        loader повертає dict або None (None не кешується - запис не знайдено).
+        version - поточна версія запису: закешоване значення іншої версії вважається промахом.
+        """
+        key = self.key(model, id)
+        value = self.backend.get(key)
+        if value is not None and (version is None or value.get("version") == version):
+            CACHE_HITS.labels(model=model).inc()
+            return value
+
+        CACHE_MISSES.labels(model=model).inc()
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value, current_app.config.get('CACHE_TTL', 30))
+        return value
+
+    def invalidate(self, model, *ids):
+        """Видаляє записи з кешу; викликається після commit у маршрутах запису."""
+        self.backend.delete(*[self.key(model, id) for id in ids])
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.metrics import (
+    DB_POOL_CHECKOUT_WAIT, DB_POOL_SIZE, DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW,
+)
+
+
+# --- Налаштування engine та пулу з'єднань SQLAlchemy ---
+
+class RecentPoolWait:
+    """
+    Найдовше очікування з'єднання за останні 1-2 вікна по window секунд (для скидання навантаження,
+    див. app/admission.py). Старі виміри забуваються самі: коли запити перестають чекати на пул
+    або не доходять до нього, значення падає до 0 не пізніше ніж за 2 * window.
+    """
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self._lock = threading.Lock()
+        self._slot = 0
+        self._current = 0.0
+        self._previous = 0.0
+
+    def _rotate(self, slot):
+        if slot != self._slot:
+            self._previous = self._current if slot == self._slot + 1 else 0.0
+            self._current = 0.0
+            self._slot = slot
+
+    def record(self, seconds):
+        with self._lock:
+            self._rotate(int(time.monotonic() / self.window))
+            self._current = max(self._current, seconds)
+
+    def value(self):
+        with self._lock:
+            self._rotate(int(time.monotonic() / self.window))
+            return max(self._current, self._previous)
+
+
+# Спільне для всіх engine процесу (синхронного Flask і asyncio ASGI-режиму)
+recent_pool_wait = RecentPoolWait()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, що міряє час очікування з'єднання (включно з відкриттям нового)."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            elapsed = time.perf_counter() - start
+            DB_POOL_CHECKOUT_WAIT.observe(elapsed)
+            recent_pool_wait.record(elapsed)
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Те саме для create_async_engine(): asyncio-engine вимагає AsyncAdaptedQueuePool."""
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_options_from_env(database_url):
+    """
+    Параметри create_engine() для SQLALCHEMY_ENGINE_OPTIONS зі змінних середовища:
+        - DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE - розмір пулу і таймаути;
+        - DB_POOL_PRE_PING - перевіряти з'єднання перед видачею (стійкість до рестартів БД);
+        - DB_PGBOUNCER - режим роботи через PgBouncer (transaction pooling):
+          вимикає серверні prepared statements у драйверах, що їх використовують.
+    Для SQLite пул не налаштовується - Flask-SQLAlchemy сам обирає відповідний.
+    """
+    if database_url.startswith("sqlite"):
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+    if _env_bool("DB_PGBOUNCER", False):
+        driver = database_url.split("://", 1)[0]
+        if driver == "postgresql+psycopg":
+            # psycopg 3 готує запити на сервері після prepare_threshold виконань
+            options["connect_args"] = {"prepare_threshold": None}
+        elif driver == "postgresql+asyncpg":
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        # psycopg2 (postgresql://) не використовує серверні prepared statements
+
+    return options
+
+
+def async_database_url(database_url):
+    """URL для create_async_engine(): asyncpg для PostgreSQL, aiosqlite для SQLite."""
+    scheme, sep, rest = database_url.partition("://")
+    if scheme.startswith("postgresql"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return database_url
+
+
+def async_engine_options_from_env(database_url):
+    """
+    Те саме, що engine_options_from_env(), але для create_async_engine():
+    asyncio-engine вимагає AsyncAdaptedQueuePool (тут - з тим самим виміром очікування).
+    """
+    options = engine_options_from_env(database_url)
+    if "poolclass" in options:
+        options["poolclass"] = InstrumentedAsyncQueuePool
+    return options
+
+
+def track_pool_metrics(engine):
+    """
+    Оновлює gauge-метрики пулу при кожній видачі/поверненні з'єднання.
+    Лічильник виданих з'єднань ведеться власний: подія checkin спрацьовує
+    ще до того, як пул зменшить свій checkedout().
+    """
+    if not isinstance(engine.pool, QueuePool):
+        return
+
+    lock = threading.Lock()
+    state = {"checked_out": 0}
+
+    def update(delta):
+        with lock:
+            state["checked_out"] += delta
+            checked_out = state["checked_out"]
+        # engine.pool читається щоразу: після dispose() (наприклад, post_fork у gunicorn) пул новий
+        size = engine.pool.size()
+        DB_POOL_SIZE.set(size)
+        DB_POOL_CHECKED_OUT.set(checked_out)
+        DB_POOL_OVERFLOW.set(max(0, checked_out - size))
+
+    event.listen(engine, "checkout", lambda *_: update(1))
+    event.listen(engine, "checkin", lambda *_: update(-1))
+    update(0)
+
+
+def pool_status(pool):
+    """
+    Зайнятість пулу з'єднань для /api/health/ready: saturation - частка виданих з'єднань
+    від максимуму (pool_size + max_overflow). Лише лічильники пулу, без очікування з'єднання.
+    """
+    if not isinstance(pool, QueuePool):
+        return None
+    size, checked_out = pool.size(), pool.checkedout()
+    limit = size + pool._max_overflow if pool._max_overflow >= 0 else None
+    return {
+        "size": size,
+        "checked_out": checked_out,
+        "overflow": max(0, pool.overflow()),
+        "saturation": round(checked_out / limit, 2) if limit else None,
+    }
+
+
+# --- Обмеження БД замість перевірок у коді ---
+# Унікальність username і існування власника задачі перевіряє сама БД (UNIQUE, FOREIGN KEY),
+# маршрути лише перетворюють IntegrityError на ті самі повідомлення 400.
+
+def enable_sqlite_foreign_keys(engine):
+    """SQLite перевіряє FOREIGN KEY лише з PRAGMA foreign_keys=ON на кожному з'єднанні."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def integrity_error_kind(error):
+    """Тип порушеного обмеження: "foreign_key", "unique" або None."""
+    if not isinstance(error, IntegrityError):
+        return None
+    orig = error.orig
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if code == "23503":
+        return "foreign_key"
+    if code == "23505":
+        return "unique"
+    message = str(orig).lower()
+    if "foreign key" in message:
+        return "foreign_key"
+    if "unique" in message or "duplicate key" in message:
+        return "unique"
+    return None
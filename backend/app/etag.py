@@ -0,0 +1,98 @@
+import hashlib
+import re
+from flask import current_app, request
+from sqlalchemy import select, update
+from werkzeug.http import parse_etags
+from app import db
+from app.models import TableVersion
+
+
+# --- ETag і умовні GET-запити ---
+# ETag будується з версії таблиці (table_versions), яка збільшується в тій самій
+# транзакції, що й зміна даних. Тому перевірка If-None-Match коштує один запит
+# по первинному ключу, і при збігу відповідь 304 віддається без основного запиту
+# та серіалізації тіла.
+#
+# Окремі записи (задача, користувач) мають власну колонку version, тому їхній ETag будується
+# з неї, а тіло з кешу віддається лише тієї самої версії: кеш воркера, який не бачив зміни
+# з іншого воркера, не може віддати старе тіло з новим ETag (або 304 на старі дані).
+
+def table_version(name, session=None):
+    """Поточна версія таблиці (0, якщо таблицю ще не змінювали)."""
+    session = session or db.session
+    version = session.scalar(select(TableVersion.version).where(TableVersion.name == name))
+    return version or 0
+
+
+def row_version(model, id):
+    """Версія запису (колонка version) або None, якщо запису немає."""
+    return db.session.scalar(select(model.version).where(model.id == id))
+
+
+def bump_table_version(*names, session=None):
+    """Збільшує версії таблиць у поточній транзакції; викликати перед commit."""
+    session = session or db.session
+    for name in names:
+        result = session.execute(
+            update(TableVersion).where(TableVersion.name == name).values(version=TableVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            session.add(TableVersion(name=name, version=1))
+
+
+def make_etag(*parts):
+    """Слабкий ETag з довільних частин (версія таблиці, id, параметри запиту...)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Чи містить заголовок If-None-Match цей ETag (слабке порівняння, як вимагає RFC 9110)."""
+    return parse_etags(if_none_match).contains_weak(etag[2:].strip('"'))
+
+
+def not_modified(etag, cache_control):
+    """
+    Якщо клієнт уже має цю версію (If-None-Match), повертає готову відповідь 304,
+    інакше None.
+    """
+    if not etag_matches(request.headers.get("If-None-Match"), etag):
+        return None
+    response = current_app.response_class(status=304)
+    return with_cache_headers(response, etag, cache_control)
+
+
+def with_cache_headers(response, etag, cache_control):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+# --- Оптимістичне блокування: If-Match / version ---
+# Task і User мають колонку version, яку кожен UPDATE збільшує на 1. Клієнт передає версію,
+# яку бачив, у заголовку If-Match ("3") або в полі version тіла; тоді оновлення - один
+# UPDATE ... WHERE id = ? AND version = ?, і якщо запис тим часом змінили, маршрут відповідає
+# 409 з поточним станом запису. Без версії (або з If-Match: *) оновлення безумовне, як раніше.
+
+VERSION_TAG = re.compile(r'"(\d+)"', re.ASCII)
+
+
+def expected_version(if_match, data):
+    """
+    Версія, на яку розраховує клієнт:
+        - (version або None, {}) якщо заголовок і поле валідні (None - без перевірки);
+        - (None, {"error": "..."}) якщо ні.
+    """
+    header = None
+    if if_match is not None and if_match.strip() != "*":
+        match = VERSION_TAG.fullmatch(if_match.strip())
+        if not match:
+            return None, {"error": 'If-Match must be the resource version, e.g. "3"'}
+        header = int(match.group(1))
+
+    body = data.get("version") if isinstance(data, dict) else None
+    if body is not None and (isinstance(body, bool) or not isinstance(body, int)):
+        return None, {"error": "version must be an integer"}
+    if header is not None and body is not None and header != body:
+        return None, {"error": "If-Match and version do not match"}
+    return (header if header is not None else body), {}
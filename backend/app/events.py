@@ -0,0 +1,369 @@
+import asyncio
+import os
+import select as io_select
+import threading
+import time
+from collections import deque, namedtuple
+from flask import current_app
+from sqlalchemy import event, func, insert
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+
+
+# --- Стрім змін задач (Server-Sent Events) ---
+# Маршрути запису публікують зміни (created/updated/deleted) перед commit,
+# а клієнти /api/tasks/events отримують їх як SSE-події з id. Після розриву
+# браузер перепідключається із заголовком Last-Event-ID і отримує лише пропущені
+# події; якщо їх уже немає в буфері - подію reset (потрібно перечитати список).
+#
+# Брокери:
+#   - InProcessBroker - буфер у пам'яті процесу; події потрапляють у нього лише
+#                       після успішного commit (SQLite, розробка, тести);
+#   - PostgresBroker  - подія пишеться в таблицю task_events у транзакції зміни,
+#                       NOTIFY будить слухача в кожному воркері, і той дочитує
+#                       нові рядки у свій буфер. Так події бачать усі воркери gunicorn,
+#                       а id подій спільні для всіх процесів. Id видає послідовність, і транзакції
+#                       записують події паралельно, тож пропуски в id слухач закриває сам (EventGaps).
+
+Event = namedtuple("Event", ["id", "data"])
+
+CHANNEL = "task_events"
+
+_PENDING = "pending_task_events"
+
+
+class EventBuffer:
+    """
+    Кільцевий буфер останніх подій. Очікування нових подій - через Condition,
+    тому потоки, що обслуговують SSE-клієнтів, не навантажують CPU і не тримають з'єднань з БД.
+    """
+
+    def __init__(self, size, floor=0):
+        self._events = deque(maxlen=size)
+        self._cond = threading.Condition()
+        self._waiters = []     # (loop, future) клієнтів asyncio, що чекають нових подій
+        self.floor = floor     # id останньої події, що вже не зберігається в буфері
+        self.last_id = floor   # id останньої відомої події
+
+    def append(self, events):
+        with self._cond:
+            for item in events:
+                if item.id <= self.last_id:
+                    continue
+                if len(self._events) == self._events.maxlen:
+                    self.floor = self._events[0].id
+                self._events.append(item)
+                self.last_id = item.id
+            self._wake()
+
+    def _wake(self):
+        self._cond.notify_all()
+        for loop, future in self._waiters:
+            loop.call_soon_threadsafe(_set_done, future)
+        self._waiters.clear()
+
+    def reset(self, floor):
+        """Порожній буфер, що починається з події floor."""
+        with self._cond:
+            self._events.clear()
+            self.floor = self.last_id = floor
+            self._wake()
+
+    def read(self, last_id, timeout):
+        """
+        Події з id > last_id; якщо їх поки немає - чекає не довше timeout секунд.
+        Повертає (events, reset): reset=True, якщо продовжити з last_id неможливо
+        (події вже витіснені з буфера або id невідомий цьому процесу).
+        """
+        with self._cond:
+            if last_id < self.floor or last_id > self.last_id:
+                return [], True
+            if self.last_id == last_id:
+                self._cond.wait(timeout)
+                if last_id < self.floor:
+                    return [], True
+            return [item for item in self._events if item.id > last_id], False
+
+    async def read_async(self, last_id, timeout):
+        """Те саме, що read(), але очікування не займає потік (для ASGI-режиму)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            if self.last_id == last_id and last_id >= self.floor:
+                self._waiters.append((loop, future))
+            else:
+                future.set_result(None)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            with self._cond:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+        return self.read(last_id, timeout=0)
+
+
+class EventGaps:
+    """
+    Пропуски в id подій PostgresBroker. Id видає послідовність під час INSERT, а транзакції
+    завершуються в довільному порядку, тому подія з меншим id може стати видимою пізніше.
+    Слухач доставляє в буфер лише події, перед якими немає пропусків. Пропуск закривається,
+    коли подія з'являється, або коли завершились усі транзакції, що виконувались у момент,
+    коли його помітили (xmin нового знімка >= тодішнього xmax): тоді цю транзакцію відкочено.
+    """
+
+    def __init__(self):
+        self._open = {}        # id -> xmax знімка, в якому пропуск помічено
+        self._skipped = set()  # id відкочених транзакцій
+
+    def ready(self, last_id, events, xmin, xmax):
+        """
+        Події з events (id > last_id по зростанню, прочитані в знімку xmin/xmax),
+        які вже можна доставити: до першого незакритого пропуску.
+        """
+        for id, seen in list(self._open.items()):
+            if xmin >= seen:
+                del self._open[id]
+                self._skipped.add(id)
+
+        ready, expected, blocked = [], last_id + 1, False
+        for item in events:
+            for missing in range(expected, item.id):
+                if missing not in self._skipped:
+                    self._open.setdefault(missing, xmax)
+                    blocked = True
+            if not blocked:
+                ready.append(item)
+            expected = item.id + 1
+
+        delivered = ready[-1].id if ready else last_id
+        visible = {item.id for item in events}
+        self._open = {id: seen for id, seen in self._open.items() if id > delivered and id not in visible}
+        self._skipped = {id for id in self._skipped if id > delivered}
+        return ready
+
+    def clear(self):
+        self._open.clear()
+        self._skipped.clear()
+
+
+def _set_done(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class InProcessBroker:
+    """Брокер у пам'яті процесу: для SQLite і одного процесу."""
+
+    def __init__(self, buffer_size):
+        # Лічильник стартує з поточного часу в мс: після перезапуску нові id більші
+        # за старі, і клієнт зі старим Last-Event-ID отримає reset, а не чужі події
+        start = int(time.time() * 1000)
+        self.buffer = EventBuffer(buffer_size, floor=start)
+        self._next_id = start
+        self._lock = threading.Lock()
+
+    def publish(self, session, items):
+        session.info.setdefault(_PENDING, (self, []))[1].extend(items)
+
+    def deliver(self, items):
+        with self._lock:
+            events = []
+            for data in items:
+                self._next_id += 1
+                events.append(Event(self._next_id, data))
+            self.buffer.append(events)
+
+    def read(self, last_id, timeout):
+        return self.buffer.read(self.buffer.last_id if last_id is None else last_id, timeout)
+
+    async def read_async(self, last_id, timeout):
+        return await self.buffer.read_async(self.buffer.last_id if last_id is None else last_id, timeout)
+
+    def latest_id(self):
+        return self.buffer.last_id
+
+
+class PostgresBroker:
+    """Брокер на PostgreSQL: таблиця task_events + LISTEN/NOTIFY (psycopg2)."""
+
+    def __init__(self, app, buffer_size, poll_interval=30):
+        self.app = app
+        self.buffer = EventBuffer(buffer_size)
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._last_pruned = 0
+        self._gaps = EventGaps()
+
+    def publish(self, session, items):
+        # Без блокувань: паралельні транзакції отримують id з послідовності,
+        # а порядок доставки відновлює слухач (EventGaps)
+        from app.models import TaskEvent
+        session.execute(insert(TaskEvent), [{"data": data} for data in items])
+        session.execute(sql_select(func.pg_notify(CHANNEL, "")))
+
+    def read(self, last_id, timeout):
+        self._ensure_listener()
+        if not self._ready.wait(timeout):
+            raise ConnectionError("task events listener is not connected")
+        return self.buffer.read(self.buffer.last_id if last_id is None else last_id, timeout)
+
+    async def read_async(self, last_id, timeout):
+        self._ensure_listener()
+        if not self._ready.is_set() and not await asyncio.to_thread(self._ready.wait, timeout):
+            raise ConnectionError("task events listener is not connected")
+        return await self.buffer.read_async(self.buffer.last_id if last_id is None else last_id, timeout)
+
+    def latest_id(self):
+        self._ensure_listener()
+        return self.buffer.last_id
+
+    def _ensure_listener(self):
+        # Потоки не переживають fork, тому слухач стартує ліниво в кожному воркері
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._ready.clear()
+            threading.Thread(target=self._listen, name="task-events-listener", daemon=True).start()
+
+    def _listen(self):
+        from app import db
+        from app.readiness import Backoff
+        with self.app.app_context():
+            engine = db.engine
+        backoff = Backoff(self.app.config.get('DB_READINESS_BACKOFF_INITIAL', 0.5),
+                          self.app.config.get('DB_READINESS_BACKOFF_MAX', 30.0))
+
+        while True:
+            conn = None
+            try:
+                # Окреме з'єднання поза пулом: LISTEN тримає його весь час роботи воркера
+                conn = engine.raw_connection()
+                conn.detach()
+                dbapi = conn.driver_connection
+                dbapi.rollback()
+                dbapi.autocommit = True
+                with dbapi.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                self._gaps.clear()
+                self._catch_up(dbapi)
+                self._ready.set()
+                backoff.reset()
+
+                while True:
+                    if io_select.select([dbapi], [], [], self.poll_interval)[0]:
+                        dbapi.poll()
+                        dbapi.notifies.clear()
+                    self._catch_up(dbapi)
+            except Exception as e:
+                self._ready.clear()
+                delay = backoff.next_delay()
+                self.app.logger.warning("Task events listener failed, reconnecting in %.1fs: %s", delay, e)
+                time.sleep(delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _catch_up(self, dbapi):
+        """Дочитує з task_events події, новіші за останню в буфері."""
+        with dbapi.cursor() as cursor:
+            if not self._ready.is_set() and self.buffer.last_id == 0:
+                # Перший запуск: завантажуємо останні події, щоб відновлення працювало одразу
+                cursor.execute("SELECT min(id) FROM (SELECT id FROM task_events ORDER BY id DESC LIMIT %s) t",
+                               (self.buffer_size,))
+                first = cursor.fetchone()[0]
+                if first is not None:
+                    self.buffer.reset(first - 1)
+
+            # Події і межі знімка, в якому їх прочитано (один запит - один знімок)
+            cursor.execute(
+                "SELECT pg_snapshot_xmin(s)::text::bigint, pg_snapshot_xmax(s)::text::bigint, e.id, e.data"
+                " FROM pg_current_snapshot() s LEFT JOIN task_events e ON e.id > %s ORDER BY e.id",
+                (self.buffer.last_id,))
+            rows = cursor.fetchall()
+            xmin, xmax = rows[0][0], rows[0][1]
+            events = [Event(id, data) for _, _, id, data in rows if id is not None]
+            if events and self.buffer.last_id == 0:
+                self.buffer.reset(events[0].id - 1)  # таблиця була порожня - починаємо з першої події
+            self.buffer.append(self._gaps.ready(self.buffer.last_id, events, xmin, xmax))
+
+            # Таблиця зберігає лише стільки подій, скільки вміщує буфер
+            if self.buffer.last_id - self._last_pruned >= self.buffer_size:
+                cursor.execute("DELETE FROM task_events WHERE id <= %s", (self.buffer.last_id - self.buffer_size,))
+                self._last_pruned = self.buffer.last_id
+
+
+# Події InProcessBroker доставляються лише після commit; при rollback відкидаються
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session):
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        broker, items = pending
+        broker.deliver(items)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
+
+
+class TaskEvents:
+    """Розширення Flask: task_events.init_app(app), далі publish() у маршрутах запису."""
+
+    def __init__(self):
+        self._streams = 0
+        self._streams_lock = threading.Lock()
+
+    def init_app(self, app, broker=None):
+        if broker is None:
+            buffer_size = app.config.get('TASK_EVENTS_BUFFER_SIZE', 1000)
+            if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+                broker = PostgresBroker(app, buffer_size)
+            else:
+                broker = InProcessBroker(buffer_size)
+        app.extensions['task_events'] = broker
+
+    @property
+    def broker(self):
+        return current_app.extensions['task_events']
+
+    def publish(self, session, op, tasks, app=None):
+        """
+        Публікує зміни задач у поточній транзакції; викликати перед commit.
+        tasks - dict задач (для deleted достатньо {"id": ...}); app - поза контекстом Flask (ASGI).
+        """
+        if not tasks:
+            return
+        app = app or current_app
+        app.extensions['task_events'].publish(session, [
+            app.json.dumps({"op": op, "task": task}, separators=(",", ":")) for task in tasks
+        ])
+
+    def acquire_stream(self, limit):
+        """Резервує місце під SSE-клієнта (не більше limit на процес)."""
+        with self._streams_lock:
+            if self._streams >= limit:
+                return False
+            self._streams += 1
+            return True
+
+    def release_stream(self):
+        with self._streams_lock:
+            self._streams -= 1
+
+
+def format_sse(data=None, event=None, id=None, retry=None):
+    """Одне повідомлення у форматі text/event-stream."""
+    lines = []
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if data is not None:
+        lines.append(f"data: {data}")
+    return ("\n".join(lines) + "\n\n").encode()
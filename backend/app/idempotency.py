@@ -0,0 +1,342 @@
+import functools
+import hashlib
+import hmac
+import json
+import threading
+import time
+import zlib
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt
+from sqlalchemy import delete, select
+from app.cache import LocalCacheBackend
+from app.metrics import IDEMPOTENCY_REQUESTS
+
+
+# --- Ключі ідемпотентності для POST-маршрутів ---
+# Клієнт, що повторює POST /api/tasks (/bulk, /import) або /api/users/register після таймауту,
+# надсилає той самий заголовок Idempotency-Key. Перша відповідь (статус < 500) зберігається
+# на IDEMPOTENCY_TTL секунд, і повтор отримує її без валідації, хешування пароля та INSERT
+# (із заголовком Idempotent-Replayed: true). Відповіді 5xx не зберігаються - повтор виконується заново.
+#
+# Поки перший запит виконується, ключ зайнятий (не довше IDEMPOTENCY_LOCK_SECONDS - на випадок
+# аварійної зупинки воркера): такий самий паралельний запит чекає на його відповідь до
+# IDEMPOTENCY_WAIT_SECONDS, далі - 409. Той самий ключ з іншим тілом запиту - 422.
+# Ключ діє в межах маршруту й користувача (для register - анонімно), тож клієнти не бачать чужих відповідей.
+#
+# Запис компактний: відбиток запиту (HMAC тіла - пароль у сховище не потрапляє), статус,
+# заголовок Location і тіло відповіді, стиснене zlib. Бекенди:
+#   - database - таблиця idempotency_keys (за замовчуванням): спільна для всіх воркерів і екземплярів,
+#                ключ займається атомарно (INSERT ... ON CONFLICT по PRIMARY KEY), окремим коротким
+#                з'єднанням поза транзакцією маршруту;
+#   - redis    - спільний для всіх воркерів (REDIS_URL), ключ займається атомарно (SET NX);
+#   - local    - LRU + TTL у пам'яті процесу, лише для одного процесу (flask run, тести): з кількома
+#                воркерами gunicorn повтор в іншому воркері виконався б заново, тож init_app його не приймає.
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+STORED_HEADERS = ("Location",)
+# Паралельний повтор перевіряє, чи з'явилась відповідь, з експоненційною затримкою: 50 мс, 100 мс, ...
+# до POLL_MAX_SECONDS (кожна перевірка з бекендом database - окреме з'єднання і INSERT ... ON CONFLICT)
+POLL_SECONDS = 0.05
+POLL_MAX_SECONDS = 0.5
+CLEANUP_SECONDS = 60  # як часто воркер видаляє прострочені рядки idempotency_keys
+
+
+class RedisIdempotencyBackend:
+    """Записи в Redis як байти з TTL; add() - SET NX."""
+
+    blocking = True  # мережеві виклики: ASGI-режим виконує їх у пулі потоків
+
+    def __init__(self, client, prefix="idempotency:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url):
+        import redis  # необов'язкова залежність, потрібна лише для IDEMPOTENCY_BACKEND=redis
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def add(self, key, value, ttl):
+        while True:
+            if self.client.set(self.prefix + key, value, nx=True, px=max(1, int(ttl * 1000))):
+                return None
+            existing = self.client.get(self.prefix + key)
+            if existing is not None:  # інакше запис щойно прострочився - пробуємо ще раз
+                return existing
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+
+class DatabaseIdempotencyBackend:
+    """Записи в таблиці idempotency_keys (app/models.py: IdempotencyKey); add() - INSERT ... ON CONFLICT."""
+
+    blocking = True  # запити до БД: ASGI-режим виконує їх у пулі потоків
+
+    def __init__(self, engine, table, clock=time.time):
+        self.engine = engine
+        self.table = table
+        self.clock = clock
+        self._next_cleanup = 0.0
+
+    @classmethod
+    def from_app(cls, app):
+        from app import db
+        from app.models import IdempotencyKey
+        with app.app_context():
+            return cls(db.engine, IdempotencyKey.__table__)
+
+    def _insert(self):
+        if self.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(self.table)
+
+    def get(self, key):
+        with self.engine.connect() as conn:
+            return conn.scalar(select(self.table.c.value)
+                               .where(self.table.c.key == key, self.table.c.expires_at > self.clock()))
+
+    def add(self, key, value, ttl):
+        now = self.clock()
+        # Новий ключ або прострочений запис (покинутий запит, збережена відповідь після TTL) - займаємо;
+        # інакше RETURNING нічого не повертає, і повертається чинний запис
+        stmt = self._insert().values(key=key, value=value, expires_at=now + ttl)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.table.c.key],
+            set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+            where=self.table.c.expires_at <= now,
+        ).returning(self.table.c.key)
+        while True:
+            with self.engine.begin() as conn:
+                if conn.scalar(stmt) is not None:
+                    self._cleanup(conn, now)
+                    return None
+            existing = self.get(key)
+            if existing is not None:  # інакше запис щойно прострочився - пробуємо ще раз
+                return existing
+
+    def set(self, key, value, ttl):
+        stmt = self._insert().values(key=key, value=value, expires_at=self.clock() + ttl)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.table.c.key],
+            set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def delete(self, *keys):
+        if keys:
+            with self.engine.begin() as conn:
+                conn.execute(delete(self.table).where(self.table.c.key.in_(keys)))
+
+    def _cleanup(self, conn, now):
+        """Не частіше ніж раз на CLEANUP_SECONDS на процес видаляє прострочені записи (індекс по expires_at)."""
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + CLEANUP_SECONDS
+        conn.execute(delete(self.table).where(self.table.c.expires_at <= now))
+
+
+def encode_record(fingerprint, status=None, body=b"", headers=None):
+    """JSON-заголовок запису, \\n і тіло відповіді (zlib). status None - запит ще виконується."""
+    head = json.dumps({"fp": fingerprint, "status": status, "headers": headers or {}}, separators=(",", ":"))
+    return head.encode() + b"\n" + (zlib.compress(body) if body else b"")
+
+
+def decode_record(raw):
+    head, _, body = raw.partition(b"\n")
+    record = json.loads(head)
+    record["body"] = zlib.decompress(body) if body else b""
+    return record
+
+
+def store_key(endpoint, identity, key):
+    return f"idempotency:{endpoint}:{identity or '-'}:{key}"
+
+
+def check_key(key):
+    """Помилка 400 для некоректного ключа або None."""
+    if not key.strip() or len(key) > MAX_KEY_LENGTH:
+        return {"error": f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters long"}
+    return None
+
+
+class IdempotencyStore:
+    """Стан застосунку (app.extensions['idempotency']), спільний для Flask- і ASGI-режиму."""
+
+    def __init__(self, backend, secret, ttl=86400, lock_seconds=30, wait_seconds=2):
+        self.backend = backend
+        self.secret = secret.encode()
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self._waiters = 0
+        self._waiters_lock = threading.Lock()
+
+    def fingerprint(self, method, path, data, raw=b""):
+        """Відбиток запиту: HMAC від методу, шляху і тіла (JSON у канонічній формі, інакше - сирі байти)."""
+        body = json.dumps(data, sort_keys=True, separators=(",", ":")).encode() if data is not None else raw
+        return hmac.new(self.secret, f"{method} {path}\n".encode() + body, hashlib.sha256).hexdigest()[:32]
+
+    def claim(self, key, fingerprint):
+        """
+        Займає ключ для першого запиту. Повертає (результат, запис):
+            ("run", None)      - ключ зайнято цим запитом, його треба виконати і викликати complete();
+            ("replay", record) - збережена відповідь;
+            ("pending", None)  - такий самий запит ще виконується;
+            ("mismatch", None) - ключ уже використано з іншим запитом.
+        """
+        raw = self.backend.add(key, encode_record(fingerprint), self.lock_seconds)
+        if raw is None:
+            return "run", None
+        record = decode_record(raw)
+        if record["fp"] != fingerprint:
+            return "mismatch", None
+        if record["status"] is None:
+            return "pending", None
+        return "replay", record
+
+    def complete(self, key, fingerprint, status, body, headers):
+        """Зберігає відповідь (True) або звільняє ключ для відповіді 5xx (False)."""
+        if status >= 500:
+            self.release(key)
+            return False
+        stored = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        self.backend.set(key, encode_record(fingerprint, status, body, stored), self.ttl)
+        return True
+
+    def release(self, key):
+        self.backend.delete(key)
+
+    def acquire_waiter(self, limit):
+        """Резервує місце для повтору, що чекає на паралельний запит (не більше limit на процес)."""
+        with self._waiters_lock:
+            if self._waiters >= limit:
+                return False
+            self._waiters += 1
+            return True
+
+    def release_waiter(self):
+        with self._waiters_lock:
+            self._waiters -= 1
+
+
+def poll_delays(wait_seconds):
+    """Затримки між перевірками паралельного повтору: від POLL_SECONDS удвічі до POLL_MAX_SECONDS, разом до wait_seconds."""
+    deadline = time.monotonic() + wait_seconds
+    delay = POLL_SECONDS
+    while (left := deadline - time.monotonic()) > 0:
+        yield min(delay, left)
+        delay = min(delay * 2, POLL_MAX_SECONDS)
+
+
+def not_run_response(endpoint, outcome, record, waited):
+    """
+    Відповідь для запиту, який не виконується: (статус, тіло-bytes або dict, заголовки).
+    Записує метрику результату.
+    """
+    if outcome == "replay":
+        result = "replayed_after_wait" if waited else "replayed"
+        status, body, headers = record["status"], record["body"], {**record["headers"], REPLAYED_HEADER: "true"}
+    elif outcome == "mismatch":
+        result = "mismatch"
+        status, body, headers = 422, {"error": f"{HEADER} has already been used with a different request"}, {}
+    else:
+        result = "in_progress"
+        status, body, headers = 409, {"error": f"A request with this {HEADER} is still in progress"}, {"Retry-After": "1"}
+    IDEMPOTENCY_REQUESTS.labels(endpoint=endpoint, result=result).inc()
+    return status, body, headers
+
+
+def record_outcome(endpoint, stored):
+    IDEMPOTENCY_REQUESTS.labels(endpoint=endpoint, result="stored" if stored else "not_stored").inc()
+
+
+# --- Розширення Flask ---
+
+class Idempotency:
+    """idempotency.init_app(app), далі декоратор @idempotent на POST-маршрутах."""
+
+    def init_app(self, app, backend=None):
+        if backend is None:
+            kind = app.config.get('IDEMPOTENCY_BACKEND', 'database')
+            if kind == 'redis':
+                backend = RedisIdempotencyBackend.from_url(app.config['REDIS_URL'])
+            elif kind == 'local':
+                if app.config.get('GUNICORN_WORKERS', 1) > 1:
+                    raise ValueError("IDEMPOTENCY_BACKEND=local keeps keys in one process; "
+                                     "use database or redis with GUNICORN_WORKERS > 1")
+                backend = LocalCacheBackend(app.config.get('IDEMPOTENCY_MAX_ENTRIES', 10000))
+            else:
+                backend = DatabaseIdempotencyBackend.from_app(app)
+        app.extensions['idempotency'] = IdempotencyStore(
+            backend, app.config['JWT_SECRET_KEY'],
+            ttl=app.config.get('IDEMPOTENCY_TTL', 86400),
+            lock_seconds=app.config.get('IDEMPOTENCY_LOCK_SECONDS', 30),
+            wait_seconds=app.config.get('IDEMPOTENCY_WAIT_SECONDS', 2),
+        )
+
+
+def _jwt_identity():
+    try:
+        return str(get_jwt()["sub"])
+    except RuntimeError:  # маршрут без @jwt_required() (register)
+        return None
+
+
+def idempotent(view):
+    """Декоратор POST-маршруту (під @jwt_required(), якщо він є): повтор з тим самим Idempotency-Key не виконується."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        error = check_key(key)
+        if error:
+            return jsonify(error), 400
+
+        store = current_app.extensions['idempotency']
+        endpoint = request.endpoint
+        scoped_key = store_key(endpoint, _jwt_identity(), key)
+        fingerprint = store.fingerprint(request.method, request.path, request.get_json(silent=True),
+                                        request.get_data())
+        waited = False
+        outcome, record = store.claim(scoped_key, fingerprint)
+        # Повтор чекає, займаючи потік воркера; понад IDEMPOTENCY_MAX_WAITERS - одразу 409 з Retry-After
+        if outcome == "pending" and store.acquire_waiter(current_app.config['IDEMPOTENCY_MAX_WAITERS']):
+            try:
+                for delay in poll_delays(store.wait_seconds):
+                    time.sleep(delay)
+                    waited = True
+                    outcome, record = store.claim(scoped_key, fingerprint)
+                    if outcome != "pending":
+                        break
+            finally:
+                store.release_waiter()
+
+        if outcome != "run":
+            status, body, headers = not_run_response(endpoint, outcome, record, waited)
+            if isinstance(body, dict):
+                return jsonify(body), status, headers
+            return current_app.response_class(body, status, headers, mimetype="application/json")
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except BaseException:
+            store.release(scoped_key)
+            record_outcome(endpoint, False)
+            raise
+        record_outcome(endpoint, store.complete(scoped_key, fingerprint, response.status_code,
+                                                response.get_data(), response.headers))
+        return response
+    return wrapper
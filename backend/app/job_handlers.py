@@ -0,0 +1,93 @@
+from sqlalchemy import delete, insert, select
+from app import db, cache, task_events
+from app.etag import bump_table_version
+from app.jobs import job_handler
+from app.models import Task, User
+from app.services.tasks import validate_task_data, check_bulk_owners
+
+
+# --- Обробники фонових задач (див. app/jobs.py) ---
+# Кожен yield - кінець пачки: app/jobs.py комітить її разом із прогресом. progress - прогрес
+# попередньої спроби (None для нової задачі), з нього обробник продовжує після зупинки воркера.
+
+# Скільки помилок імпорту зберігати в результаті (решта - лише в лічильнику failed)
+IMPORT_MAX_ERRORS = 100
+
+
+@job_handler("delete_user")
+def delete_user(payload, progress, batch_size):
+    """
+    Видаляє задачі користувача пачками (DELETE ... WHERE id IN (перші batch_size задач за індексом
+    (owner_id, id))), потім самого користувача. Токени відкликає маршрут ще до постановки в чергу.
+    """
+    user_id = payload["user_id"]
+    deleted = (progress or {}).get("deleted_tasks", 0)
+    while True:
+        batch = select(Task.id).where(Task.owner_id == user_id).order_by(Task.id).limit(batch_size)
+        ids = delete_tasks(Task.id.in_(batch.scalar_subquery()))
+        if not ids:
+            break
+        deleted += len(ids)
+        yield {"deleted_tasks": deleted}
+        cache.invalidate("task", *ids)
+
+    # Задачі, створені після останньої пачки, видаляються в одній транзакції з користувачем.
+    # Рядок користувача блокується першим: INSERT задачі з цим owner_id чекає на FOREIGN KEY
+    # до кінця транзакції (і далі отримує помилку), а не з'являється між цими двома DELETE.
+    db.session.execute(select(User.id).where(User.id == user_id).with_for_update())
+    ids = delete_tasks(Task.owner_id == user_id)
+    db.session.execute(delete(User).where(User.id == user_id))
+    bump_table_version("users")
+    yield {"deleted_tasks": deleted + len(ids), "user_deleted": True}
+    if ids:
+        cache.invalidate("task", *ids)
+    cache.invalidate("user", user_id)
+
+
+def delete_tasks(condition):
+    """DELETE задач за умовою з подією і версією таблиці (без commit); повертає id видалених."""
+    ids = db.session.scalars(
+        delete(Task).where(condition).returning(Task.id).execution_options(synchronize_session=False)
+    ).all()
+    if ids:
+        task_events.publish(db.session, "deleted", [{"id": id} for id in ids])
+        bump_table_version("tasks")
+    return ids
+
+
+@job_handler("import_tasks")
+def import_tasks(payload, progress, batch_size):
+    """
+    Створює задачі з payload["items"] пачками: валідація і перевірка власників - як у POST /tasks/bulk.
+    Результат: скільки елементів оброблено, створено, з помилками, і перші IMPORT_MAX_ERRORS помилок.
+    """
+    items = payload["items"]
+    state = progress or {"processed": 0, "created": 0, "failed": 0, "errors": []}
+    for start in range(state["processed"], len(items), batch_size):
+        results = {}
+        valid = []
+        for index in range(start, min(start + batch_size, len(items))):
+            is_valid, error = validate_task_data(items[index])
+            if is_valid:
+                valid.append((index, items[index]))
+            else:
+                results[index] = {"index": index, **error}
+        valid = check_bulk_owners(db.session, valid, results)
+
+        rows = [{"title": item['title'], "description": item.get('description'),
+                 "owner_id": item['owner_id'], "status": item.get('status', "невиконана")}
+                for _, item in valid]
+        if rows:
+            new_ids = db.session.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).all()
+            task_events.publish(db.session, "created",
+                                [{"id": id, **row, "version": 1} for id, row in zip(new_ids, rows)])
+            bump_table_version("tasks")
+
+        errors = [{"index": r["index"], "error": r["error"]} for r in sorted(results.values(), key=lambda r: r["index"])]
+        state = {
+            "processed": min(start + batch_size, len(items)),
+            "created": state["created"] + len(rows),
+            "failed": state["failed"] + len(errors),
+            "errors": (state["errors"] + errors)[:IMPORT_MAX_ERRORS],
+        }
+        yield state
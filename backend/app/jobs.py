@@ -0,0 +1,154 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, delete, or_, select, update
+from app import db
+from app.models import Job
+
+
+# --- Фонові задачі: черга в таблиці jobs ---
+# Важкі операції (видалення користувача з усіма задачами, імпорт задач) не виконуються в запиті:
+# маршрут додає рядок у jobs у своїй транзакції й відповідає 202 з id задачі (стан - GET /api/jobs/<id>),
+# а окремий процес (python worker.py) забирає задачі через SELECT ... FOR UPDATE SKIP LOCKED -
+# кілька воркерів не беруть одну задачу і не чекають один на одного.
+# Обробник - генератор: робить одну пачку змін (до JOBS_BATCH_SIZE рядків) і віддає прогрес,
+# після чого пачка комітиться разом із прогресом. Транзакції короткі, тож великі видалення не тримають
+# довгих блокувань; обробники ідемпотентні - задача воркера, який зупинився посеред роботи
+# (heartbeat старший за JOBS_TIMEOUT_SECONDS), повертається в чергу і продовжується з місця зупинки.
+
+logger = logging.getLogger(__name__)
+
+# Обробники за типом задачі: kind -> generator(payload, progress, batch_size), див. app/job_handlers.py
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Реєструє обробник задач типу kind."""
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def new_job(kind, payload, created_by=None):
+    """Нова задача в черзі; маршрут додає її в сесію і комітить разом зі своїми змінами."""
+    return Job(kind=kind, payload=json.dumps(payload), status="queued", attempts=0, created_by=created_by,
+               created_at=utcnow())
+
+
+def pending_job(session, kind, payload):
+    """Незавершена (queued або running) задача того самого типу з тим самим payload, або None."""
+    return session.scalar(
+        select(Job).where(Job.kind == kind, Job.status.in_(("queued", "running")),
+                          Job.payload == json.dumps(payload)).order_by(Job.id).limit(1)
+    )
+
+
+def accepted_body(job, message):
+    """Тіло відповіді 202 і заголовки з посиланням на стан задачі."""
+    return {"message": message, "job": job.to_dict()}, {"Location": f"/api/jobs/{job.id}"}
+
+
+def claimable(config, now):
+    """Умова "задачу можна взяти": у черзі або її воркер перестав звітувати (і спроби не вичерпано)."""
+    stale = now - timedelta(seconds=config['JOBS_TIMEOUT_SECONDS'])
+    return or_(Job.status == "queued",
+               and_(Job.status == "running", Job.heartbeat_at < stale, Job.attempts < config['JOBS_MAX_ATTEMPTS']))
+
+
+def claim_job(config):
+    """
+    Забирає наступну задачу (status -> running) і повертає її id або None.
+    SKIP LOCKED пропускає задачі, які саме забирають інші воркери; умовний UPDATE
+    захищає і там, де SKIP LOCKED немає (SQLite).
+    """
+    now = utcnow()
+    job_id = db.session.scalar(
+        select(Job.id).where(claimable(config, now)).order_by(Job.id).limit(1).with_for_update(skip_locked=True)
+    )
+    if job_id is None:
+        db.session.rollback()
+        return None
+
+    claimed = db.session.execute(
+        update(Job).where(Job.id == job_id, claimable(config, now))
+        .values(status="running", started_at=now, heartbeat_at=now, attempts=Job.attempts + 1)
+    ).rowcount
+    db.session.commit()
+    return job_id if claimed else None
+
+
+def run_job(config, job_id, stop=None):
+    """
+    Виконує задачу: пачка за пачкою з commit і прогресом, наприкінці - done або failed.
+    Якщо між пачками встановлено stop, задача повертається в чергу з поточним прогресом.
+    """
+    job = db.session.get(Job, job_id)
+    kind, payload = job.kind, json.loads(job.payload)
+    progress = json.loads(job.result) if job.result else None  # попередня спроба, якщо воркер зупинявся
+    db.session.rollback()
+
+    handler = JOB_HANDLERS.get(kind)
+    values = {"status": "done", "error": None}
+    try:
+        if handler is None:
+            raise LookupError(f"Unknown job kind '{kind}'")
+        for progress in handler(payload, progress, config['JOBS_BATCH_SIZE']):
+            db.session.execute(update(Job).where(Job.id == job_id)
+                               .values(result=json.dumps(progress), heartbeat_at=utcnow()))
+            db.session.commit()
+            if stop is not None and stop.is_set():
+                db.session.execute(update(Job).where(Job.id == job_id)
+                                   .values(status="queued", attempts=Job.attempts - 1))
+                db.session.commit()
+                return
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Job %s (%s) failed", job_id, kind)
+        values = {"status": "failed", "error": str(e)}
+
+    db.session.execute(update(Job).where(Job.id == job_id).values(finished_at=utcnow(), **values))
+    db.session.commit()
+
+
+def cleanup_jobs(config):
+    """
+    Закриває задачі, воркери яких зупинялися JOBS_MAX_ATTEMPTS разів, і видаляє
+    завершені задачі, старші за JOBS_RETENTION_SECONDS.
+    """
+    now = utcnow()
+    stale = now - timedelta(seconds=config['JOBS_TIMEOUT_SECONDS'])
+    db.session.execute(
+        update(Job).where(Job.status == "running", Job.heartbeat_at < stale, Job.attempts >= config['JOBS_MAX_ATTEMPTS'])
+        .values(status="failed", error="Worker stopped responding", finished_at=now)
+    )
+    expired = now - timedelta(seconds=config['JOBS_RETENTION_SECONDS'])
+    db.session.execute(delete(Job).where(Job.status.in_(("done", "failed")), Job.finished_at < expired))
+    db.session.commit()
+
+
+def work(app, stop=None, once=False):
+    """
+    Цикл воркера: бере задачі, поки вони є; коли черга порожня - прибирає старі задачі
+    й чекає JOBS_POLL_SECONDS. once=True - обробити наявні задачі й повернутися (тести, cron).
+    stop - threading.Event для коректної зупинки між задачами.
+    """
+    from app import job_handlers  # noqa: F401 - реєструє обробники (імпортує маршрути, тому не на рівні модуля)
+
+    config, stop = app.config, stop or threading.Event()
+    with app.app_context():
+        while not stop.is_set():
+            job_id = claim_job(config)
+            if job_id is not None:
+                run_job(config, job_id, stop)
+                continue
+
+            cleanup_jobs(config)
+            if once:
+                return
+            stop.wait(config['JOBS_POLL_SECONDS'])
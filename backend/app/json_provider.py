@@ -0,0 +1,94 @@
+import codecs
+from flask.json.provider import DefaultJSONProvider
+
+
+# --- Серіалізація JSON-відповідей ---
+# JSON_ENCODER=orjson (за замовчуванням, якщо orjson встановлено) кодує відповіді через orjson,
+# JSON_ENCODER=stdlib - стандартним json, як DefaultJSONProvider Flask.
+# Результат однаковий побайтово: ключі відсортовані, компактні роздільники, не-ASCII символи
+# екрановані як \uXXXX (ensure_ascii, наприклад "невиконана"), дати - у форматі HTTP.
+# Те, що orjson не підтримує (цілі > 64 біт, нестандартні аргументи dumps), кодується стандартним json.
+# Відмінність лише у float з експонентою (1e16 замість 1e+16) - у відповідях API їх немає.
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider Flask з dumps_bytes() - готове тіло відповіді jsonify() (Flask і ASGI)."""
+
+    def dumps_bytes(self, obj):
+        return (self.dumps(obj, separators=(",", ":")) + "\n").encode()
+
+    def response(self, *args, **kwargs):
+        if self._prettyprint():
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+    def _prettyprint(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """Той самий формат, що й StdlibJSONProvider, але кодування через orjson."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        import orjson  # необов'язкова залежність, потрібна лише для JSON_ENCODER=orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, **kwargs):
+        # orjson пише лише компактний формат; інші аргументи (і роздільники за замовчуванням) - stdlib
+        if kwargs != {"separators": (",", ":")}:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode()
+
+    def dumps_bytes(self, obj):
+        return self._encode(obj) + b"\n"
+
+    def _encode(self, obj):
+        """Компактний JSON з ensure_ascii як у json.dumps(); bytes (ASCII)."""
+        if self.sort_keys is not True or self.ensure_ascii is not True:
+            return super().dumps(obj, separators=(",", ":")).encode()
+        try:
+            raw = self._orjson.dumps(obj, default=self.default, option=self._options)
+        except TypeError:
+            return super().dumps(obj, separators=(",", ":")).encode()
+        return ascii_escape(raw)
+
+
+def _json_escape_errors(error):
+    # Символи поза BMP - сурогатною парою, як у json.dumps()
+    escaped = []
+    for char in error.object[error.start:error.end]:
+        code = ord(char)
+        if code > 0xFFFF:
+            code -= 0x10000
+            escaped.append("\\u%04x\\u%04x" % (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF)))
+        else:
+            escaped.append("\\u%04x" % code)
+    return "".join(escaped), error.end
+
+
+codecs.register_error("json_escape", _json_escape_errors)
+
+
+def ascii_escape(raw):
+    """UTF-8 від orjson -> ASCII з \\uXXXX, як json.dumps(ensure_ascii=True); json також екранує DEL (0x7f)."""
+    if not raw.isascii():
+        text = raw.decode()
+        # backslashreplace (у C) пише \\uXXXX для U+0100..U+FFFF - як json, але \\xXX для U+0080..U+00FF
+        # і \\UXXXXXXXX поза BMP. Якщо таке могло з'явитись (або в даних був \\x / \\U) - json_escape.
+        escaped = text.encode("ascii", "backslashreplace")
+        raw = text.encode("ascii", "json_escape") if b"\\x" in escaped or b"\\U" in escaped else escaped
+    return raw.replace(b"\x7f", b"\\u007f") if b"\x7f" in raw else raw
+
+
+def json_provider_class(name):
+    """Клас провайдера для JSON_ENCODER; orjson без встановленого пакета - stdlib."""
+    if name == "orjson":
+        try:
+            import orjson  # noqa: F401
+            return OrjsonProvider
+        except ImportError:
+            pass
+    return StdlibJSONProvider
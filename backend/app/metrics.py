@@ -0,0 +1,68 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+
+# --- Метрики Prometheus застосунку ---
+# Метрики реєструються у стандартному реєстрі prometheus_client, тому їх віддає той самий
+# /metrics, що й PrometheusMetrics у run.py. multiprocess_mode визначає, як значення
+# агрегуються між воркерами gunicorn (див. gunicorn.conf.py).
+
+# Пул з'єднань SQLAlchemy
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting for a connection from the SQLAlchemy pool',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_SIZE = Gauge(
+    'db_pool_size', 'Configured size of the SQLAlchemy connection pool',
+    multiprocess_mode='livesum',
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out', 'Connections currently checked out of the pool',
+    multiprocess_mode='livesum',
+)
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow', 'Connections opened above pool_size (max_overflow in use)',
+    multiprocess_mode='livesum',
+)
+
+# Read-through кеш (app/cache.py)
+CACHE_HITS = Counter('cache_hits_total', 'Cache hits', ['model'])
+CACHE_MISSES = Counter('cache_misses_total', 'Cache misses', ['model'])
+CACHE_EVICTIONS = Counter('cache_evictions_total', 'Entries evicted from the local LRU cache', ['model'])
+
+# Хешування паролів (app/passwords.py): запити, відхилені через переповнену чергу (503)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hash/verify operations rejected because the hashing queue was full",
+)
+
+# SQL-запити на HTTP-запит (app/query_stats.py), мітка endpoint - ім'я Flask endpoint
+DB_QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request', 'Number of SQL statements executed per HTTP request', ['endpoint'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    'db_time_per_request_seconds', 'Total SQL execution time per HTTP request', ['endpoint'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_SLOW_QUERIES = Counter(
+    'db_slow_queries_total', 'SQL statements slower than SQL_SLOW_QUERY_MS', ['endpoint'],
+)
+
+# Контроль допуску запитів (app/admission.py): відхилені лімітом частоти (429) і скинуті під навантаженням (503)
+RATE_LIMITED = Counter(
+    'http_rate_limited_total', 'Requests rejected by the rate limiter (429)', ['group', 'key'],
+)
+REQUESTS_SHED = Counter(
+    'http_requests_shed_total', 'Requests rejected by the load shedder (503)', ['reason'],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'API requests currently being processed (counted by the load shedder)',
+    multiprocess_mode='livesum',
+)
+
+# Ключі ідемпотентності (app/idempotency.py): POST-запити з Idempotency-Key за результатом -
+# stored / not_stored (перший запит), replayed / replayed_after_wait (повтор), in_progress, mismatch
+IDEMPOTENCY_REQUESTS = Counter(
+    'idempotency_requests_total', 'POST requests with an Idempotency-Key header by outcome', ['endpoint', 'result'],
+)
@@ -1,5 +1,20 @@
-from werkzeug.security import generate_password_hash, check_password_hash
-from app import db
+import json
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects import postgresql  # noqa: F401 - реєструє типи для func.to_tsvector()
+from app import db, passwords
+
+
+def task_search_vector(title, description):
+    """
+    Вираз для повнотекстового пошуку по title/description (PostgreSQL).
+    Запит має використовувати саме цей вираз, інакше GIN-індекс не буде задіяний,
+    тому константи задані як literal_column (вони потрапляють у SQL без bind-параметрів).
+    """
+    return func.to_tsvector(
+        literal_column("'simple'::regconfig"),
+        func.coalesce(title, literal_column("''")).op('||')(literal_column("' '"))
+        .op('||')(func.coalesce(description, literal_column("''")))
+    )
 
 
 class User(db.Model):
@@ -7,19 +22,30 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
-    tasks = db.relationship('Task', backref='owner', lazy=True)
+    created_at = db.Column(db.DateTime, server_default=func.now())
+    # Версія для оптимістичного блокування: кожен UPDATE збільшує її на 1 (див. app/etag.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Задачі по порядку id - сортує БД. Списки користувачів із задачами не використовують зв'язок
+    # (один запит на користувача), а читають усі задачі одним запитом: GET /users?include=tasks
+    tasks = db.relationship('Task', backref='owner', lazy=True, order_by='Task.id')
 
     def to_dict(self):
         return {
             "id": self.id,
-            "username": self.username
+            "username": self.username,
+            "version": self.version
         }
 
+    # Хешування виконується в пулі процесів (app/passwords.py)
     def set_password(self, raw_password):
-        self.password = generate_password_hash(raw_password)
+        self.password = passwords.hash(raw_password)
 
     def check_password(self, raw_password):
-        return check_password_hash(self.password, raw_password)
+        return passwords.verify(self.password, raw_password)
+
+    def password_needs_rehash(self):
+        """Хеш створено зі старими параметрами (PASSWORD_HASH_METHOD змінився)."""
+        return passwords.needs_rehash(self.password)
 
 
 class Task(db.Model):
@@ -29,6 +55,20 @@ class Task(db.Model):
     description = db.Column(db.Text, nullable=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     status = db.Column(db.String(20), nullable=False, default="невиконана")
+    created_at = db.Column(db.DateTime, server_default=func.now())
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    # Індекси під фільтри списку задач (див. app/queries.py).
+    # (owner_id, status, id) обслуговує фільтр за власником+статусом і keyset-пагінацію
+    # по id всередині нього; (owner_id, id) - фільтр лише за власником без сортування.
+    __table_args__ = (
+        db.Index('ix_tasks_owner_status_id', 'owner_id', 'status', 'id'),
+        db.Index('ix_tasks_owner_id_id', 'owner_id', 'id'),
+        db.Index('ix_tasks_status_id', 'status', 'id'),
+        db.Index('ix_tasks_created_at', 'created_at'),
+        db.Index('ix_tasks_search', task_search_vector(title, description),
+                 postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
 
     def to_dict(self):
         return {
@@ -36,5 +76,114 @@ class Task(db.Model):
             "title": self.title,
             "description": self.description,
             "owner_id": self.owner_id,
-            "status": self.status
+            "status": self.status,
+            "version": self.version
+        }
+
+
+# Вираз для повнотекстового пошуку (PostgreSQL).
+TASK_SEARCH_VECTOR = task_search_vector(Task.__table__.c.title, Task.__table__.c.description)
+
+
+# Кількість задач для кожної пари (owner_id, status) - джерело /api/tasks/stats на PostgreSQL.
+# Оновлюється тригерами на tasks (див. app/task_stats.py); NULLS NOT DISTINCT - один рядок і для
+# задач без статусу, внесених поза API. Без первинного ключа, тому Table, а не модель.
+task_stats = db.Table(
+    'task_stats',
+    db.Column('owner_id', db.Integer),
+    db.Column('status', db.String(20)),
+    db.Column('count', db.BigInteger, nullable=False, default=0),
+    db.UniqueConstraint('owner_id', 'status', name='uq_task_stats_owner_status',
+                        postgresql_nulls_not_distinct=True),
+)
+
+
+class TableVersion(db.Model):
+    """
+    Лічильник версій таблиці для ETag: збільшується в тій самій транзакції,
+    що й зміна даних (див. app/etag.py).
+    """
+    __tablename__ = 'table_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class TaskEvent(db.Model):
+    """
+    Журнал змін задач для стріму /api/tasks/events на PostgreSQL (див. app/events.py).
+    Рядок пишеться в тій самій транзакції, що й зміна задачі; data - готовий JSON події.
+    """
+    __tablename__ = 'task_events'
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=func.now())
+
+
+class RevokedToken(db.Model):
+    """
+    Відкликані JWT (див. app/auth.py): один токен за jti або всі токени користувача,
+    видані до issued_before. Часові поля - unix-час у секундах, як iat/exp у токені.
+    """
+    __tablename__ = 'revoked_tokens'
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)
+    jti = db.Column(db.String(36))
+    user_id = db.Column(db.Integer)
+    issued_before = db.Column(db.BigInteger, nullable=False)
+    expires_at = db.Column(db.BigInteger, index=True)
+
+
+class IdempotencyKey(db.Model):
+    """
+    Збережені відповіді POST-запитів з Idempotency-Key (backend database, див. app/idempotency.py).
+    key - ключ у межах маршруту й користувача (store_key()), тож PRIMARY KEY - обмеження унікальності
+    (ключ, користувач): паралельні INSERT ... ON CONFLICT у різних воркерах займають ключ лише один раз.
+    expires_at - unix-час у секундах; прострочені рядки вважаються відсутніми й видаляються періодично.
+    """
+    __tablename__ = 'idempotency_keys'
+    key = db.Column(db.String(512), primary_key=True)
+    value = db.Column(db.LargeBinary, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+
+
+class Job(db.Model):
+    """
+    Фонова задача (черга в таблиці, див. app/jobs.py): воркер забирає рядки queued через
+    SELECT ... FOR UPDATE SKIP LOCKED. payload і result - JSON; result оновлюється після кожної
+    пачки (прогрес), heartbeat_at - тоді ж, щоб задачу зупиненого воркера можна було підхопити.
+    created_by без FOREIGN KEY: задача видалення користувача переживає самого користувача.
+    """
+    __tablename__ = 'jobs'
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    payload = db.Column(db.Text, nullable=False)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, server_default=func.now())
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    # Черга: наступна задача - найменший id серед queued
+    __table_args__ = (
+        db.Index('ix_jobs_status_id', 'status', 'id'),
+    )
+
+    def to_dict(self):
+        def timestamp(value):
+            return value.isoformat() if value else None
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": timestamp(self.created_at),
+            "started_at": timestamp(self.started_at),
+            "finished_at": timestamp(self.finished_at),
         }
@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+from urllib.parse import urlencode
+
+
+# --- Keyset-пагінація та проєкція полів для списків ---
+
+def encode_cursor(last_id):
+    """Кодує id останнього рядка сторінки у непрозорий курсор."""
+    raw = json.dumps({"after_id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Розкодовує курсор. Повертає after_id або None, якщо курсор некоректний."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        after_id = int(payload["after_id"])
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+    return after_id if after_id >= 0 else None
+
+
+def parse_page_args(args, default_limit, max_limit):
+    """
+    Розбирає параметри сторінки: cursor або after_id, limit.
+    Повертає кортеж:
+        - ((after_id, limit), {}) якщо параметри валідні
+        - (None, {"error": "..."}) якщо невалідні
+    limit більший за max_limit обрізається до max_limit.
+    """
+    after_id = 0
+    if args.get("cursor"):
+        after_id = decode_cursor(args["cursor"])
+        if after_id is None:
+            return None, {"error": "cursor is invalid"}
+    elif args.get("after_id") is not None:
+        try:
+            after_id = int(args["after_id"])
+        except (ValueError, TypeError):
+            return None, {"error": "after_id must be a valid integer"}
+        if after_id < 0:
+            return None, {"error": "after_id must be a non-negative integer"}
+
+    limit = default_limit
+    if args.get("limit") is not None:
+        try:
+            limit = int(args["limit"])
+        except (ValueError, TypeError):
+            return None, {"error": "limit must be a valid integer"}
+        if limit < 1:
+            return None, {"error": "limit must be a positive integer"}
+
+    return (after_id, min(limit, max_limit)), {}
+
+
+def parse_fields(args, allowed_fields):
+    """
+    Розбирає параметр fields=id,title,...
+    Повертає (tuple полів, {}) або (None, {"error": "..."}).
+    Без параметра повертаються всі дозволені поля.
+    """
+    raw = args.get("fields")
+    if not raw:
+        return tuple(allowed_fields), {}
+
+    fields = []
+    for name in raw.split(","):
+        name = name.strip()
+        if name and name not in fields:
+            fields.append(name)
+
+    unknown = [f for f in fields if f not in allowed_fields]
+    if unknown:
+        return None, {"error": f"Unknown fields: {', '.join(unknown)}"}
+    if not fields:
+        return None, {"error": "fields cannot be empty"}
+
+    return tuple(fields), {}
+
+
+def next_page_link(base_url, params, cursor):
+    """
+    Будує посилання на наступну сторінку, зберігаючи решту параметрів запиту.
+    params - пари (ключ, значення), наприклад request.args.items(multi=True).
+    """
+    pairs = [(k, v) for k, v in params if k not in ("cursor", "after_id")]
+    pairs.append(("cursor", cursor))
+    return f"{base_url}?{urlencode(pairs)}"
+
+
+def next_page_headers(base_url, params, next_cursor):
+    """Заголовки Link (rel="next") та X-Next-Cursor ({} для останньої сторінки)."""
+    if next_cursor is None:
+        return {}
+    return {"Link": f'<{next_page_link(base_url, params, next_cursor)}>; rel="next"', "X-Next-Cursor": next_cursor}
+
@@ -0,0 +1,159 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, jsonify
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+from app.metrics import PASSWORD_HASH_REJECTED
+
+
+# --- Хешування паролів поза потоками обробки запитів ---
+# scrypt з параметрами за замовчуванням (scrypt:32768:8:1) - це десятки мілісекунд CPU
+# і ~32 МБ пам'яті на кожен login/register. Щоб сплеск логінів не забирав потоки
+# воркера в інших ендпоінтів, хешування виконується в невеликому пулі процесів,
+# а кількість операцій, що виконуються або чекають у черзі, обмежена:
+# понад ліміт запит одразу отримує 503 замість того, щоб накопичуватись.
+#
+# Налаштування:
+#   - PASSWORD_HASH_METHOD      - метод werkzeug, наприклад scrypt:32768:8:1 або pbkdf2:sha256:600000;
+#                                 хеші зі старими параметрами оновлюються при успішному логіні;
+#   - PASSWORD_HASH_WORKERS     - процесів у пулі на воркер gunicorn (0 - хешувати в потоці запиту);
+#   - PASSWORD_HASH_MAX_PENDING - скільки операцій може виконуватись і чекати одночасно (0 - без обмеження);
+#   - PASSWORD_HASH_TIMEOUT     - скільки секунд чекати на результат.
+
+class PasswordHasherOverloaded(Exception):
+    """Черга хешування заповнена - запит відхиляється з 503."""
+
+
+_executors = {}  # workers -> (pid, ProcessPoolExecutor): один пул на процес
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers, reset=False):
+    """
+    Пул процесів для хешування. Створюється ліниво в кожному процесі: після fork
+    воркера gunicorn пул master-процесу непридатний. spawn - щоб не форкати процес з потоками.
+    """
+    with _executors_lock:
+        pid, executor = _executors.get(workers, (None, None))
+        if reset or pid != os.getpid():
+            executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _executors[workers] = (os.getpid(), executor)
+        return executor
+
+
+def normalize_method(method):
+    """Повна форма методу з усіма параметрами, як вона записується в хеш (до першого '$')."""
+    name, *params = method.split(":")
+    if name == "scrypt":
+        defaults = ["32768", "8", "1"]
+    elif name == "pbkdf2":
+        defaults = ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ":".join([name] + params + defaults[len(params):])
+
+
+class PasswordHasher:
+    """Хешування/перевірка паролів у пулі процесів з обмеженою чергою."""
+
+    def __init__(self, method="scrypt", workers=1, max_pending=16, timeout=10):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending) if max_pending > 0 else None
+
+    def submit(self, fn, *args):
+        """Запускає fn у пулі й повертає concurrent.futures.Future; кидає PasswordHasherOverloaded."""
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            PASSWORD_HASH_REJECTED.inc()
+            raise PasswordHasherOverloaded("Too many password operations in progress")
+
+        try:
+            if self.workers > 0:
+                try:
+                    future = get_executor(self.workers).submit(fn, *args)
+                except BrokenProcessPool:
+                    # процес пулу аварійно завершився (наприклад, OOM) - створюємо пул заново
+                    future = get_executor(self.workers, reset=True).submit(fn, *args)
+            else:
+                future = Future()
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+        except BaseException:
+            self._release()
+            raise
+
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        if self._slots is not None:
+            self._slots.release()
+
+    def run(self, fn, *args):
+        """Виконує fn у пулі й чекає результат не довше timeout."""
+        try:
+            return self.submit(fn, *args).result(self.timeout)
+        except FutureTimeoutError:
+            raise PasswordHasherOverloaded("Password operation timed out")
+
+    async def run_async(self, fn, *args):
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.submit(fn, *args)), self.timeout)
+        except asyncio.TimeoutError:
+            raise PasswordHasherOverloaded("Password operation timed out")
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self.run(check_password_hash, pwhash, password)
+
+    async def hash_async(self, password):
+        return await self.run_async(generate_password_hash, password, self.method)
+
+    async def verify_async(self, pwhash, password):
+        return await self.run_async(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Чи створено хеш з параметрами, відмінними від поточного PASSWORD_HASH_METHOD."""
+        return pwhash.split("$", 1)[0] != self.method
+
+
+class Passwords:
+    """Розширення Flask: passwords.init_app(app), далі passwords.hash()/verify() у моделях і маршрутах."""
+
+    def init_app(self, app, hasher=None):
+        if hasher is None:
+            hasher = PasswordHasher(
+                method=app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+                workers=app.config.get('PASSWORD_HASH_WORKERS', 1),
+                max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 16),
+                timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10),
+            )
+        app.extensions['passwords'] = hasher
+        app.register_error_handler(PasswordHasherOverloaded, overloaded_response)
+
+    @property
+    def hasher(self):
+        return current_app.extensions['passwords']
+
+    def hash(self, password):
+        return self.hasher.hash(password)
+
+    def verify(self, pwhash, password):
+        return self.hasher.verify(pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return self.hasher.needs_rehash(pwhash)
+
+
+def overloaded_response(error):
+    response = jsonify({"error": "Too many login attempts in progress, retry later"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
@@ -0,0 +1,245 @@
+from datetime import datetime
+from sqlalchemy import select, update, delete, func
+from app.models import Task, User, TASK_SEARCH_VECTOR
+from app.pagination import encode_cursor
+
+
+# --- Запити для read-only списків ---
+# Запити будуються як SQLAlchemy Core select() без прив'язки до Flask,
+# тому їх можна виконувати як через db.session, так і через інший engine.
+
+# Поля задачі, доступні для проєкції через ?fields=
+TASK_FIELDS = ("id", "title", "description", "owner_id", "status", "version")
+
+# Поля задачі, які клієнт може змінити через PUT (id і version змінює лише сервер)
+TASK_UPDATE_FIELDS = ("title", "description", "owner_id", "status")
+
+
+# Допустимі значення параметра сортування ?sort=
+TASK_SORTS = ("id", "-id")
+
+
+def parse_task_filters(args, current_user_id=None):
+    """
+    Розбирає фільтри списку задач з параметрів запиту:
+        - owner_id=<id> (або owner_id=me для поточного користувача)
+        - status=<a>&status=<b> або status=<a>,<b>
+        - created_from / created_to - межі created_at у форматі ISO 8601
+        - q - текстовий пошук по title/description
+        - sort=id | -id
+    Повертає (filters: dict, {}) або (None, {"error": "..."}).
+    """
+    filters = {"sort": args.get("sort", "id")}
+    if filters["sort"] not in TASK_SORTS:
+        return None, {"error": f"sort must be one of: {', '.join(TASK_SORTS)}"}
+
+    owner_id = args.get("owner_id")
+    if owner_id is not None:
+        if owner_id == "me":
+            if current_user_id is None:
+                return None, {"error": "owner_id=me requires authorization"}
+            owner_id = current_user_id
+        try:
+            filters["owner_id"] = int(owner_id)
+        except (ValueError, TypeError):
+            return None, {"error": "owner_id must be a valid integer"}
+
+    raw_statuses = args.getlist("status") if hasattr(args, "getlist") else [args.get("status")]
+    statuses = [s.strip() for raw in raw_statuses if raw for s in raw.split(",") if s.strip()]
+    if statuses:
+        filters["statuses"] = statuses
+
+    for name in ("created_from", "created_to"):
+        if args.get(name):
+            try:
+                filters[name] = datetime.fromisoformat(args[name])
+            except ValueError:
+                return None, {"error": f"{name} must be an ISO 8601 date or datetime"}
+
+    q = (args.get("q") or "").strip()
+    if q:
+        filters["q"] = q
+
+    return filters, {}
+
+
+def apply_task_filters(stmt, filters, dialect_name):
+    """
+    Додає до запиту WHERE-умови фільтрів.
+    Текстовий пошук на PostgreSQL йде через GIN-індекс по tsvector,
+    на інших БД (SQLite) - через LIKE по title/description.
+    """
+    if "owner_id" in filters:
+        stmt = stmt.where(Task.owner_id == filters["owner_id"])
+    if "statuses" in filters:
+        statuses = filters["statuses"]
+        stmt = stmt.where(Task.status == statuses[0] if len(statuses) == 1 else Task.status.in_(statuses))
+    if "created_from" in filters:
+        stmt = stmt.where(Task.created_at >= filters["created_from"])
+    if "created_to" in filters:
+        stmt = stmt.where(Task.created_at <= filters["created_to"])
+    if "q" in filters:
+        if dialect_name == "postgresql":
+            stmt = stmt.where(TASK_SEARCH_VECTOR.op("@@")(func.plainto_tsquery("simple", filters["q"])))
+        else:
+            stmt = stmt.where(Task.title.icontains(filters["q"], autoescape=True)
+                              | Task.description.icontains(filters["q"], autoescape=True))
+    return stmt
+
+
+def select_tasks_page(after_id, limit, fields=TASK_FIELDS, filters=None, dialect_name=None):
+    """
+    Keyset-запит сторінки задач: WHERE id > after_id ORDER BY id LIMIT limit + 1
+    (для sort=-id - WHERE id < after_id ORDER BY id DESC).
+    Зайвий рядок потрібен лише щоб дізнатись, чи є наступна сторінка.
+    id вибирається завжди, бо по ньому будується курсор.
+    """
+    filters = filters or {}
+    columns = [Task.id] + [getattr(Task, f) for f in fields if f != "id"]
+    stmt = apply_task_filters(select(*columns), filters, dialect_name)
+
+    if filters.get("sort") == "-id":
+        if after_id:
+            stmt = stmt.where(Task.id < after_id)
+        return stmt.order_by(Task.id.desc()).limit(limit + 1)
+
+    return stmt.where(Task.id > after_id).order_by(Task.id).limit(limit + 1)
+
+
+def select_all_tasks(fields=TASK_FIELDS):
+    """Усі задачі по порядку id - для потокового експорту (без LIMIT)."""
+    return select(*[getattr(Task, f) for f in fields]).order_by(Task.id)
+
+
+# Поля користувача у списку /users
+USER_LIST_FIELDS = ("id", "username")
+
+
+def select_users():
+    """Список користувачів колонками (без ORM-об'єктів і пароля) по порядку id."""
+    return select(*[getattr(User, f) for f in USER_LIST_FIELDS]).order_by(User.id)
+
+
+def rows_to_dicts(rows, fields):
+    return [dict(zip(fields, row)) for row in rows]
+
+
+# --- Користувачі разом із задачами: GET /users?include=tasks ---
+# Два запити незалежно від кількості користувачів: список користувачів і задачі всіх
+# користувачів, відсортовані в БД за (owner_id, id) (індекс ix_tasks_owner_id_id).
+# Обмеження задач на користувача (tasks_limit) - віконна функція row_number() у тому ж запиті.
+
+# Поля задачі у списку користувача
+USER_TASK_FIELDS = ("id", "title", "description", "status")
+
+# Допустимі значення параметра ?include=
+USER_INCLUDES = ("tasks",)
+
+
+def parse_user_list_args(args):
+    """
+    Розбирає параметри списку користувачів: include=tasks і tasks_limit=<n> (не більше n задач на користувача).
+    Повертає ({"include_tasks": bool, "tasks_limit": int | None}, {}) або (None, {"error": "..."}).
+    """
+    include = args.get("include")
+    if include is not None and include not in USER_INCLUDES:
+        return None, {"error": f"include must be one of: {', '.join(USER_INCLUDES)}"}
+
+    tasks_limit = args.get("tasks_limit")
+    if tasks_limit is not None:
+        if include is None:
+            return None, {"error": "tasks_limit requires include=tasks"}
+        try:
+            tasks_limit = int(tasks_limit)
+        except (ValueError, TypeError):
+            return None, {"error": "tasks_limit must be a valid integer"}
+        if tasks_limit < 1:
+            return None, {"error": "tasks_limit must be a positive integer"}
+
+    return {"include_tasks": include == "tasks", "tasks_limit": tasks_limit}, {}
+
+
+def select_tasks_by_owner(tasks_limit=None):
+    """Рядки (owner_id, *USER_TASK_FIELDS) задач усіх користувачів за (owner_id, id)."""
+    columns = [Task.owner_id, *[getattr(Task, f) for f in USER_TASK_FIELDS]]
+    if tasks_limit is None:
+        return select(*columns).order_by(Task.owner_id, Task.id)
+
+    position = func.row_number().over(partition_by=Task.owner_id, order_by=Task.id).label("position")
+    numbered = select(*columns, position).subquery()
+    return (select(numbered.c.owner_id, *[numbered.c[f] for f in USER_TASK_FIELDS])
+            .where(numbered.c.position <= tasks_limit)
+            .order_by(numbered.c.owner_id, numbered.c.id))
+
+
+def users_with_tasks(user_rows, task_rows):
+    """Список користувачів (select_users()) з полем tasks з рядків select_tasks_by_owner()."""
+    users = rows_to_dicts(user_rows, USER_LIST_FIELDS)
+    tasks_by_owner = {}
+    for user in users:
+        user["tasks"] = tasks_by_owner[user["id"]] = []
+    for owner_id, *values in task_rows:
+        tasks = tasks_by_owner.get(owner_id)
+        # Користувач, створений між двома запитами, у список не потрапив - його задачі теж
+        if tasks is not None:
+            tasks.append(dict(zip(USER_TASK_FIELDS, values)))
+    return users
+
+
+def rows_to_page(rows, fields, limit):
+    """
+    Перетворює рядки select_tasks_page() у список dict з потрібними полями.
+    Повертає кортеж (items, next_cursor); next_cursor = None для останньої сторінки.
+    """
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    # Колонки рядка - id і далі fields без id (див. select_tasks_page); zip по кортежу
+    # швидший за row._mapping[f] на кожне поле
+    if "id" in fields:
+        keys, skip = ("id",) + tuple(f for f in fields if f != "id"), 0
+    else:
+        keys, skip = tuple(fields), 1
+    items = [dict(zip(keys, row[skip:] if skip else row)) for row in rows]
+    next_cursor = encode_cursor(rows[-1].id) if has_next else None
+    return items, next_cursor
+
+
+# --- Запити запису з RETURNING ---
+# Змінений рядок повертається тим самим запитом (PostgreSQL, SQLite >= 3.35), тому
+# маршрутам не потрібні SELECT до зміни (чи існує запис) і після неї (відповідь).
+# Рядка немає - результат порожній, і маршрут відповідає 404.
+# Оновлення збільшує version; з expected_version воно умовне (WHERE version = ?):
+# якщо запис тим часом змінили, результат теж порожній - маршрут відповідає 409.
+
+def update_task_returning(task_id, values, expected_version=None):
+    stmt = update(Task).where(Task.id == task_id)
+    if expected_version is not None:
+        stmt = stmt.where(Task.version == expected_version)
+    return (stmt.values(**values, version=Task.version + 1)
+            .returning(*[getattr(Task, f) for f in TASK_FIELDS])
+            .execution_options(synchronize_session=False))
+
+
+def select_task_versions(task_ids):
+    """(id, version) задач для пакетного оновлення; рядки заблоковані до кінця транзакції."""
+    return select(Task.id, Task.version).where(Task.id.in_(task_ids)).order_by(Task.id).with_for_update()
+
+
+def delete_task_returning(task_id):
+    return (delete(Task).where(Task.id == task_id).returning(Task.id)
+            .execution_options(synchronize_session=False))
+
+
+def update_user_returning(user_id, values, expected_version=None):
+    stmt = update(User).where(User.id == user_id)
+    if expected_version is not None:
+        stmt = stmt.where(User.version == expected_version)
+    return (stmt.values(**values, version=User.version + 1)
+            .returning(User.id, User.username, User.version)
+            .execution_options(synchronize_session=False))
+
+
+def select_user(user_id):
+    """Поточні дані користувача (для відповіді 409)."""
+    return select(User.id, User.username, User.version).where(User.id == user_id)
+
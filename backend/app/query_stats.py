@@ -0,0 +1,239 @@
+import json
+import logging
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from flask import current_app, g, request
+from sqlalchemy import event
+from app.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, DB_SLOW_QUERIES
+
+
+# --- SQL-запити в межах HTTP-запиту ---
+# Події SQLAlchemy before/after_cursor_execute рахують кількість запитів і сумарний
+# час їх виконання для поточного HTTP-запиту; після запиту значення потрапляють у
+# гістограми db_queries_per_request і db_time_per_request_seconds з міткою endpoint
+# (Flask endpoint, наприклад tasks.get_tasks; в ASGI-режимі - те саме ім'я).
+#
+# Запити, довші за SQL_SLOW_QUERY_MS, пишуться окремим JSON-рядком у stdout:
+#     {"@timestamp": ..., "event": "slow_query", "sql": "SELECT ... WHERE id = ?",
+#      "duration_ms": 412.3, "endpoint": "tasks.get_tasks", "request_id": "..."}
+# filebeat збирає stdout контейнера, а logstash розбирає такі рядки (logstash/logstash.conf).
+# SQL нормалізується (літерали й параметри -> ?), щоб однакові запити групувались у Kibana.
+#
+# Запити поза HTTP-запитами (фонові потоки, CLI) не враховуються.
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+
+class RequestQueryStats:
+    """
+    Лічильники SQL-запитів одного HTTP-запиту.
+    endpoint - функція без аргументів: маршрут стає відомим лише після його пошуку.
+    """
+    __slots__ = ("request_id", "endpoint", "slow_query_seconds", "count", "seconds")
+
+    def __init__(self, request_id, endpoint, slow_query_seconds):
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.slow_query_seconds = slow_query_seconds
+        self.count = 0
+        self.seconds = 0.0
+
+
+_current = ContextVar("request_query_stats", default=None)
+
+
+def begin_request(request_id, endpoint, slow_query_seconds):
+    stats = RequestQueryStats(request_id, endpoint, slow_query_seconds)
+    _current.set(stats)
+    return stats
+
+
+def end_request(stats):
+    """Записує метрики запиту; запити без маршруту (404) не записуються."""
+    _current.set(None)
+    endpoint = stats.endpoint() if stats is not None else None
+    if endpoint is None:
+        return
+    DB_QUERIES_PER_REQUEST.labels(endpoint=endpoint).observe(stats.count)
+    DB_TIME_PER_REQUEST.labels(endpoint=endpoint).observe(stats.seconds)
+
+
+def current_stats():
+    return _current.get()
+
+
+# --- Події engine ---
+
+def instrument_engine(engine):
+    """Підключає лічильники до engine (повторний виклик нічого не змінює)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("query_started")
+    if stats is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats.count += 1
+    stats.seconds += elapsed
+    if stats.slow_query_seconds is not None and elapsed >= stats.slow_query_seconds:
+        log_slow_query(stats, statement, elapsed)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute для невдалого запиту не викликається
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+# --- Журнал повільних запитів ---
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(statement):
+    """SQL без конкретних значень: літерали й параметри -> ?, списки IN (?, ?, ...) -> (?...)."""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(?...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def log_slow_query(stats, statement, elapsed):
+    endpoint = stats.endpoint() or "unknown"
+    DB_SLOW_QUERIES.labels(endpoint=endpoint).inc()
+    slow_query_logger.warning("slow query", extra={
+        "event": "slow_query",
+        "sql": normalize_sql(statement),
+        "duration_ms": round(elapsed * 1000, 1),
+        "endpoint": endpoint,
+        "request_id": stats.request_id,
+    })
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON-об'єкт на рядок - формат, який розбирає logstash."""
+
+    FIELDS = ("event", "sql", "duration_ms", "endpoint", "request_id")
+
+    def format(self, record):
+        data = {
+            "@timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        data.update({field: getattr(record, field) for field in self.FIELDS if hasattr(record, field)})
+        return json.dumps(data, ensure_ascii=False)
+
+
+def configure_slow_query_logger():
+    if slow_query_logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.INFO)
+    slow_query_logger.propagate = False
+
+
+def slow_query_seconds(config):
+    """Поріг повільного запиту з SQL_SLOW_QUERY_MS (від'ємне значення - журнал вимкнено)."""
+    ms = config.get('SQL_SLOW_QUERY_MS', 200)
+    return ms / 1000 if ms >= 0 else None
+
+
+# --- Розширення Flask ---
+
+class QueryStats:
+    """query_stats.init_app(app): метрики SQL на кожен запит і журнал повільних запитів."""
+
+    def init_app(self, app):
+        if not app.config.get('SQL_METRICS_ENABLED', True):
+            return
+        from app import db
+        with app.app_context():
+            instrument_engine(db.engine)
+        configure_slow_query_logger()
+        app.before_request(_before_request)
+        app.after_request(_after_request)
+        app.teardown_request(_teardown_request)
+
+
+def _before_request():
+    g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    g.query_stats = begin_request(g.request_id, _flask_endpoint, slow_query_seconds(current_app.config))
+
+
+def _flask_endpoint():
+    return request.endpoint
+
+
+def _after_request(response):
+    request_id = g.get("request_id")
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def _teardown_request(exc):
+    # teardown виконується після відправлення відповіді, тож потокові відповіді теж враховані
+    end_request(g.pop("query_stats", None))
+
+
+# --- ASGI-режим ---
+
+class QueryStatsMiddleware:
+    """ASGI-middleware з тими самими метриками й заголовком X-Request-ID, що й у Flask-частини."""
+
+    def __init__(self, app, config):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        header = REQUEST_ID_HEADER.lower().encode()
+        request_id = dict(scope["headers"]).get(header, b"").decode() or uuid.uuid4().hex
+        stats = begin_request(request_id, lambda: endpoint_name(scope.get("endpoint")),
+                              slow_query_seconds(self.config))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (header, request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            end_request(stats)
+
+
+def endpoint_name(endpoint):
+    """app.asgi.tasks.get_tasks -> tasks.get_tasks - як endpoint відповідного blueprint у Flask."""
+    if endpoint is None:
+        return None
+    return f"{endpoint.__module__.rsplit('.', 1)[-1]}.{endpoint.__name__}"
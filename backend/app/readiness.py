@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import threading
+import time
+from flask import current_app
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from app.database import pool_status
+
+
+# --- Liveness і readiness ---
+# create_app() не звертається до БД: застосунок і воркери gunicorn стартують миттєво,
+# навіть якщо PostgreSQL ще піднімається. З'єднання відкриваються ліниво при першому запиті.
+#
+#   - /api/health/live  - процес живий і обробляє запити: без I/O, без з'єднань з пулу;
+#   - /api/health/ready - (і /api/health/full) готовність до роботи з БД.
+#
+# Readiness не виконує SELECT 1 на кожну перевірку: результат кешується на
+# DB_READINESS_CACHE_SECONDS, а застарілий оновлюється у фоновому потоці - запит
+# отримує останній відомий стан одразу. Синхронно БД перевіряється лише перший раз.
+# Перевірка йде через окреме з'єднання поза пулом застосунку (NullPool), тож healthcheck
+# Docker і балансувальника не забирають з'єднання в користувацьких запитів і не чекають
+# на вільне, коли пул вичерпано. Стан пулу (зайнятість) повідомляється окремо.
+#
+# Якщо БД недоступна, повторні перевірки виконуються з експоненційною затримкою
+# (DB_READINESS_BACKOFF_INITIAL, подвоюється до DB_READINESS_BACKOFF_MAX).
+
+PROBE_SQL = text("SELECT 1")
+
+logger = logging.getLogger(__name__)
+
+
+class Backoff:
+    """Експоненційна затримка між повторними спробами: initial, 2*initial, ... до maximum."""
+
+    def __init__(self, initial=0.5, maximum=30.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.failures = 0
+
+    def next_delay(self):
+        """Затримка перед наступною спробою після чергової невдачі."""
+        delay = min(self.initial * 2 ** self.failures, self.maximum)
+        self.failures += 1
+        return delay
+
+    def reset(self):
+        self.failures = 0
+
+
+def probe_engine(url, timeout):
+    """Engine для перевірок: нове з'єднання на кожну перевірку, з таймаутом підключення."""
+    connect_args = {"connect_timeout": max(1, int(timeout))} if url.get_backend_name() == "postgresql" else {}
+    return create_engine(url, poolclass=NullPool, connect_args=connect_args)
+
+
+class DatabaseReadiness:
+    """Кешований результат перевірки БД; застарілий оновлюється у фоні."""
+
+    def __init__(self, engine, cache_seconds=5.0, backoff_initial=0.5, backoff_max=30.0):
+        self.engine = engine
+        self.cache_seconds = cache_seconds
+        self.backoff = Backoff(backoff_initial, backoff_max)
+        self.checked = False    # чи була хоч одна перевірка
+        self.error = None
+        self.latency = None     # секунд на останню перевірку
+        self.checked_at = None
+        self.retry_at = 0.0     # коли результат застаріває (monotonic)
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def refresh(self):
+        """Перевіряє БД зараз (у потоці виклику)."""
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(PROBE_SQL)
+        except Exception as e:
+            self._record(time.perf_counter() - start, e)
+        else:
+            self._record(time.perf_counter() - start, None)
+
+    def _record(self, latency, error):
+        with self._lock:
+            if error is None:
+                if self.error is not None:
+                    logger.info("Database is reachable again")
+                self.backoff.reset()
+                delay = self.cache_seconds
+            else:
+                delay = self.backoff.next_delay()
+                logger.warning("Database unavailable (attempt %d, next check in %.1fs): %s",
+                               self.backoff.failures, delay, error)
+            self.error = str(error) if error is not None else None
+            self.latency = latency
+            self.checked_at = time.monotonic()
+            self.retry_at = self.checked_at + delay
+            self.checked = True
+
+    def refresh_in_background(self):
+        """Запускає фонову перевірку, якщо результат застарів і перевірка ще не йде."""
+        with self._lock:
+            if self._refreshing or time.monotonic() < self.retry_at:
+                return None
+            self._refreshing = True
+        thread = threading.Thread(target=self._background_refresh, name="db-readiness", daemon=True)
+        thread.start()
+        return thread
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def status(self, pool=None):
+        """(bool, dict) з останнім відомим станом БД і зайнятістю пулу застосунку."""
+        now = time.monotonic()
+        body = {
+            "status": "ok" if self.error is None else "error",
+            "db": "connected" if self.error is None else self.error,
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "checked_ago": round(now - self.checked_at, 1) if self.checked_at is not None else None,
+        }
+        if self.error is not None:
+            body["retry_in"] = round(max(0.0, self.retry_at - now), 1)
+        if pool is not None:
+            body["pool"] = pool_status(pool)
+        return self.error is None, body
+
+    def check(self, pool=None):
+        """Стан для /ready: перший раз перевіряє синхронно, далі - кеш і фонове оновлення."""
+        if not self.checked:
+            self.refresh()
+        else:
+            self.refresh_in_background()
+        return self.status(pool)
+
+    async def check_async(self, pool=None):
+        """Те саме для ASGI-режиму: перша перевірка - в окремому потоці, щоб не блокувати цикл подій."""
+        if not self.checked:
+            await asyncio.to_thread(self.refresh)
+        else:
+            self.refresh_in_background()
+        return self.status(pool)
+
+
+class Readiness:
+    """Розширення Flask: readiness.init_app(app), стан - app.extensions['readiness']."""
+
+    def init_app(self, app):
+        from app import db
+        with app.app_context():
+            url = db.engine.url
+        app.extensions['readiness'] = DatabaseReadiness(
+            probe_engine(url, app.config.get('DB_READINESS_TIMEOUT', 3)),
+            cache_seconds=app.config.get('DB_READINESS_CACHE_SECONDS', 5.0),
+            backoff_initial=app.config.get('DB_READINESS_BACKOFF_INITIAL', 0.5),
+            backoff_max=app.config.get('DB_READINESS_BACKOFF_MAX', 30.0),
+        )
+
+    @property
+    def state(self):
+        return current_app.extensions['readiness']
@@ -0,0 +1,18 @@
+from flask import current_app, jsonify
+from app import cache
+
+
+# --- Спільні хелпери Flask-маршрутів ---
+
+def respond(reply):
+    """Reply сервісу (app/services) -> відповідь Flask; ключі кешу інвалідуються після commit."""
+    if reply.invalidate:
+        cache.invalidate(*reply.invalidate)
+    if reply.body is None:
+        response = current_app.response_class(status=reply.status)
+    else:
+        response = jsonify(reply.body)
+        response.status_code = reply.status
+    if reply.headers:
+        response.headers.update(reply.headers)
+    return response
@@ -1,18 +1,21 @@
 from flask import Blueprint, jsonify
-from sqlalchemy import text
-from app import db
+from app import db, readiness
 
 
 # Створюємо Blueprint
 health_bp = Blueprint('health', __name__)
 
 
-# --- Healthcheck для Docker ---
+# --- Liveness: процес обробляє запити (без звернень до БД і пулу з'єднань) ---
+@health_bp.route("/live", methods=["GET"])
+def health_liveness():
+    return jsonify({"status": "ok"}), 200
+
+
+# --- Readiness для Docker і балансувальника ---
+# Кешований стан БД, що оновлюється у фоні, і зайнятість пулу (див. app/readiness.py)
+@health_bp.route("/ready", methods=["GET"])
 @health_bp.route("/full", methods=["GET"])
 def health_readiness():
-    try:
-        # Проста перевірка підключення до БД
-        db.session.execute(text("SELECT 1;"))
-        return jsonify({"status": "ok", "db": "connected"}), 200
-    except Exception as e:
-        return jsonify({"status": "error", "db": str(e)}), 500
+    ready, body = readiness.state.check(db.engine.pool)
+    return jsonify(body), 200 if ready else 503
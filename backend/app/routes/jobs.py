@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from app import db
+from app.models import Job
+
+
+# Створюємо Blueprint
+jobs_bp = Blueprint('jobs', __name__)
+
+
+# GET /jobs/:id - стан фонової задачі (queued, running, done, failed), прогрес або результат у result.
+# Посилання на задачу повертають маршрути, що відповідають 202 (заголовок Location).
+@jobs_bp.route("/<int:id>", methods=["GET"])
+@jwt_required()
+def get_job(id):
+    job = db.session.get(Job, id)
+    if not job:
+        return jsonify({"error": f"Job with id {id} not found"}), 404
+    return jsonify(job.to_dict())
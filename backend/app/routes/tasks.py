@@ -1,8 +1,16 @@
-from flask import Blueprint, jsonify, request
+import time
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.exc import SQLAlchemyError
-from app import db
-from app.models import Task, User
+from app import db, cache, task_events
+from app.models import Task
+from app.events import format_sse
+from app.etag import row_version, make_etag, not_modified, with_cache_headers
+from app.pagination import parse_fields
+from app.idempotency import idempotent
+from app.queries import TASK_FIELDS, select_all_tasks
+from app.routes.common import respond
+from app.services import tasks as service
+from app.streaming import EXPORT_FORMATS, iter_ndjson, iter_json_array, iter_gzip, accepts_gzip
 
 
 # Створюємо Blueprint
@@ -10,26 +18,121 @@ tasks_bp = Blueprint('tasks', __name__)
 
 
 # --- CRUD для Task ---
+# Валідація, запити й коміт - у app/services/tasks.py (спільні з ASGI-режимом),
+# тут - лише розбір HTTP-запиту, кеш і відповідь.
 
 # GET /tasks - отримання списку всіх задач, для авторизованих користувачів.
 # Будь-який авторизований користувач може подивитись список всіх задач, всіх користувачів
+# Список віддається сторінками (keyset-пагінація), див. list_tasks_page()
 @tasks_bp.route("", methods=["GET"])
 @jwt_required()  # тільки авторизовані користувачі
 def get_tasks():
-    tasks = db.session.query(Task).order_by(Task.id).all()
-    return jsonify([task.to_dict() for task in tasks])
+    return list_tasks_page(current_user_id=int(get_jwt_identity()))
 
 
 # GET /tasks - отримання списку всіх задач, для не авторизованого користувача.
 # Зроблено для WEB, щоб сторінка отримувала всі задачі
 @tasks_bp.route("/public", methods=["GET"])
 def get_tasks_public():
-    tasks = db.session.query(Task).order_by(Task.id).all()
-    return jsonify([task.to_dict() for task in tasks])
+    return list_tasks_page()
+
+
+# GET /tasks/stats - кількість задач за статусом і власником (див. app/task_stats.py).
+# Для дашбордів і фронтенду замість завантаження всіх задач; версія таблиці tasks дає ETag.
+@tasks_bp.route("/stats", methods=["GET"])
+def get_task_stats():
+    return respond(service.task_stats(db.session, current_app, request.headers.get("If-None-Match")))
+
+
+# GET /tasks/export - потоковий експорт усіх задач (NDJSON або JSON-масив).
+# Для споживачів, яким потрібні всі задачі одразу (звірка, Logstash/Elastic).
+# Рядки читаються через server-side курсор (yield_per) і кодуються пачками,
+# тому пам'ять воркера не залежить від розміру таблиці.
+@tasks_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_tasks():
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    fields, error = parse_fields(request.args, TASK_FIELDS)
+    if error:
+        return jsonify(error), 400
+
+    batch_size = current_app.config['TASKS_EXPORT_BATCH_SIZE']
+    dumps = current_app.json.dumps
+
+    def partitions():
+        # yield_per на PostgreSQL вмикає stream_results (server-side курсор)
+        result = db.session.execute(select_all_tasks(fields).execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield [dict(row._mapping) for row in rows]
+
+    encode = iter_ndjson if fmt == "ndjson" else iter_json_array
+    chunks = encode(partitions(), lambda item: dumps(item, separators=(",", ":")))
+
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("Accept-Encoding")):
+        chunks = iter_gzip(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt], headers=headers)
+
+
+# GET /tasks/events - стрім змін задач (Server-Sent Events).
+# Замість періодичного перечитування /tasks/public клієнт отримує лише зміни:
+#   event: task  data: {"op": "created" | "updated" | "deleted", "task": {...}}
+#   event: reset - пропущені події недоступні, потрібно перечитати список повністю.
+# Після розриву браузер сам перепідключається із заголовком Last-Event-ID.
+@tasks_bp.route("/events", methods=["GET"])
+def task_events_stream():
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            last_event_id = -1  # невідомий id - клієнт отримає reset
+
+    if not task_events.acquire_stream(current_app.config['TASK_EVENTS_MAX_STREAMS']):
+        response = jsonify({"error": "Too many event streams, retry later"})
+        response.headers["Retry-After"] = "10"
+        return response, 503
+
+    broker = task_events.broker
+    heartbeat = current_app.config['TASK_EVENTS_HEARTBEAT_SECONDS']
+    deadline = time.monotonic() + current_app.config['TASK_EVENTS_MAX_STREAM_SECONDS']
+
+    def stream():
+        last_id = last_event_id
+        try:
+            if last_id is None:
+                last_id = broker.latest_id()
+                yield format_sse(id=last_id, retry=3000)  # id без data лише запам'ятовується клієнтом
+            else:
+                yield format_sse(retry=3000)
+
+            while (remaining := deadline - time.monotonic()) > 0:
+                events, reset = broker.read(last_id, timeout=min(heartbeat, remaining))
+                if reset:
+                    last_id = broker.latest_id()
+                    yield format_sse("{}", event="reset", id=last_id)
+                elif events:
+                    yield b"".join(format_sse(e.data, event="task", id=e.id) for e in events)
+                    last_id = events[-1].id
+                else:
+                    yield b": heartbeat\n\n"
+        except ConnectionError as e:
+            current_app.logger.warning("Task events stream closed: %s", e)
+
+    response = Response(stream_with_context(stream()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(task_events.release_stream)
+    return response
 
 
 # GET /tasks - отримання списку всіх задач даного авторизованого користувача.
 # Будь-який авторизований користувач може подивитись список всіх своїх задач.
+# Тепер це покривається фільтром: GET /tasks?owner_id=me
 # @tasks_bp.route("", methods=["GET"])
 # @jwt_required()
 # def get_tasks():
@@ -41,122 +144,92 @@ def get_tasks_public():
 # POST /tasks - створення нової задачі на будь-якого зареєстрованого користувача.
 @tasks_bp.route("", methods=["POST"])
 @jwt_required()
+@idempotent
 def create_task():
-    data = request.get_json()
-    # Валідація обов'язкових полів
-    is_valid, error = validate_task_data(data, check_owner_exists=True)
-    if not is_valid:
-        return jsonify(error), 400
-
-    try:
-        new_task = Task(
-            title=data['title'],
-            description=data.get('description'),
-            owner_id=data['owner_id'],
-            status=data.get('status', "невиконана")
-        )
-        db.session.add(new_task)
-        db.session.commit()
-        return jsonify(new_task.to_dict()), 201
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
+    return respond(service.create_task(db.session, current_app, request.get_json()))
 
 
 # GET /tasks/:id - отримання інформації про конкретну задачу.
 @tasks_bp.route("/<int:id>", methods=["GET"])
 @jwt_required()
 def get_task(id):
-    task = db.session.get(Task, id)
+    cache_control = current_app.config['HTTP_CACHE_CONTROL_PRIVATE']
+    version = row_version(Task, id)
+    if version is not None:
+        cached = not_modified(make_etag("task", id, version), cache_control)
+        if cached:
+            return cached
+        task = cache.get_or_load("task", id, lambda: load_task_dict(id), version=version)
+    else:
+        task = None
     if not task:
         return jsonify({"error": f"Task with id {id} not found"}), 404
-    return jsonify(task.to_dict())
+    # ETag - з версії тіла, яке віддається (задачу могли змінити після запиту версії)
+    return with_cache_headers(jsonify(task), make_etag("task", id, task["version"]), cache_control)
 
 
 # PUT /tasks/:id - оновлення інформації про задачу.
+# If-Match: "<version>" (або поле version) - оновити, лише якщо задачу ніхто не змінив (інакше 409).
 @tasks_bp.route("/<int:id>", methods=["PUT"])
 @jwt_required()
 def update_task(id):
-    data = request.get_json()
-    task = db.session.get(Task, id)
-    if not task:
-        return jsonify({"error": f"Task with id {id} not found"}), 404
-
-    # Перевіряємо owner_id лише якщо він переданий
-    check_owner = 'owner_id' in data
-    is_valid, error = validate_task_data(data, check_owner_exists=check_owner, require_all_fields=False)
-    if not is_valid:
-        return jsonify(error), 400
-
-    try:
-        if 'title' in data:
-            task.title = data['title']
-        if 'description' in data:
-            task.description = data['description']
-        if 'status' in data:
-            task.status = data['status']
-        if 'owner_id' in data:
-            task.owner_id = data['owner_id']
-
-        db.session.commit()
-        return jsonify(task.to_dict())
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
+    return respond(service.update_task(db.session, current_app, id, request.get_json(),
+                                       request.headers.get("If-Match")))
 
 
 # DELETE /tasks/:id - видалення задачі.
 @tasks_bp.route("/<int:id>", methods=["DELETE"])
 @jwt_required()
 def delete_task(id):
-    task = db.session.get(Task, id)
+    return respond(service.delete_task(db.session, current_app, id))
 
-    if not task:
-        return jsonify({"error": f"Task with id {id} not found"}), 404
 
-    try:
-        db.session.delete(task)
-        db.session.commit()
-        return jsonify({}), 204
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
-
-
-# Валідація полів на створення/оновлення задачі.
-def validate_task_data(data, check_owner_exists=True, require_all_fields=True):
-    """
-    Перевірка даних для Task.
-    Повертає кортеж:
-        - (True, {}) якщо дані валідні
-        - (False, {"error": "..."}) якщо невалідні
-    """
-    if not data or not isinstance(data, dict):
-        return False, {"error": "Request body must be a valid JSON object"}
-
-    # Перевірка обов'язкових полів
-    required_fields = ['title', 'owner_id']
-
-    if require_all_fields:
-        missing_fields = [f for f in required_fields if f not in data]
-        empty_fields = [f for f in required_fields if f in data and not data[f]]
-
-        if missing_fields:
-            return False, {"error": f"Missing required fields: {', '.join(missing_fields)}"}
-        if empty_fields:
-            return False, {"error": f"Fields cannot be empty: {', '.join(empty_fields)}"}
-
-    # Перевірка чи існує користувач з owner_id
-    if 'owner_id' in data and check_owner_exists:
-        try:
-            owner_id = int(data['owner_id'])
-        except (ValueError, TypeError):
-            return False, {"error": "owner_id must be a valid integer"}
+# --- Пакетні операції над задачами ---
+# Тіло - масив елементів; результат (успіх або помилка) повертається для кожного елемента.
 
-        owner = db.session.get(User, owner_id)
-        if not owner:
-            return False, {"error": f"User with id {owner_id} does not exist"}
+# POST /tasks/bulk - створення багатьох задач.
+@tasks_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+@idempotent
+def bulk_create_tasks():
+    return respond(service.bulk_create_tasks(db.session, current_app, request.get_json(silent=True)))
 
-        data['owner_id'] = owner_id  # зберігаємо як int
 
-    return True, {}
+# PUT /tasks/bulk - оновлення багатьох задач. Кожен елемент має містити id;
+# з полем version елемент оновлюється, лише якщо задачу ніхто не змінив (інакше 409 для елемента).
+@tasks_bp.route("/bulk", methods=["PUT"])
+@jwt_required()
+def bulk_update_tasks():
+    return respond(service.bulk_update_tasks(db.session, current_app, request.get_json(silent=True)))
+
+
+# POST /tasks/import - імпорт великої кількості задач (до TASKS_IMPORT_MAX_ITEMS) фоновою задачею:
+# 202 з посиланням на її стан; елементи обробляються пачками, як у POST /tasks/bulk,
+# кількість створених задач і помилки - у result задачі.
+@tasks_bp.route("/import", methods=["POST"])
+@jwt_required()
+@idempotent
+def import_tasks():
+    return respond(service.import_tasks(db.session, current_app, request.get_json(silent=True),
+                                        created_by=int(get_jwt_identity())))
+
+
+# DELETE /tasks/bulk - видалення багатьох задач. Тіло - масив id.
+@tasks_bp.route("/bulk", methods=["DELETE"])
+@jwt_required()
+def bulk_delete_tasks():
+    return respond(service.bulk_delete_tasks(db.session, current_app, request.get_json(silent=True)))
+
+
+# Сторінка списку задач (параметри - див. app/services/tasks.py).
+def list_tasks_page(current_user_id=None):
+    return respond(service.list_tasks_page(
+        db.session, current_app, request.args, request.args.items(multi=True), request.base_url,
+        request.full_path, request.headers.get("If-None-Match"), current_user_id=current_user_id,
+    ))
+
+
+# Завантаження задачі для кешу (dict або None).
+def load_task_dict(id):
+    task = db.session.get(Task, id)
+    return task.to_dict() if task else None
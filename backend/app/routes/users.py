@@ -1,8 +1,14 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError
-from app import db
+from app import db, cache, passwords
 from app.models import User
+from app.auth import current_revocations
+from app.idempotency import idempotent
+from app.etag import row_version, make_etag, not_modified, with_cache_headers, expected_version
+from app.routes.common import respond
+from app.services import users as service
+from app.services.users import validate_user_data, user_claims, claims_user
 
 
 # Створюємо Blueprint
@@ -11,29 +17,17 @@ users_bp = Blueprint('users', __name__)
 
 # Реєстрація користувача
 @users_bp.route("/register", methods=["POST"])
+@idempotent
 def register():
     data = request.get_json()
 
-    # Валідація полів
+    # Валідація полів; унікальність username перевіряє UNIQUE при INSERT
     is_valid, error = validate_user_data(data)
     if not is_valid:
         return jsonify(error), 400
 
-    try:
-        new_user = User(username=data["username"])
-        new_user.set_password(data["password"])  # хешування пароля через метод класу
-
-        db.session.add(new_user)
-        db.session.commit()
-
-        return jsonify({
-            "message": "User registered successfully",
-            "user": new_user.to_dict()
-        }), 201
-
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
+    # Хешування пароля - у пулі процесів (app/passwords.py), запис - у app/services/users.py
+    return respond(service.register(db.session, current_app, data, passwords.hash(data["password"])))
 
 
 # Авторизація користувача
@@ -51,28 +45,54 @@ def login():
     if not user or not user.check_password(data["password"]):
         return jsonify({"error": "Invalid credentials"}), 401
 
+    # Хеш зі старими параметрами (змінився PASSWORD_HASH_METHOD) - оновлюємо,
+    # поки маємо пароль у відкритому вигляді. Хеш не входить у відповіді API,
+    # тому кеш і ETag користувача не змінюються.
+    if user.password_needs_rehash():
+        try:
+            user.set_password(data["password"])
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+
     # Генерація JWT
-    access_token = create_access_token(identity=str(user.id))
+    access_token = create_access_token(identity=str(user.id),
+                                       additional_claims=user_claims(current_app.config, user))
     return jsonify(access_token=access_token), 200
 
 
+# Вихід: токен відкликається для всіх воркерів (див. app/auth.py)
+@users_bp.route("/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    return respond(service.logout(db.session, current_app, get_jwt()))
+
+
 # "профільний" ендпоінт дозволяє користувачу отримати свої дані.
 @users_bp.route("/me", methods=["GET"])
 @jwt_required()
 def get_current_user():
+    # Дані з самого токена, якщо вони там є і не застаріли - без запиту до БД
+    claims = get_jwt()
+    user = claims_user(claims)
+    if user and not current_revocations().claims_stale(claims):
+        cache_control = current_app.config['HTTP_CACHE_CONTROL_PRIVATE']
+        etag = make_etag("user", user["id"], user["version"])
+        return not_modified(etag, cache_control) or with_cache_headers(jsonify(user), etag, cache_control)
+
     current_user_id = int(get_jwt_identity())
-    user = db.session.get(User, current_user_id)
-    return jsonify(user.to_dict())
+    return user_detail_response(current_user_id)
 
 
 # --- CRUD для User ---
 
 # GET /users - отримання списку всіх користувачів.
+# ?include=tasks - разом із задачами кожного користувача (tasks_limit=<n> - не більше n перших задач),
+# два запити незалежно від кількості користувачів (див. app/queries.py).
 @users_bp.route("", methods=["GET"])
 @jwt_required()  # тільки авторизовані користувачі
 def get_users():
-    users = db.session.query(User).order_by(User.id).all()   # сортування по id
-    return jsonify([serialize_user(u, include_tasks=False) for u in users])
+    return respond(service.list_users(db.session, current_app, request.args, request.headers.get("If-None-Match")))
 
 
 # Так як додано новий едпоінт "/register" то даний едпоінт став не потрібним
@@ -90,7 +110,7 @@ def get_users():
 #         new_user = User(username=data['username'], password=data['password'])
 #         db.session.add(new_user)
 #         db.session.commit()
-#         return jsonify(serialize_user(new_user)), 201
+#         return jsonify(new_user.to_dict()), 201
 #     except SQLAlchemyError as e:
 #         db.session.rollback()
 #         return jsonify({"error": str(e)}), 500
@@ -100,15 +120,11 @@ def get_users():
 @users_bp.route("/<int:id>", methods=["GET"])
 @jwt_required()
 def get_user(id):
-    user = db.session.get(User, id)
-    if not user:
-        return jsonify({"error": f"User with id {id} not found"}), 404
-
-    return jsonify(user.to_dict())
-    # return jsonify(serialize_user(user))
+    return user_detail_response(id)
 
 
 # PUT /users/:id - оновлення інформації про користувача.
+# If-Match: "<version>" (або поле version) - оновити, лише якщо користувача ніхто не змінив (інакше 409).
 @users_bp.route("/<int:id>", methods=["PUT"])
 @jwt_required()
 def update_user(id):
@@ -118,89 +134,48 @@ def update_user(id):
     #     return jsonify({"error": "You can only update your own profile"}), 403
 
     data = request.get_json()
-    user = db.session.get(User, id)
-    if not user:
-        return jsonify({"error": f"User with id {id} not found"}), 404
 
-    # Валідація полів
-    check_unique = 'username' in data and data['username'] != user.username
-    is_valid, error = validate_user_data(data, check_username_unique=check_unique)
+    # Валідація полів (обидва поля обов'язкові); унікальність username перевіряє UNIQUE
+    is_valid, error = validate_user_data(data)
     if not is_valid:
         return jsonify(error), 400
+    version, error = expected_version(request.headers.get("If-Match"), data)
+    if error:
+        return jsonify(error), 400
 
-    try:
-        if 'username' in data:
-            user.username = data['username']
-        if 'password' in data:
-            user.set_password(data['password'])  # хешування пароля
-
-        db.session.commit()
-        return jsonify(user.to_dict())
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
+    rejected = service.check_user_update(db.session, current_app, id, version)
+    if rejected:
+        return respond(rejected)
+    return respond(service.update_user(db.session, current_app, id, data, version, passwords.hash(data['password'])))
 
 
 # DELETE /users/:id - видалення користувача.
+# Користувач видаляється разом із задачами фоновою задачею пачками (app/job_handlers.py),
+# тому відповідь - 202 з посиланням на її стан; токени користувача відкликаються одразу.
 @users_bp.route("/<int:id>", methods=["DELETE"])
 @jwt_required()
 def delete_user(id):
-    user = db.session.get(User, id)
+    return respond(service.delete_user(db.session, current_app, id, created_by=int(get_jwt_identity())))
+
+
+# Відповідь з даними одного користувача: ETag/304, далі кеш, далі БД.
+def user_detail_response(id):
+    cache_control = current_app.config['HTTP_CACHE_CONTROL_PRIVATE']
+    version = row_version(User, id)
+    if version is not None:
+        cached = not_modified(make_etag("user", id, version), cache_control)
+        if cached:
+            return cached
+        user = cache.get_or_load("user", id, lambda: load_user_dict(id), version=version)
+    else:
+        user = None
     if not user:
         return jsonify({"error": f"User with id {id} not found"}), 404
+    return with_cache_headers(jsonify(user), make_etag("user", id, user["version"]), cache_control)
+
+
+# Завантаження користувача для кешу (dict або None).
+def load_user_dict(id):
+    user = db.session.get(User, id)
+    return user.to_dict() if user else None
 
-    try:
-        db.session.delete(user)
-        db.session.commit()
-        return jsonify({"message": f"User with id {id} deleted"}), 200
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
-
-
-def serialize_user(user, include_tasks=True):
-    """Перетворення моделі User у dict."""
-    user_dict = {
-        "id": user.id,
-        "username": user.username,
-    }
-
-    if include_tasks:
-        user_dict["tasks"] = [
-            {
-                "id": t.id,
-                "title": t.title,
-                "description": t.description,
-                "status": t.status
-            }
-            for t in sorted(user.tasks, key=lambda t: t.id)
-        ]
-
-    return user_dict
-
-
-# Валідація полів на створення/оновлення користувача.
-def validate_user_data(data, check_username_unique=True):
-    """
-    Перевіряє дані користувача.
-    Повертає кортеж (is_valid: bool, error: dict)
-    """
-    if not data or not isinstance(data, dict):
-        return False, {"error": "Request body must be a valid JSON object"}
-
-    required_fields = ['username', 'password']
-    missing_fields = [f for f in required_fields if f not in data]
-    empty_fields = [f for f in required_fields if f in data and not data[f]]
-
-    if missing_fields:
-        return False, {"error": f"Missing required fields: {', '.join(missing_fields)}"}
-    if empty_fields:
-        return False, {"error": f"Fields cannot be empty: {', '.join(empty_fields)}"}
-
-    # Перевірка унікальності username
-    if check_username_unique:
-        existing_user = db.session.query(User).filter_by(username=data['username']).first()
-        if existing_user:
-            return False, {"error": f"Username '{data['username']}' already exists"}
-
-    return True, {}
@@ -0,0 +1,31 @@
+from collections import namedtuple
+from app.etag import etag_matches
+
+
+# --- Спільна логіка маршрутів Flask (app/routes) і ASGI (app/asgi) ---
+# Функції сервісів приймають синхронну Session (у Flask - db.session, в ASGI - через
+# AsyncSession.run_sync) і Flask-застосунок (конфігурація, JSON, брокер подій, список
+# відкликаних токенів), виконують валідацію, запити й commit і повертають Reply.
+# Маршрути лише розбирають HTTP-запит і перетворюють Reply на відповідь свого фреймворку.
+#
+# Кеш у сервісах не використовується: ключі з Reply.invalidate маршрут інвалідовує сам
+# після commit (в ASGI-режимі мережевий бекенд викликається поза циклом подій),
+# а хешування пароля виконується до виклику сервісу (у Flask - синхронно, в ASGI - async).
+
+# body None - відповідь без тіла (304); invalidate - (model, id, ...) для Cache.invalidate()
+Reply = namedtuple("Reply", ["body", "status", "headers", "invalidate"], defaults=(200, None, None))
+
+
+def error_reply(message, status=400):
+    return Reply({"error": message}, status)
+
+
+def cache_headers(etag, cache_control):
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified_reply(if_none_match, etag, cache_control):
+    """Reply 304, якщо клієнт уже має цю версію (If-None-Match), інакше None."""
+    if not etag_matches(if_none_match, etag):
+        return None
+    return Reply(None, 304, cache_headers(etag, cache_control))
@@ -0,0 +1,435 @@
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app import task_events
+from app.database import integrity_error_kind
+from app.etag import table_version, bump_table_version, make_etag, expected_version
+from app.jobs import new_job, accepted_body
+from app.models import Task, User
+from app.pagination import parse_page_args, parse_fields, next_page_headers
+from app.queries import (
+    TASK_FIELDS, TASK_UPDATE_FIELDS, parse_task_filters, select_tasks_page, select_all_tasks, rows_to_page,
+    update_task_returning, delete_task_returning, select_task_versions,
+)
+from app.services import Reply, error_reply, cache_headers, not_modified_reply
+from app.task_stats import select_task_stats, stats_from_rows
+
+
+# --- Задачі: спільна частина маршрутів /api/tasks (див. app/services/__init__.py) ---
+
+# GET /tasks/stats - кількість задач за статусом і власником; версія таблиці tasks дає ETag.
+def task_stats(session, app, if_none_match):
+    cache_control = app.config['HTTP_CACHE_CONTROL_PUBLIC']
+    etag = make_etag("task_stats", table_version("tasks", session=session))
+    cached = not_modified_reply(if_none_match, etag, cache_control)
+    if cached:
+        return cached
+
+    rows = session.execute(select_task_stats(session.get_bind().dialect.name)).all()
+    return Reply(stats_from_rows(rows), headers=cache_headers(etag, cache_control))
+
+
+# Сторінка списку задач.
+def list_tasks_page(session, app, args, params, base_url, full_path, if_none_match, current_user_id=None):
+    """
+    Повертає одну сторінку задач.
+    Параметри запиту (args; params - ті самі пари (ім'я, значення) для посилання на наступну сторінку):
+        - cursor    - непрозорий курсор з попередньої відповіді (X-Next-Cursor / Link)
+        - after_id  - альтернатива курсору: повернути задачі з id > after_id
+        - limit     - розмір сторінки (не більше TASKS_MAX_PAGE_SIZE)
+        - fields    - список полів через кому, наприклад fields=id,title
+        - owner_id, status, created_from, created_to, q, sort - фільтри (див. parse_task_filters)
+    Тіло відповіді - JSON-масив задач, посилання на наступну сторінку - у заголовках.
+    """
+    page, error = parse_page_args(
+        args,
+        default_limit=app.config['TASKS_DEFAULT_PAGE_SIZE'],
+        max_limit=app.config['TASKS_MAX_PAGE_SIZE'],
+    )
+    if error:
+        return Reply(error, 400)
+
+    fields, error = parse_fields(args, TASK_FIELDS)
+    if error:
+        return Reply(error, 400)
+
+    filters, error = parse_task_filters(args, current_user_id=current_user_id)
+    if error:
+        return Reply(error, 400)
+
+    # Умовний GET: якщо таблиця не змінювалась, 304 без основного запиту
+    is_public = current_user_id is None
+    cache_control = app.config['HTTP_CACHE_CONTROL_PUBLIC' if is_public else 'HTTP_CACHE_CONTROL_PRIVATE']
+    etag = make_etag("tasks", table_version("tasks", session=session), full_path, current_user_id)
+    cached = not_modified_reply(if_none_match, etag, cache_control)
+    if cached:
+        return cached
+
+    after_id, limit = page
+    stmt = select_tasks_page(after_id, limit, fields, filters, dialect_name=session.get_bind().dialect.name)
+    rows = session.execute(stmt).all()
+    items, next_cursor = rows_to_page(rows, fields, limit)
+    headers = {**cache_headers(etag, cache_control), **next_page_headers(base_url, params, next_cursor)}
+    return Reply(items, headers=headers)
+
+
+# POST /tasks - створення нової задачі на будь-якого зареєстрованого користувача.
+def create_task(session, app, data):
+    # Валідація обов'язкових полів; існування власника перевіряє FOREIGN KEY при INSERT
+    is_valid, error = validate_task_data(data)
+    if not is_valid:
+        return Reply(error, 400)
+
+    try:
+        new_task = Task(
+            title=data['title'],
+            description=data.get('description'),
+            owner_id=data['owner_id'],
+            status=data.get('status', "невиконана")
+        )
+        session.add(new_task)
+        session.flush()  # потрібен id для події
+        task = new_task.to_dict()  # до commit, інакше після нього - повторний SELECT
+        task_events.publish(session, "created", [task], app=app)
+        bump_table_version("tasks", session=session)
+        session.commit()
+        return Reply(task, 201)
+    except IntegrityError as e:
+        session.rollback()
+        return Reply(*task_integrity_error(e, data))
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+
+# PUT /tasks/:id - оновлення задачі.
+# If-Match: "<version>" (або поле version) - оновити, лише якщо задачу ніхто не змінив (інакше 409).
+def update_task(session, app, id, data, if_match):
+    is_valid, error = validate_task_data(data, require_all_fields=False)
+    if not is_valid:
+        return Reply(error, 400)
+    version, error = expected_version(if_match, data)
+    if error:
+        return Reply(error, 400)
+
+    values = {f: data[f] for f in TASK_UPDATE_FIELDS if f in data}
+    if not values:
+        return error_reply("No fields to update")
+
+    try:
+        # Один UPDATE ... RETURNING замість SELECT + UPDATE + SELECT (з версією - ще й без блокувань)
+        row = session.execute(update_task_returning(id, values, version)).first()
+        if row is None:
+            session.rollback()
+            current = session.execute(select_all_tasks().where(Task.id == id)).first() if version is not None else None
+            if current is not None:
+                return Reply(task_conflict(dict(current._mapping)), 409)
+            return error_reply(f"Task with id {id} not found", 404)
+
+        task = dict(row._mapping)
+        task_events.publish(session, "updated", [task], app=app)
+        bump_table_version("tasks", session=session)
+        session.commit()
+        return Reply(task, invalidate=("task", id))
+    except IntegrityError as e:
+        session.rollback()
+        return Reply(*task_integrity_error(e, data))
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+
+# DELETE /tasks/:id - видалення задачі.
+def delete_task(session, app, id):
+    try:
+        if session.execute(delete_task_returning(id)).first() is None:
+            session.rollback()
+            return error_reply(f"Task with id {id} not found", 404)
+
+        task_events.publish(session, "deleted", [{"id": id}], app=app)
+        bump_table_version("tasks", session=session)
+        session.commit()
+        return Reply({}, 204, invalidate=("task", id))
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+
+# --- Пакетні операції над задачами ---
+# Приймають масив елементів, валідують усіх власників одним IN-запитом,
+# виконують усі зміни одним executemany в одній транзакції
+# і повертають результат (успіх або помилку) для кожного елемента.
+
+# POST /tasks/bulk - створення багатьох задач.
+def bulk_create_tasks(session, app, items):
+    items, error = bulk_items(items, app.config['TASKS_BULK_MAX_ITEMS'])
+    if error:
+        return Reply(error, 400)
+
+    results = [None] * len(items)
+    valid = []  # (index, дані)
+    for index, item in enumerate(items):
+        is_valid, error = validate_task_data(item)
+        if not is_valid:
+            results[index] = bulk_error(index, error)
+        else:
+            valid.append((index, item))
+
+    valid = check_bulk_owners(session, valid, results)
+    rows = [
+        {
+            "title": item['title'],
+            "description": item.get('description'),
+            "owner_id": item['owner_id'],
+            "status": item.get('status', "невиконана"),
+        }
+        for _, item in valid
+    ]
+
+    try:
+        if rows:
+            stmt = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+            new_ids = session.scalars(stmt, rows).all()
+            tasks = [{"id": new_id, **row, "version": 1} for new_id, row in zip(new_ids, rows)]
+            task_events.publish(session, "created", tasks, app=app)
+            bump_table_version("tasks", session=session)
+            session.commit()
+            for (index, _), task in zip(valid, tasks):
+                results[index] = {"index": index, "status": 201, "task": task}
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+    return Reply(bulk_summary(results))
+
+
+# PUT /tasks/bulk - оновлення багатьох задач. Кожен елемент має містити id;
+# з полем version елемент оновлюється, лише якщо задачу ніхто не змінив (інакше 409 для елемента).
+def bulk_update_tasks(session, app, items):
+    items, error = bulk_items(items, app.config['TASKS_BULK_MAX_ITEMS'])
+    if error:
+        return Reply(error, 400)
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        is_valid, error = validate_task_data(item, require_all_fields=False)
+        if is_valid:
+            is_valid, error = parse_bulk_id(item)
+        if is_valid:
+            error = expected_version(None, item)[1]
+            is_valid = not error
+        if not is_valid:
+            results[index] = bulk_error(index, error)
+        else:
+            valid.append((index, item))
+
+    valid = check_bulk_owners(session, valid, results)
+    # Версії задач пакета, рядки заблоковані до commit (FOR UPDATE у порядку id - без deadlock),
+    # тож перевірка version і UPDATE нижче атомарні для кожного елемента
+    versions = dict(session.execute(
+        select_task_versions({item['id'] for _, item in valid})
+    ).all()) if valid else {}
+
+    rows = []
+    for index, item in valid:
+        row, results[index] = bulk_update_row(index, item, versions)
+        if row:
+            rows.append(row)
+
+    updated_ids = ()
+    try:
+        if rows:
+            # ORM bulk UPDATE по первинному ключу - executemany
+            session.execute(update(Task), rows)
+            updated_ids = {row['id'] for row in rows}
+            tasks = {
+                row.id: dict(row._mapping)
+                for row in session.execute(select_all_tasks().where(Task.id.in_(updated_ids)))
+            }
+            task_events.publish(session, "updated", list(tasks.values()), app=app)
+            bump_table_version("tasks", session=session)
+            session.commit()
+
+            for index, item in valid:
+                if results[index] is None:
+                    results[index] = {"index": index, "status": 200, "task": tasks[item['id']]}
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+    return Reply(bulk_summary(results), invalidate=("task", *updated_ids))
+
+
+# POST /tasks/import - імпорт великої кількості задач (до TASKS_IMPORT_MAX_ITEMS) фоновою задачею:
+# 202 з посиланням на її стан; елементи обробляються пачками, як у POST /tasks/bulk,
+# кількість створених задач і помилки - у result задачі.
+def import_tasks(session, app, items, created_by):
+    items, error = bulk_items(items, app.config['TASKS_IMPORT_MAX_ITEMS'])
+    if error:
+        return Reply(error, 400)
+
+    try:
+        job = new_job("import_tasks", {"items": items}, created_by=created_by)
+        session.add(job)
+        session.flush()
+        body, headers = accepted_body(job, f"Import of {len(items)} tasks scheduled")
+        session.commit()
+        return Reply(body, 202, headers)
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+
+# DELETE /tasks/bulk - видалення багатьох задач. Тіло - масив id.
+def bulk_delete_tasks(session, app, items):
+    items, error = bulk_items(items, app.config['TASKS_BULK_MAX_ITEMS'])
+    if error:
+        return Reply(error, 400)
+
+    results = [None] * len(items)
+    ids = {}
+    for index, item in enumerate(items):
+        is_valid, error = parse_bulk_id({"id": item})
+        if not is_valid:
+            results[index] = bulk_error(index, error)
+        else:
+            ids[index] = int(item)
+
+    existing = set(session.scalars(
+        select(Task.id).where(Task.id.in_(set(ids.values())))
+    )) if ids else set()
+
+    for index, task_id in ids.items():
+        if task_id in existing:
+            results[index] = {"index": index, "status": 204, "id": task_id}
+        else:
+            results[index] = bulk_error(index, {"error": f"Task with id {task_id} not found"}, 404)
+
+    try:
+        if existing:
+            session.execute(delete(Task).where(Task.id.in_(existing)))
+            task_events.publish(session, "deleted", [{"id": task_id} for task_id in sorted(existing)], app=app)
+            bump_table_version("tasks", session=session)
+            session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+    return Reply(bulk_summary(results), invalidate=("task", *existing))
+
+
+# Хелпери для пакетних операцій.
+def bulk_update_row(index, item, versions):
+    """
+    Рядок пакетного UPDATE для елемента за поточними версіями задач {id: version}:
+    (row, None) або (None, результат-помилка елемента).
+    """
+    current = versions.get(item['id'])
+    if current is None:
+        return None, bulk_error(index, {"error": f"Task with id {item['id']} not found"}, 404)
+    if item.get('version') is not None and item['version'] != current:
+        error = {"error": f"Task with id {item['id']} has been modified (current version {current})"}
+        return None, bulk_error(index, error, 409)
+    values = {f: item[f] for f in TASK_UPDATE_FIELDS if f in item}
+    if not values:
+        return None, bulk_error(index, {"error": "No fields to update"})
+    return {"id": item['id'], **values, "version": current + 1}, None
+
+
+def bulk_items(items, max_items):
+    """
+    Перевіряє масив елементів з тіла запиту (не більше max_items).
+    Повертає (items, {}) або (None, {"error": "..."}).
+    """
+    if not isinstance(items, list):
+        return None, {"error": "Request body must be a JSON array"}
+    if not items:
+        return None, {"error": "Request body cannot be an empty array"}
+    if len(items) > max_items:
+        return None, {"error": f"Too many items: {len(items)} (max {max_items})"}
+    return items, {}
+
+
+def parse_bulk_id(item):
+    """Перевіряє, що елемент містить коректний id задачі (і зберігає його як int)."""
+    try:
+        item['id'] = int(item['id'])
+    except (KeyError, ValueError, TypeError):
+        return False, {"error": "id must be a valid integer"}
+    return True, {}
+
+
+def check_bulk_owners(session, valid, results):
+    """
+    Перевіряє існування всіх owner_id одним IN-запитом.
+    Елементи з неіснуючим власником отримують помилку в results;
+    повертає список елементів, що залишились валідними.
+    """
+    owner_ids = {item['owner_id'] for _, item in valid if 'owner_id' in item}
+    if not owner_ids:
+        return valid
+
+    existing = set(session.scalars(select(User.id).where(User.id.in_(owner_ids))))
+    still_valid = []
+    for index, item in valid:
+        if 'owner_id' in item and item['owner_id'] not in existing:
+            results[index] = bulk_error(index, {"error": f"User with id {item['owner_id']} does not exist"})
+        else:
+            still_valid.append((index, item))
+    return still_valid
+
+
+def bulk_error(index, error, status=400):
+    return {"index": index, "status": status, **error}
+
+
+def bulk_summary(results):
+    succeeded = sum(1 for r in results if r["status"] < 400)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+# Валідація полів на створення/оновлення задачі.
+def validate_task_data(data, require_all_fields=True):
+    """
+    Перевірка даних для Task (без запитів до БД: існування власника перевіряє FOREIGN KEY,
+    див. task_integrity_error()).
+    Повертає кортеж:
+        - (True, {}) якщо дані валідні
+        - (False, {"error": "..."}) якщо невалідні
+    """
+    if not data or not isinstance(data, dict):
+        return False, {"error": "Request body must be a valid JSON object"}
+
+    # Перевірка обов'язкових полів
+    required_fields = ['title', 'owner_id']
+
+    if require_all_fields:
+        missing_fields = [f for f in required_fields if f not in data]
+        empty_fields = [f for f in required_fields if f in data and not data[f]]
+
+        if missing_fields:
+            return False, {"error": f"Missing required fields: {', '.join(missing_fields)}"}
+        if empty_fields:
+            return False, {"error": f"Fields cannot be empty: {', '.join(empty_fields)}"}
+
+    if 'owner_id' in data:
+        try:
+            owner_id = int(data['owner_id'])
+        except (ValueError, TypeError):
+            return False, {"error": "owner_id must be a valid integer"}
+
+        data['owner_id'] = owner_id  # зберігаємо як int
+
+    return True, {}
+
+
+def task_conflict(task):
+    """Тіло відповіді 409: задачу змінили після того, як клієнт її прочитав."""
+    return {"error": f"Task with id {task['id']} has been modified (current version {task['version']})", "task": task}
+
+
+def task_integrity_error(error, data):
+    """IntegrityError при записі задачі -> (error: dict, status) - те саме 400, що й раніше давала валідація."""
+    if integrity_error_kind(error) == "foreign_key":
+        return {"error": f"User with id {data.get('owner_id')} does not exist"}, 400
+    return {"error": str(error)}, 500
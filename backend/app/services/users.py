@@ -0,0 +1,204 @@
+import time
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app.auth import KIND_TOKEN, KIND_USER, KIND_CLAIMS, access_token_lifetime
+from app.database import integrity_error_kind
+from app.etag import table_version, bump_table_version, make_etag
+from app.jobs import new_job, pending_job, accepted_body
+from app.models import User
+from app.queries import (
+    update_user_returning, select_user, select_users, rows_to_dicts, USER_LIST_FIELDS,
+    parse_user_list_args, select_tasks_by_owner, users_with_tasks,
+)
+from app.services import Reply, error_reply, cache_headers, not_modified_reply
+
+
+# --- Користувачі: спільна частина маршрутів /api/users (див. app/services/__init__.py) ---
+# Пароль хешує маршрут (після validate_user_data), сервіс отримує готовий хеш.
+
+# Реєстрація користувача; унікальність username перевіряє UNIQUE при INSERT.
+def register(session, app, data, password_hash):
+    try:
+        new_user = User(username=data["username"], password=password_hash)
+        session.add(new_user)
+        session.flush()
+        user = new_user.to_dict()  # до commit, інакше після нього - повторний SELECT
+        bump_table_version("users", session=session)
+        session.commit()
+        return Reply({"message": "User registered successfully", "user": user}, 201, invalidate=("user", user["id"]))
+    except IntegrityError as e:
+        session.rollback()
+        return Reply(*user_integrity_error(e, data))
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+
+# Вихід: токен відкликається для всіх воркерів (див. app/auth.py)
+def logout(session, app, claims):
+    try:
+        expires_in = int(claims["exp"] - time.time()) + 1 if "exp" in claims else None
+        revocations(app).revoke(session, KIND_TOKEN, jti=claims["jti"], expires_in=expires_in)
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+    return Reply({"message": "Logged out"})
+
+
+# GET /users - список усіх користувачів.
+# ?include=tasks - разом із задачами кожного користувача (tasks_limit=<n> - не більше n перших задач),
+# два запити незалежно від кількості користувачів (див. app/queries.py).
+def list_users(session, app, args, if_none_match):
+    options, error = parse_user_list_args(args)
+    if error:
+        return Reply(error, 400)
+
+    cache_control = app.config['HTTP_CACHE_CONTROL_PRIVATE']
+    if options["include_tasks"]:
+        etag = make_etag("users", table_version("users", session=session),
+                         "tasks", table_version("tasks", session=session), options["tasks_limit"])
+    else:
+        etag = make_etag("users", table_version("users", session=session))
+    cached = not_modified_reply(if_none_match, etag, cache_control)
+    if cached:
+        return cached
+
+    # Колонки замість ORM-об'єктів: список лише для читання, сортування по id
+    rows = session.execute(select_users()).all()
+    if options["include_tasks"]:
+        task_rows = session.execute(select_tasks_by_owner(options["tasks_limit"])).all()
+        users = users_with_tasks(rows, task_rows)
+    else:
+        users = rows_to_dicts(rows, USER_LIST_FIELDS)
+    return Reply(users, headers=cache_headers(etag, cache_control))
+
+
+# PUT /users/:id - перевірка перед хешуванням пароля: для неіснуючого або вже зміненого
+# користувача відповідь 404/409 одразу, без місця в черзі хешування (app/passwords.py).
+# Повертає Reply з помилкою або None, якщо можна хешувати й оновлювати.
+def check_user_update(session, app, id, version):
+    current = session.execute(select_user(id)).first()
+    session.rollback()  # не тримати транзакцію відкритою, поки хешується пароль
+    if current is None:
+        return error_reply(f"User with id {id} not found", 404)
+    if version is not None and current.version != version:
+        return Reply(user_conflict(dict(current._mapping)), 409)
+    return None
+
+
+# PUT /users/:id - оновлення користувача (дані вже перевірені validate_user_data і check_user_update).
+# version - з If-Match або поля version: оновити, лише якщо користувача ніхто не змінив (інакше 409).
+# Між check_user_update і UPDATE користувача могли змінити чи видалити - тоді ті самі 409/404.
+def update_user(session, app, id, data, version, password_hash):
+    try:
+        # Один UPDATE ... RETURNING замість SELECT + перевірки унікальності + UPDATE + SELECT
+        values = {"username": data['username'], "password": password_hash}
+        row = session.execute(update_user_returning(id, values, version)).first()
+        if row is None:
+            session.rollback()
+            current = session.execute(select_user(id)).first() if version is not None else None
+            if current is not None:
+                return Reply(user_conflict(dict(current._mapping)), 409)
+            return error_reply(f"User with id {id} not found", 404)
+
+        if app.config['JWT_EMBED_USER_CLAIMS']:
+            # username у вже виданих токенах міг застаріти - /me для них читатиме БД
+            revocations(app).revoke(session, KIND_CLAIMS, user_id=id, expires_in=access_token_lifetime(app.config))
+
+        bump_table_version("users", session=session)
+        session.commit()
+        return Reply(dict(row._mapping), invalidate=("user", id))
+    except IntegrityError as e:
+        session.rollback()
+        return Reply(*user_integrity_error(e, data))
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+
+# DELETE /users/:id - видалення користувача.
+# Користувач видаляється разом із задачами фоновою задачею пачками (app/job_handlers.py),
+# тому відповідь - 202 з посиланням на її стан; токени користувача відкликаються одразу.
+# Повторний DELETE, поки задача ще не виконана, повертає ту саму задачу замість нової.
+def delete_user(session, app, id, created_by):
+    # FOR UPDATE: паралельні DELETE одного користувача виконуються по черзі й бачать задачу один одного
+    if session.scalar(select(User.id).where(User.id == id).with_for_update()) is None:
+        session.rollback()
+        return error_reply(f"User with id {id} not found", 404)
+
+    payload = {"user_id": id}
+    job = pending_job(session, "delete_user", payload)
+    if job is not None:
+        body, headers = accepted_body(job, f"User with id {id} is already scheduled for deletion")
+        session.rollback()
+        return Reply(body, 202, headers)
+
+    try:
+        # Токени видаленого користувача більше не приймаються
+        revocations(app).revoke(session, KIND_USER, user_id=id, expires_in=access_token_lifetime(app.config))
+        job = new_job("delete_user", payload, created_by=created_by)
+        session.add(job)
+        session.flush()
+        body, headers = accepted_body(job, f"User with id {id} scheduled for deletion")
+        session.commit()
+        return Reply(body, 202, headers, invalidate=("user", id))
+    except SQLAlchemyError as e:
+        session.rollback()
+        return error_reply(str(e), 500)
+
+
+def revocations(app):
+    return app.extensions['jwt_auth'].revocations
+
+
+def user_claims(config, user):
+    """Додаткові claims токена: дані для /me, якщо JWT_EMBED_USER_CLAIMS."""
+    if not config['JWT_EMBED_USER_CLAIMS']:
+        return None
+    return {"username": user.username, "version": user.version}
+
+
+def claims_user(claims):
+    """
+    Дані користувача з claims токена в тій самій формі, що й User.to_dict() (відповідь /me з БД),
+    або None, якщо їх у токені немає (токен без JWT_EMBED_USER_CLAIMS або виданий до появи version).
+    Застарілість claims перевіряє маршрут (RevocationList.claims_stale).
+    """
+    if "username" not in claims or "version" not in claims:
+        return None
+    return {"id": int(claims["sub"]), "username": claims["username"], "version": claims["version"]}
+
+
+# Валідація полів на створення/оновлення користувача.
+def validate_user_data(data):
+    """
+    Перевіряє дані користувача (без запитів до БД: унікальність username перевіряє
+    обмеження UNIQUE, див. user_integrity_error()).
+    Повертає кортеж (is_valid: bool, error: dict)
+    """
+    if not data or not isinstance(data, dict):
+        return False, {"error": "Request body must be a valid JSON object"}
+
+    required_fields = ['username', 'password']
+    missing_fields = [f for f in required_fields if f not in data]
+    empty_fields = [f for f in required_fields if f in data and not data[f]]
+
+    if missing_fields:
+        return False, {"error": f"Missing required fields: {', '.join(missing_fields)}"}
+    if empty_fields:
+        return False, {"error": f"Fields cannot be empty: {', '.join(empty_fields)}"}
+
+    return True, {}
+
+
+def user_conflict(user):
+    """Тіло відповіді 409: користувача змінили після того, як клієнт його прочитав."""
+    return {"error": f"User with id {user['id']} has been modified (current version {user['version']})", "user": user}
+
+
+def user_integrity_error(error, data):
+    """IntegrityError при записі користувача -> (error: dict, status) - те саме 400, що й раніше давала валідація."""
+    if integrity_error_kind(error) == "unique":
+        return {"error": f"Username '{data['username']}' already exists"}, 400
+    return {"error": str(error)}, 500
@@ -0,0 +1,79 @@
+import zlib
+
+
+# --- Потокова (інкрементальна) серіалізація великих списків ---
+# Рядки кодуються пачками й одразу віддаються клієнту, тому пам'ять
+# залежить лише від розміру пачки, а не від кількості рядків у таблиці.
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def iter_ndjson(partitions, dumps):
+    """Один JSON-об'єкт на рядок; одна пачка рядків - один chunk."""
+    for items in partitions:
+        if items:
+            yield "".join(f"{dumps(item)}\n" for item in items).encode()
+
+
+def iter_json_array(partitions, dumps):
+    """Звичайний JSON-масив, що віддається частинами: '[', елементи через кому, ']'."""
+    yield b"["
+    first = True
+    for items in partitions:
+        if not items:
+            continue
+        chunk = ",".join(dumps(item) for item in items)
+        yield (chunk if first else "," + chunk).encode()
+        first = False
+    yield b"]\n"
+
+
+def iter_gzip(chunks, level=6):
+    """Стискає потік chunk-ів у gzip без буферизації всього тіла."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip-заголовок
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Асинхронні варіанти для ASGI-режиму: partitions/chunks - async-ітератори.
+
+async def aiter_ndjson(partitions, dumps):
+    async for items in partitions:
+        for chunk in iter_ndjson([items], dumps):
+            yield chunk
+
+
+async def aiter_json_array(partitions, dumps):
+    yield b"["
+    first = True
+    async for items in partitions:
+        if not items:
+            continue
+        chunk = ",".join(dumps(item) for item in items)
+        yield (chunk if first else "," + chunk).encode()
+        first = False
+    yield b"]\n"
+
+
+async def aiter_gzip(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding):
+    """Чи дозволяє клієнт gzip згідно заголовка Accept-Encoding."""
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
@@ -0,0 +1,137 @@
+import logging
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import DDL, event, func, select
+from app.models import Task, task_stats
+
+
+# --- Статистика задач за статусом і власником ---
+# На PostgreSQL кількість задач для кожної пари (owner_id, status) зберігається в task_stats
+# і оновлюється тригерами на tasks у тій самій транзакції, що й зміна задач, - незалежно від того,
+# хто змінює таблицю (маршрути API, bulk-операції, SQL вручну). Тригери рівня інструкції з
+# таблицями переходів: bulk-вставка 1000 задач - один UPSERT на групу, а не 1000 окремих.
+# Читання /api/tasks/stats - O(кількості груп), а не O(кількості задач).
+# На SQLite (тести, локальна розробка) тригерів немає - той самий результат дає один GROUP BY.
+#
+# Ті самі лічильники експортуються в Prometheus (tasks_by_status, tasks_by_owner) через
+# TaskStatsCollector: значення читаються з БД під час scrape.
+
+logger = logging.getLogger(__name__)
+
+# Має збігатися з db-init/02_create_tables.sql
+TASK_STATS_TRIGGERS = """
+CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    -- ORDER BY: паралельні транзакції блокують рядки task_stats в одному порядку (без deadlock)
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO task_stats (owner_id, status, count)
+        SELECT owner_id, status, count(*) FROM new_rows
+        GROUP BY owner_id, status ORDER BY owner_id, status
+        ON CONFLICT (owner_id, status) DO UPDATE SET count = task_stats.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO task_stats (owner_id, status, count)
+        SELECT owner_id, status, -count(*) FROM old_rows
+        GROUP BY owner_id, status ORDER BY owner_id, status
+        ON CONFLICT (owner_id, status) DO UPDATE SET count = task_stats.count + EXCLUDED.count;
+    ELSE
+        -- UPDATE: лише групи, кількість у яких змінилась (зміна title/description нічого не пише)
+        INSERT INTO task_stats (owner_id, status, count)
+        SELECT owner_id, status, sum(delta) FROM (
+            SELECT owner_id, status, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT owner_id, status, -1 FROM old_rows
+        ) changes
+        GROUP BY owner_id, status HAVING sum(delta) <> 0 ORDER BY owner_id, status
+        ON CONFLICT (owner_id, status) DO UPDATE SET count = task_stats.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION task_stats_reset() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM task_stats;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE TRIGGER tasks_stats_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply();
+CREATE OR REPLACE TRIGGER tasks_stats_update AFTER UPDATE ON tasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply();
+CREATE OR REPLACE TRIGGER tasks_stats_delete AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply();
+CREATE OR REPLACE TRIGGER tasks_stats_truncate AFTER TRUNCATE ON tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION task_stats_reset();
+"""
+
+# Тригери створюються разом з таблицею tasks (db.create_all() на PostgreSQL)
+event.listen(Task.__table__, "after_create", DDL(TASK_STATS_TRIGGERS).execute_if(dialect="postgresql"))
+
+
+def select_task_stats(dialect_name):
+    """Рядки (owner_id, status, count): з task_stats на PostgreSQL, GROUP BY по tasks - на інших БД."""
+    if dialect_name == "postgresql":
+        return select(task_stats.c.owner_id, task_stats.c.status, task_stats.c.count).where(task_stats.c.count > 0)
+    return select(Task.owner_id, Task.status, func.count()).group_by(Task.owner_id, Task.status)
+
+
+def stats_from_rows(rows):
+    """
+    Тіло відповіді /api/tasks/stats:
+        {"total": 3, "by_status": {"виконана": 1, "невиконана": 2},
+         "by_owner": [{"owner_id": 1, "total": 3, "by_status": {...}}, ...]}  - за зростанням owner_id
+    """
+    by_status, by_owner = {}, {}
+    for owner_id, status, count in rows:
+        by_status[status] = by_status.get(status, 0) + count
+        owner = by_owner.setdefault(owner_id, {"owner_id": owner_id, "total": 0, "by_status": {}})
+        owner["total"] += count
+        owner["by_status"][status] = count
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_owner": [by_owner[owner_id] for owner_id in sorted(by_owner)],
+    }
+
+
+# --- Prometheus ---
+
+class TaskStatsCollector:
+    """
+    Колектор prometheus_client: tasks_by_status{status} і tasks_by_owner{owner_id} на момент scrape.
+    Мітки owner_id - лише для TASK_STATS_METRICS_MAX_OWNERS власників з найбільшою кількістю задач,
+    щоб кількість часових рядів не росла разом з кількістю користувачів.
+    Реєструється в реєстрі, який віддає /metrics (run.py, asgi.py).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def describe(self):
+        # Без describe() реєстр викликав би collect() при реєстрації - запит до БД на старті
+        return self._families()
+
+    def collect(self):
+        from app import db
+        try:
+            with self.app.app_context():
+                stats = stats_from_rows(db.session.execute(select_task_stats(db.engine.dialect.name)).all())
+        except Exception as e:
+            logger.warning("Task stats are unavailable for metrics: %s", e)
+            return []
+
+        by_status, by_owner = self._families()
+        for status, count in stats["by_status"].items():
+            by_status.add_metric([str(status)], count)
+        max_owners = self.app.config.get('TASK_STATS_METRICS_MAX_OWNERS', 100)
+        for owner in sorted(stats["by_owner"], key=lambda o: o["total"], reverse=True)[:max_owners]:
+            by_owner.add_metric([str(owner["owner_id"])], owner["total"])
+        return [by_status, by_owner]
+
+    @staticmethod
+    def _families():
+        return [
+            GaugeMetricFamily('tasks_by_status', 'Number of tasks by status', labels=['status']),
+            GaugeMetricFamily('tasks_by_owner', 'Number of tasks by owner (owners with the most tasks)',
+                              labels=['owner_id']),
+        ]
@@ -0,0 +1,19 @@
+import os
+from prometheus_client import REGISTRY, CollectorRegistry, make_asgi_app, multiprocess
+from app.asgi import create_asgi_app
+from app.task_stats import TaskStatsCollector
+
+
+# ASGI-режим API: gunicorn -c gunicorn.conf.py з SERVER_MODE=async
+# (або локально: uvicorn asgi:app --port 5000)
+app = create_asgi_app()
+
+# /metrics - метрики застосунку (пул з'єднань, кеш); під gunicorn агрегуються з усіх воркерів
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+else:
+    registry = REGISTRY
+# Кількість задач за статусом і власником читається з БД під час scrape (синхронний engine Flask-застосунку)
+registry.register(TaskStatsCollector(app.state.flask_app))
+app.mount("/metrics", make_asgi_app(registry))
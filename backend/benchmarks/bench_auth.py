@@ -0,0 +1,59 @@
+import argparse
+import time
+from flask_jwt_extended import verify_jwt_in_request
+from app.cache import LocalCacheBackend
+from benchmarks.common import make_app, login, summarize, database_label
+
+
+# --- Бенчмарк: накладні витрати автентифікації на запит ---
+#   - verify      - лише verify_jwt_in_request(): перевірка підпису і claims кожного разу
+#                   (кеш токенів вимкнено) проти кешу розкодованих токенів;
+#   - /users/me   - повний запит: дані з БД (версія таблиці для ETag + кеш/БД) проти
+#                   username, вбудованого в токен (JWT_EMBED_USER_CLAIMS).
+# Запуск: python -m benchmarks.bench_auth --requests 5000
+
+def measure(fn, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_verify(app, headers, count, cached):
+    auth = app.extensions['jwt_auth']
+    auth.token_cache = LocalCacheBackend(10000 if cached else 0)
+    with app.test_request_context('/api/users/me', headers=headers):
+        return measure(verify_jwt_in_request, count)
+
+
+def bench_me(app, client, count, embed):
+    app.config['JWT_EMBED_USER_CLAIMS'] = embed
+    headers = login(client, username=f"bench{int(embed)}")
+    return measure(lambda: client.get('/api/users/me', headers=headers), count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Накладні витрати перевірки JWT і /users/me")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    app, client = make_app()
+    headers = login(client)
+
+    rows = [
+        ("verify, no cache", bench_verify(app, headers, args.requests, cached=False)),
+        ("verify, token cache", bench_verify(app, headers, args.requests, cached=True)),
+        ("/users/me, from DB", bench_me(app, client, args.requests, embed=False)),
+        ("/users/me, claims", bench_me(app, client, args.requests, embed=True)),
+    ]
+
+    print(f"DB: {database_label()}, {args.requests} iterations")
+    print(f"{'case':<22}{'mean, ms':>10}{'p50, ms':>10}{'p99, ms':>10}")
+    for name, r in rows:
+        print(f"{name:<22}{r['mean_ms']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
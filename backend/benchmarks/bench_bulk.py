@@ -0,0 +1,67 @@
+import argparse
+from benchmarks.common import make_app, login, timed, database_label
+
+
+# --- Бенчмарк: поодинокі POST/PUT/DELETE /api/tasks проти /api/tasks/bulk ---
+# Запуск: python -m benchmarks.bench_bulk --tasks 5000 --batch 1000
+
+def run_single(client, headers, count):
+    def create():
+        for i in range(count):
+            client.post('/api/tasks', json={'title': f'Задача {i}', 'owner_id': 1}, headers=headers)
+
+    def update():
+        for task_id in range(1, count + 1):
+            client.put(f'/api/tasks/{task_id}', json={'status': 'виконана'}, headers=headers)
+
+    def remove():
+        for task_id in range(1, count + 1):
+            client.delete(f'/api/tasks/{task_id}', headers=headers)
+
+    return {name: timed(fn)[1] for name, fn in (("create", create), ("update", update), ("delete", remove))}
+
+
+def run_bulk(client, headers, count, batch):
+    def batches(items):
+        for start in range(0, len(items), batch):
+            yield items[start:start + batch]
+
+    def create():
+        for chunk in batches([{'title': f'Задача {i}', 'owner_id': 1} for i in range(count)]):
+            client.post('/api/tasks/bulk', json=chunk, headers=headers)
+
+    def update():
+        for chunk in batches([{'id': i, 'status': 'виконана'} for i in range(1, count + 1)]):
+            client.put('/api/tasks/bulk', json=chunk, headers=headers)
+
+    def remove():
+        for chunk in batches(list(range(1, count + 1))):
+            client.delete('/api/tasks/bulk', json=chunk, headers=headers)
+
+    return {name: timed(fn)[1] for name, fn in (("create", create), ("update", update), ("delete", remove))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Порівняння поодиноких і пакетних операцій над задачами")
+    parser.add_argument("--tasks", type=int, default=2000, help="скільки задач створити/оновити/видалити")
+    parser.add_argument("--batch", type=int, default=1000, help="розмір пачки для /api/tasks/bulk")
+    args = parser.parse_args()
+
+    print(f"DB: {database_label()}, tasks: {args.tasks}, batch: {args.batch}")
+    results = {}
+    for mode in ("single", "bulk"):
+        app, client = make_app()
+        app.config['TASKS_BULK_MAX_ITEMS'] = max(args.batch, app.config['TASKS_BULK_MAX_ITEMS'])
+        headers = login(client)
+        results[mode] = run_single(client, headers, args.tasks) if mode == "single" \
+            else run_bulk(client, headers, args.tasks, args.batch)
+
+    print(f"{'operation':<10}{'single, rows/s':>18}{'bulk, rows/s':>18}{'speedup':>10}")
+    for op in ("create", "update", "delete"):
+        single = args.tasks / results["single"][op]
+        bulk = args.tasks / results["bulk"][op]
+        print(f"{op:<10}{single:>18.0f}{bulk:>18.0f}{bulk / single:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import gc
+from sqlalchemy import insert
+from app import db
+from app.json_provider import OrjsonProvider, StdlibJSONProvider
+from app.models import Task, User
+from app.queries import TASK_FIELDS, USER_LIST_FIELDS, rows_to_dicts, select_all_tasks
+from benchmarks.common import make_app, login, timed, database_label
+
+
+# --- Бенчмарк: серіалізація списків (ORM + to_dict + json проти колонок + orjson) ---
+# Для кожного розміру N:
+#   - tasks: N задач трьома способами - ORM-об'єкти + Task.to_dict() + stdlib json (як раніше),
+#            кортежі колонок + stdlib json, кортежі колонок + orjson; окремо час вибірки і кодування;
+#   - /api/users: повний запит до ендпоінта з N користувачами (список без пагінації), stdlib vs orjson.
+# Тіла відповідей однакові побайтово (див. app/json_provider.py).
+#     python -m benchmarks.bench_json --rows 10000,100000,1000000
+
+def seed(count):
+    """Додає задачі й користувачів до count рядків (наступні розміри дозаповнюють таблиці)."""
+    existing = db.session.query(Task).count()
+    batch = 50000
+    for start in range(existing, count, batch):
+        end = min(count, start + batch)
+        db.session.execute(insert(User), [
+            {"username": f"user{i}", "password": "-"} for i in range(start, end)])
+        db.session.execute(insert(Task), [
+            {"title": f"Задача {i}", "description": f"Опис задачі {i}", "owner_id": 1, "status": "невиконана"}
+            for i in range(start, end)])
+    db.session.commit()
+
+
+def best_of(repeat, fn, *args, **kwargs):
+    """(результат, найменший час) з repeat запусків - менше шуму від GC і сусідніх процесів."""
+    runs = []
+    for _ in range(repeat):
+        gc.collect()
+        runs.append(timed(fn, *args, **kwargs))
+    return runs[-1][0], min(seconds for _, seconds in runs)
+
+
+def bench_tasks(app, count, repeat):
+    stdlib, fast = StdlibJSONProvider(app), OrjsonProvider(app)
+    stmt = select_all_tasks().limit(count)
+    results = {}
+
+    def orm():
+        tasks = db.session.query(Task).order_by(Task.id).limit(count).all()
+        items = [t.to_dict() for t in tasks]
+        db.session.expunge_all()
+        return items
+
+    def columns():
+        return rows_to_dicts(db.session.execute(stmt).all(), TASK_FIELDS)
+
+    bodies = []
+    for name, load, provider in (("ORM + to_dict + json", orm, stdlib),
+                                 ("columns + json", columns, stdlib),
+                                 ("columns + orjson", columns, fast)):
+        items, load_s = best_of(repeat, load)
+        body, encode_s = best_of(repeat, provider.dumps_bytes, items)
+        bodies.append(body)
+        results[name] = (load_s, encode_s)
+    assert bodies[0] == bodies[1] == bodies[2]
+    return results
+
+
+def bench_users_endpoint(app, client, headers, repeat):
+    results = {}
+    bodies = []
+    for name, provider in (("json", StdlibJSONProvider), ("orjson", OrjsonProvider)):
+        app.json = provider(app)
+        app.config['HTTP_CACHE_CONTROL_PRIVATE'] = 'private, no-cache'
+        response, seconds = best_of(repeat, client.get, '/api/users', headers=headers)
+        bodies.append(response.get_data())
+        results[name] = seconds
+    assert bodies[0] == bodies[1]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Швидкість серіалізації списків задач і користувачів")
+    parser.add_argument("--rows", default="10000,100000,1000000",
+                        type=lambda v: [int(n) for n in v.split(",")], help="розміри списків через кому")
+    parser.add_argument("--repeat", type=int, default=3, help="запусків кожного випадку (береться найкращий)")
+    args = parser.parse_args()
+
+    app, client = make_app()
+    headers = login(client)
+    print(f"DB: {database_label()}")
+    print(f"{'rows':>9}  {'case':<22}{'fetch, ms':>11}{'encode, ms':>12}{'total, ms':>11}")
+    with app.app_context():
+        for count in sorted(args.rows):
+            seed(count)
+            for name, (load_s, encode_s) in bench_tasks(app, count, args.repeat).items():
+                print(f"{count:>9}  {name:<22}{load_s * 1000:>11.1f}{encode_s * 1000:>12.1f}"
+                      f"{(load_s + encode_s) * 1000:>11.1f}")
+            for name, seconds in bench_users_endpoint(app, client, headers, args.repeat).items():
+                print(f"{count:>9}  {'GET /api/users, ' + name:<22}{'':>11}{'':>12}{seconds * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
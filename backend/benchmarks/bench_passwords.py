@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+from benchmarks.load_test import run_load, seed_sqlite, spawn_server, wait_until_ready
+
+
+# --- Бенчмарк: сплеск логінів і латентність інших ендпоінтів ---
+# Для кожної конфігурації хешування піднімається gunicorn (sync) на тому ж SQLite-файлі,
+# після чого одночасно:
+#   - --login-concurrency клієнтів безперервно логіняться (scrypt на кожен запит);
+#   - --concurrency клієнтів читають --path (звичайний ендпоінт, що не хешує паролі).
+# Порівнюються login req/s, кількість 503 і p99 звичайного ендпоінта.
+#
+#     python -m benchmarks.bench_passwords
+#     python -m benchmarks.bench_passwords --workers 0,1,2 --method scrypt:32768:8:1
+
+def storm(base_url, args):
+    """Запускає сплеск логінів паралельно з читанням args.path; повертає (login, other)."""
+    body = json.dumps({"username": "loadtest", "password": "loadtest"})
+    results = {}
+
+    def login_storm():
+        results["login"] = run_load(base_url + "/api/users/login", args.login_concurrency, args.duration,
+                                    headers={"Content-Type": "application/json"}, method="POST", body=body)
+
+    thread = threading.Thread(target=login_storm)
+    thread.start()
+    results["other"] = run_load(base_url + args.path, args.concurrency, args.duration)
+    thread.join()
+    return results["login"], results["other"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сплеск логінів: пул процесів для хешування vs хешування в потоці запиту")
+    parser.add_argument("--workers", default="0,1", type=lambda v: [int(w) for w in v.split(",")],
+                        help="значення PASSWORD_HASH_WORKERS через кому (0 - хешування в потоці запиту)")
+    parser.add_argument("--method", default="scrypt:32768:8:1", help="PASSWORD_HASH_METHOD")
+    parser.add_argument("--max-pending", type=int, default=16, help="PASSWORD_HASH_MAX_PENDING")
+    parser.add_argument("--path", default="/api/tasks/public?limit=20", help="ендпоінт, чию латентність міряємо")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "loadtest.db")
+        os.environ["PASSWORD_HASH_METHOD"] = args.method
+        seed_sqlite(db_path, 100)
+
+        for workers in args.workers:
+            env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}",
+                   "PROMETHEUS_MULTIPROC_DIR": os.path.join(tmp, f"prometheus-{workers}"),
+                   "PASSWORD_HASH_WORKERS": str(workers),
+                   "PASSWORD_HASH_MAX_PENDING": str(args.max_pending)}
+            proc = spawn_server("gunicorn", args.port, env)
+            try:
+                base_url = f"http://127.0.0.1:{args.port}"
+                wait_until_ready(base_url)
+                rows.append((workers, *storm(base_url, args)))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    print(f"{'hash workers':<14}{'login req/s':>12}{'login 503':>11}{'login p99, ms':>15}"
+          f"{'other req/s':>13}{'other p99, ms':>15}")
+    for workers, login, other in rows:
+        print(f"{workers:<14}{login['rps']:>12}{login['rejected']:>11}{login['p99_ms']:>15}"
+              f"{other['rps']:>13}{other['p99_ms']:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+from sqlalchemy import event, insert
+from sqlalchemy.orm import selectinload
+from app import db
+from app.models import Task, User
+from app.queries import USER_LIST_FIELDS, USER_TASK_FIELDS
+from app.services import users as service
+from benchmarks.bench_json import best_of
+from benchmarks.common import make_app, login, database_label
+
+
+# --- Бенчмарк: користувачі разом із задачами (N+1 проти двох запитів) ---
+#   - lazy         - User.query.all() у тій самій формі, що й відповідь API: зв'язок tasks
+#                    завантажується окремим запитом на кожного;
+#   - selectinload - те саме з selectinload(User.tasks): 2 запити (задачі - IN по id пачками);
+#   - service      - list_users() з app/services/users.py, як у маршруті, без HTTP і JSON
+#                    (колонки, задачі одним запитом за (owner_id, id), users_with_tasks());
+#   - endpoint     - GET /api/users?include=tasks повністю;
+#   - endpoint, tasks_limit=10 - те саме з row_number() <= 10 у БД.
+#     python -m benchmarks.bench_users_tasks --users 1000 --tasks 100
+
+def seed(users, tasks_per_user):
+    db.session.execute(insert(User), [{"username": f"user{i}", "password": "-"} for i in range(users)])
+    owner_ids = [row.id for row in db.session.query(User.id).filter(User.username.like("user%"))]
+    rows = [{"title": f"Задача {i}", "description": f"Опис задачі {i}", "owner_id": owner_id, "status": "невиконана"}
+            for owner_id in owner_ids for i in range(tasks_per_user)]
+    for start in range(0, len(rows), 50000):
+        db.session.execute(insert(Task), rows[start:start + 50000])
+    db.session.commit()
+
+
+def orm_user_dict(user):
+    """Модель User з задачами -> dict з тими самими полями, що й у GET /api/users?include=tasks."""
+    user_dict = {f: getattr(user, f) for f in USER_LIST_FIELDS}
+    user_dict["tasks"] = [{f: getattr(t, f) for f in USER_TASK_FIELDS} for t in user.tasks]
+    return user_dict
+
+
+def count_queries(fn):
+    """(результат fn, кількість SQL-запитів під час виклику)."""
+    queries = []
+
+    def listener(*args):
+        queries.append(1)
+
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        return fn(), len(queries)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Список користувачів із задачами: N+1 проти двох запитів")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=100, help="задач на користувача")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app, client = make_app()
+    headers = login(client)
+    app.extensions['jwt_auth'].revocations.sync_interval = float('inf')
+    app.config['SQL_SLOW_QUERY_MS'] = -1
+
+    with app.app_context():
+        seed(args.users, args.tasks)
+
+        def orm(options=()):
+            def run():
+                users = [orm_user_dict(u) for u in db.session.query(User).options(*options).order_by(User.id)]
+                db.session.expunge_all()
+                return users
+            return run
+
+        def list_users(args):
+            def run():
+                reply = service.list_users(db.session, app, args, None)
+                assert reply.status == 200, reply.status
+                return reply.body
+            return run
+
+        def endpoint(query):
+            def run():
+                response = client.get(f"/api/users?{query}", headers=headers)
+                assert response.status_code == 200, response.status_code
+                return response.json
+            return run
+
+        cases = [
+            ("lazy (N+1)", orm()),
+            ("selectinload", orm([selectinload(User.tasks)])),
+            ("service", list_users({"include": "tasks"})),
+            ("endpoint", endpoint("include=tasks")),
+            ("endpoint, tasks_limit=10", endpoint("include=tasks&tasks_limit=10")),
+        ]
+
+        print(f"DB: {database_label()}, {args.users} users x {args.tasks} tasks, best of {args.repeat}")
+        print(f"{'case':<28}{'queries':>9}{'time, ms':>11}")
+        for name, fn in cases:
+            fn()  # прогрів: синхронізація відкликаних токенів, кеш запитів SQLAlchemy
+            _, queries = count_queries(fn)
+            _, seconds = best_of(args.repeat, fn)
+            print(f"{name:<28}{queries:>9}{seconds * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import statistics
+import time
+from app import create_app, db
+
+
+# --- Спільні хелпери для бенчмарків ---
+# Бенчмарки запускаються з каталогу backend як модулі, наприклад:
+#     python -m benchmarks.bench_bulk
+# За замовчуванням використовується SQLite in-memory; щоб міряти на PostgreSQL,
+# задайте DATABASE_URL перед запуском.
+#
+# Бенчмарки навмисно шлють сотні запитів від одного клієнта, тому ліміти частоти (app/admission.py)
+# вимкнено, якщо їх не ввімкнено явно; сервери load_test.py успадковують це середовище.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+def make_app():
+    """Створює застосунок з чистими таблицями і тестовим клієнтом."""
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        from app.models import User, Task
+        db.drop_all()
+        db.create_all()
+    return app, app.test_client()
+
+
+def login(client, username="bench", password="benchpassword"):
+    """Реєструє користувача і повертає заголовки авторизації."""
+    client.post('/api/users/register', json={'username': username, 'password': password})
+    resp = client.post('/api/users/login', json={'username': username, 'password': password})
+    return {'Authorization': f"Bearer {resp.json['access_token']}"}
+
+
+def timed(fn, *args, **kwargs):
+    """Виконує fn і повертає (результат, секунди)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def percentile(samples, pct):
+    """Перцентиль (0..100) зі списку вимірів."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Коротка статистика латентності у мілісекундах."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def database_label():
+    url = os.getenv('DATABASE_URL') or 'sqlite:///:memory:'
+    return url.split(':', 1)[0]
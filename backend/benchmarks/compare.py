@@ -0,0 +1,102 @@
+import argparse
+import json
+import sys
+
+
+# --- Порівняння результатів бенчмарків з базовими (baseline) ---
+# Підтримує два формати JSON:
+#   - pytest-benchmark (--benchmark-json, benchmarks/micro_bench.py): медіана часу кожного бенчмарка;
+#   - підсумок k6 (RESULTS=..., loadtest/*.js): p95 латентності і req/s кожного сценарію.
+# Регресія - зміна в гірший бік більше ніж на --threshold відсотків (час зріс, req/s впали);
+# тоді команда повертає код 1, тож її можна ставити кроком CI. Baseline має бути знятий на тій самій
+# машині: на спільній віртуалці з 1 CPU повторні прогони розходяться до ~25%, звідси поріг за замовчуванням.
+#     python -m benchmarks.compare benchmarks/baselines/micro_sqlite.json benchmarks/results/micro.json
+# --update записує поточний результат як новий baseline (без сирих вимірів pytest-benchmark).
+
+def load_metrics(path):
+    """{назва метрики: (значення, менше_краще)} з файлу результатів."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    if "benchmarks" in data:
+        return {bench["name"]: (bench["stats"]["median"] * 1000, True) for bench in data["benchmarks"]}
+
+    if "rows" in data:
+        metrics = {}
+        for row in data["rows"]:
+            name = row.get("scenario") or row.get("name")
+            metrics[f"{name} p95_ms"] = (row["p95_ms"], True)
+            metrics[f"{name} rps"] = (row["rps"], False)
+        return metrics
+
+    raise ValueError(f"{path}: unknown results format (expected pytest-benchmark or k6 summary JSON)")
+
+
+def compare(baseline, current, threshold):
+    """
+    Рядки порівняння (назва, baseline, current, зміна у %, статус) і чи є регресії.
+    Статус: ok, REGRESSION, improved, new (немає в baseline), missing (немає в поточному прогоні).
+    """
+    rows, regressed = [], False
+    for name in sorted(baseline.keys() | current.keys()):
+        if name not in current:
+            rows.append((name, baseline[name][0], None, None, "missing"))
+            continue
+        if name not in baseline:
+            rows.append((name, None, current[name][0], None, "new"))
+            continue
+
+        (old, lower_is_better), (new, _) = baseline[name], current[name]
+        change = (new - old) / old * 100 if old else 0.0
+        worse = change if lower_is_better else -change
+        if worse > threshold:
+            status, regressed = "REGRESSION", True
+        elif worse < -threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, old, new, change, status))
+    return rows, regressed
+
+
+def save_baseline(current_path, baseline_path):
+    """Копіює результат у baseline; з pytest-benchmark прибирає сирі виміри (stats.data) - лишається статистика."""
+    with open(current_path, encoding="utf-8") as f:
+        data = json.load(f)
+    for bench in data.get("benchmarks", []):
+        bench["stats"].pop("data", None)
+    with open(baseline_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def format_value(value):
+    return "-" if value is None else f"{value:.4g}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Порівнює результати бенчмарків з baseline і позначає регресії")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=25.0, help="допустиме погіршення, %% (за замовчуванням 25)")
+    parser.add_argument("--update", action="store_true", help="після порівняння записати поточний результат як baseline")
+    args = parser.parse_args()
+
+    rows, regressed = compare(load_metrics(args.baseline), load_metrics(args.current), args.threshold)
+
+    width = max([len(row[0]) for row in rows] + [6])
+    print(f"{'metric':<{width}}{'baseline':>14}{'current':>14}{'change':>10}  status")
+    for name, old, new, change, status in rows:
+        change_text = "-" if change is None else f"{change:+.1f}%"
+        print(f"{name:<{width}}{format_value(old):>14}{format_value(new):>14}{change_text:>10}  {status}")
+
+    if args.update:
+        save_baseline(args.current, args.baseline)
+        print(f"\nBaseline updated: {args.baseline}")
+    elif regressed:
+        print(f"\nRegressions beyond {args.threshold:g}% found")
+    sys.exit(1 if regressed and not args.update else 0)
+
+
+if __name__ == "__main__":
+    main()
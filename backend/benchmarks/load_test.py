@@ -0,0 +1,168 @@
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from urllib.parse import urlsplit
+from benchmarks.common import summarize
+
+
+# --- Навантажувальний тест HTTP API ---
+# Без сторонніх залежностей: N потоків, кожен зі своїм keep-alive з'єднанням,
+# протягом заданого часу надсилають запити і рахують req/s та латентність.
+#
+# Проти вже запущеного сервера:
+#     python -m benchmarks.load_test --url http://localhost:5000/api/tasks/public?limit=100
+# Порівняння сервера розробки (python run.py / flask run) і gunicorn на тих самих даних (SQLite-файл):
+#     python -m benchmarks.load_test --compare
+# Латентність sync (gunicorn + gthread) vs async (gunicorn + uvicorn, SERVER_MODE=async) при високій конкурентності:
+#     python -m benchmarks.load_test --compare --modes gunicorn,async --concurrency 256
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_load(url, concurrency, duration, headers=None, method="GET", body=None):
+    """Навантажує url і повертає статистику: req/s, латентність, кількість помилок (з них 503 - rejected)."""
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    deadline = time.perf_counter() + duration
+    latencies, errors, rejected, lock = [], [0], [0], threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        local, local_errors, local_rejected = [], 0, 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 400:
+                    local_errors += 1
+                    local_rejected += resp.status == 503
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+            rejected[0] += local_rejected
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {"rps": round(len(latencies) / elapsed, 1), "errors": errors[0], "rejected": rejected[0],
+            **summarize(latencies)}
+
+
+def seed_sqlite(path, tasks):
+    """Створює SQLite-файл з таблицями і tasks задачами для порівняльного тесту."""
+    env_backup = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        from app import create_app, db
+        from app.models import User, Task
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            user = User(username="loadtest")
+            user.set_password("loadtest")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all([Task(title=f"Задача {i}", owner_id=user.id) for i in range(tasks)])
+            db.session.commit()
+    finally:
+        if env_backup is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = env_backup
+
+
+def wait_until_ready(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/health/full", timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.3)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+def spawn_server(mode, port, env):
+    if mode == "dev":
+        cmd = [sys.executable, "-m", "flask", "--app", "run", "run", "--host", "127.0.0.1", "--port", str(port)]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"]
+        env = {**env, "GUNICORN_BIND": f"127.0.0.1:{port}", "GUNICORN_ACCESSLOG": "/dev/null",
+               "SERVER_MODE": "async" if mode == "async" else "sync"}
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def compare(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "loadtest.db")
+        seed_sqlite(db_path, args.tasks)
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}"}
+        env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+        results = {}
+        for mode in args.modes:
+            server_env = dict(env)
+            if mode != "dev":
+                server_env["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(tmp, "prometheus")
+            proc = spawn_server(mode, args.port, server_env)
+            try:
+                base_url = f"http://127.0.0.1:{args.port}"
+                wait_until_ready(base_url)
+                results[mode] = run_load(base_url + args.path, args.concurrency, args.duration)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    print(f"{'server':<10}{'req/s':>10}{'p50, ms':>10}{'p99, ms':>10}{'errors':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['rps']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}")
+    base, *others = args.modes
+    for mode in others:
+        print(f"{mode} / {base}: {results[mode]['rps'] / max(results[base]['rps'], 0.1):.1f}x req/s, "
+              f"p99 {results[mode]['p99_ms'] / max(results[base]['p99_ms'], 0.001):.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Навантажувальний тест HTTP API")
+    parser.add_argument("--url", help="повна адреса для навантаження (сервер вже запущено)")
+    parser.add_argument("--compare", action="store_true", help="порівняти режими сервера (див. --modes)")
+    parser.add_argument("--modes", default="dev,gunicorn", type=lambda v: v.split(","),
+                        help="режими для --compare через кому: dev, gunicorn (sync), async")
+    parser.add_argument("--path", default="/api/tasks/public?limit=100", help="шлях для --compare")
+    parser.add_argument("--port", type=int, default=5055, help="порт для серверів у --compare")
+    parser.add_argument("--tasks", type=int, default=1000, help="скільки задач засіяти для --compare")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на один прогін")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args)
+    elif args.url:
+        print(run_load(args.url, args.concurrency, args.duration))
+    else:
+        parser.error("вкажіть --url або --compare")
+
+
+if __name__ == "__main__":
+    main()
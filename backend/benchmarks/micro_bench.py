@@ -0,0 +1,85 @@
+import os
+import pytest
+from app import create_app, db
+from app.models import Task
+from app.services.tasks import validate_task_data
+from benchmarks.seed import SEED_PASSWORD, seed_users_and_tasks
+
+pytest.importorskip("pytest_benchmark")
+
+
+# --- Мікробенчмарки (pytest-benchmark) ---
+# Не входять у звичайний прогін тестів (ім'я файлу не test_*.py), запускаються явно:
+#     python -m pytest benchmarks/micro_bench.py --benchmark-json=benchmarks/results/micro.json
+#     python -m benchmarks.compare benchmarks/baselines/micro_sqlite.json benchmarks/results/micro.json
+# Дані: BENCH_USERS користувачів і BENCH_TASKS задач (benchmarks/seed.py) у SQLite in-memory
+# або в DATABASE_URL. Запити списків - без If-None-Match, тобто повна відповідь щоразу.
+
+USERS = int(os.getenv("BENCH_USERS", 100))
+TASKS = int(os.getenv("BENCH_TASKS", 10000))
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['SQL_SLOW_QUERY_MS'] = -1
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed_users_and_tasks(USERS, TASKS)
+    app.extensions['jwt_auth'].revocations.sync_interval = float('inf')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(scope="module")
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope="module")
+def headers(client):
+    response = client.post('/api/users/login', json={'username': 'bench_user_0', 'password': SEED_PASSWORD})
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+
+def get_ok(client, url, headers=None):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.status_code
+    return response
+
+
+def test_task_to_dict(benchmark):
+    task = Task(id=1, title="Задача", description="Опис задачі", owner_id=1, status="невиконана")
+    benchmark(task.to_dict)
+
+
+def test_validate_task_data(benchmark):
+    data = {"title": "Задача", "description": "Опис задачі", "owner_id": 1, "status": "невиконана"}
+    assert benchmark(validate_task_data, data)[0]
+
+
+def test_validate_task_data_for_update(benchmark):
+    assert benchmark(validate_task_data, {"status": "виконана"}, require_all_fields=False)[0]
+
+
+@pytest.mark.parametrize("url", [
+    "/api/tasks/public?limit=100",
+    "/api/tasks/public?limit=500&status=виконана",
+    "/api/tasks/stats",
+], ids=["tasks_public", "tasks_public_filtered", "tasks_stats"])
+def test_public_endpoints(benchmark, client, url):
+    benchmark(get_ok, client, url)
+
+
+@pytest.mark.parametrize("url", [
+    "/api/tasks?limit=100",
+    "/api/tasks?owner_id=me&limit=100",
+    "/api/users",
+    "/api/users?include=tasks&tasks_limit=10",
+], ids=["tasks", "tasks_own", "users", "users_with_tasks"])
+def test_authorized_endpoints(benchmark, client, headers, url):
+    benchmark(get_ok, client, url, headers)
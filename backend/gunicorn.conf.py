@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+import shutil
+
+
+# --- Продакшн-конфігурація gunicorn ---
+# Запуск: gunicorn -c gunicorn.conf.py
+# Усі параметри можна перевизначити змінними середовища.
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+# Адреса та порт (як і в run.py)
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Воркери: класична формула 2 * CPU + 1. Кожен воркер - окремий процес з власним пулом з'єднань до БД,
+# тому при збільшенні кількості воркерів варто стежити за max_connections у PostgreSQL.
+workers = _env_int("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+# Застосунок ділить на кількість воркерів ліміти частоти з відрами в пам'яті (app/admission.py)
+os.environ["GUNICORN_WORKERS"] = str(workers)
+
+# Режим сервера (SERVER_MODE):
+#   - sync  - Flask (WSGI, run:app); gthread: потоки всередині воркера обслуговують запити, поки інші чекають на БД;
+#   - async - Starlette + SQLAlchemy asyncio (ASGI, asgi:app) на воркерах uvicorn: один цикл подій на воркер.
+_server_mode = os.getenv("SERVER_MODE", "sync")
+if _server_mode == "async":
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "run:app"
+    worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+# Потоки gthread: половина за замовчуванням - під SSE-стріми (TASK_EVENTS_MAX_STREAMS), решта - під запити
+threads = _env_int("GUNICORN_THREADS", 8)
+os.environ["GUNICORN_THREADS"] = str(threads)
+
+# preload: застосунок імпортується один раз у master-процесі, а воркери отримують його через fork
+# (copy-on-write) - швидший старт і менше пам'яті. З'єднання з БД після fork відкриваються заново (post_fork).
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Keep-alive для з'єднань від nginx (пул keepalive в upstream backend, nginx.conf). Має бути довшим
+# за keepalive_timeout в nginx (60 с): з'єднання закриває nginx, а не бекенд посеред нового запиту.
+# Таймаути роботи й плавної зупинки воркера
+keepalive = _env_int("GUNICORN_KEEPALIVE", 75)
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+
+# Періодичний перезапуск воркерів захищає від поступового росту пам'яті
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 10000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 1000)
+
+# Логи у stdout/stderr - їх забирає Filebeat з Docker
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+
+# --- Prometheus у multiprocess-режимі ---
+# Кожен воркер пише метрики у файли в PROMETHEUS_MULTIPROC_DIR, а /metrics агрегує їх по всіх процесах.
+# Змінна має бути задана до імпорту prometheus_client, тобто до завантаження застосунку.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+_multiproc_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+shutil.rmtree(_multiproc_dir, ignore_errors=True)  # прибираємо файли метрик від попереднього запуску
+os.makedirs(_multiproc_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    """Після fork воркер не має використовувати з'єднання з пулу master-процесу."""
+    from app import db
+    app = server.app.wsgi()
+    # У режимі async це Starlette-застосунок, Flask-застосунок (sync engine) - у app.state
+    if _server_mode == "async":
+        app = app.state.flask_app
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    """Прибираємо live-метрики воркера, що завершився."""
+    from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+    GunicornInternalPrometheusMetrics.mark_process_dead_on_child_exit(worker.pid)
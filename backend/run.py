@@ -1,9 +1,27 @@
-from app import create_app
+import os
+from app import create_app, db
+from app.database import track_pool_metrics
+from app.task_stats import TaskStatsCollector
 from prometheus_flask_exporter import PrometheusMetrics
 
 
 app = create_app()
-metrics = PrometheusMetrics(app)
+
+# Під gunicorn (gunicorn.conf.py) метрики збираються з усіх воркерів через multiprocess-режим
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+    metrics = GunicornInternalPrometheusMetrics(app)
+else:
+    metrics = PrometheusMetrics(app)
+
+# Кількість задач за статусом і власником (tasks_by_status, tasks_by_owner) - читається під час scrape
+metrics.registry.register(TaskStatsCollector(app))
+
+# Метрики пулу з'єднань до БД (db_pool_*)
+with app.app_context():
+    track_pool_metrics(db.engine)
 
 if __name__ == '__main__':
+    # Сервер розробки Werkzeug - лише для локальної роботи.
+    # У Docker бекенд запускається через gunicorn: gunicorn -c gunicorn.conf.py (див. SERVER_MODE)
     app.run(host='0.0.0.0', port=5000)
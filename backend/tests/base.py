@@ -0,0 +1,151 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+from sqlalchemy import event
+from app import create_app, db
+
+
+class ApiTestCase(unittest.TestCase):
+    """Базовий клас для тестів API: застосунок на SQLite in-memory і хелпери авторизації."""
+
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            from app.models import User, Task
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def register_and_login(self, username='testuser', password='testpassword'):
+        """Реєструє користувача і повертає заголовки з JWT токеном."""
+        self.client.post('/api/users/register', json={'username': username, 'password': password})
+        login_resp = self.client.post('/api/users/login', json={'username': username, 'password': password})
+        self.assertEqual(login_resp.status_code, 200)
+        return {'Authorization': f"Bearer {login_resp.json['access_token']}"}
+
+    def query_engine(self):
+        """Engine, через який обслуговуються запити API."""
+        with self.app.app_context():
+            return db.engine
+
+    @contextmanager
+    def count_queries(self):
+        """Збирає SQL-запити, виконані всередині блоку: with self.count_queries() as queries: ..."""
+        queries = []
+
+        def listener(conn, cursor, statement, *args):
+            queries.append(statement)
+
+        engine = self.query_engine()
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            yield queries
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+    def seed_tasks(self, count, owner_id=1, **fields):
+        """Швидко додає count задач напряму в БД (власника створює, якщо його ще немає - FOREIGN KEY)."""
+        from app.models import Task, User
+        with self.app.app_context():
+            if db.session.get(User, owner_id) is None:
+                db.session.add(User(id=owner_id, username=f"owner{owner_id}", password="-"))
+            db.session.add_all([
+                Task(title=f"Задача {i}", description=f"Опис {i}", owner_id=owner_id,
+                     status=fields.get('status', "невиконана"))
+                for i in range(1, count + 1)
+            ])
+            db.session.commit()
+
+
+class AsgiResponse:
+    """Відповідь ASGI-застосунку з інтерфейсом відповіді Flask test client (json, get_data, mimetype...)."""
+
+    def __init__(self, response, raw):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.mimetype = response.headers.get('content-type', '').split(';')[0]
+        self.is_streamed = 'content-length' not in response.headers
+        self._raw = raw
+
+    @property
+    def json(self):
+        if self.mimetype != 'application/json' or not self._raw:
+            return None
+        return json.loads(self._raw)
+
+    def get_data(self, as_text=False):
+        return self._raw.decode() if as_text else self._raw
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class AsgiTestClient:
+    """Клієнт для ASGI-застосунку з тим самим API, що й app.test_client()."""
+
+    def __init__(self, app):
+        from starlette.testclient import TestClient
+        self._client = TestClient(app, base_url='http://localhost')
+        del self._client.headers['accept-encoding']  # Flask test client його не надсилає
+        self._client.__enter__()  # lifespan застосунку
+
+    def open(self, method, url, json=None, headers=None):
+        # Тіло читається без розпакування gzip - як у Flask test client
+        with self._client.stream(method, url, json=json, headers=headers) as response:
+            raw = b''.join(response.iter_raw())
+        return AsgiResponse(response, raw)
+
+    def get(self, url, **kwargs):
+        return self.open('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.open('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.open('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.open('DELETE', url, **kwargs)
+
+    def close(self):
+        self._client.__exit__(None, None, None)
+
+
+class AsyncModeMixin:
+    """
+    Запускає тести API проти ASGI-режиму (app/asgi) замість Flask.
+    Обидва застосунки працюють з одним файлом SQLite: Flask-частина тесту
+    створює таблиці й наповнює дані, запити йдуть в async-застосунок.
+    """
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._env = mock.patch.dict(os.environ, {'DATABASE_URL': f'sqlite:///{self.db_path}'})
+        self._env.start()
+        super().setUp()
+
+        from app.asgi import create_asgi_app
+        self.asgi_app = create_asgi_app(self.app)
+        self.client = AsgiTestClient(self.asgi_app)
+
+    def query_engine(self):
+        return self.asgi_app.state.engine.sync_engine
+
+    def tearDown(self):
+        self.client.close()
+        super().tearDown()
+        self._env.stop()
+        os.remove(self.db_path)
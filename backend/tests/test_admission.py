@@ -0,0 +1,118 @@
+import asyncio
+import ipaddress
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from app.admission import (
+    AdmissionControl, AdmissionMiddleware, LoadShedder, LocalRateLimitBackend, RedisRateLimitBackend,
+    parse_rate, parse_trusted_proxies, per_worker,
+)
+from app.database import RecentPoolWait
+
+
+class ParseRateTests(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_rate("120/minute"), (120, 2.0))
+        self.assertEqual(parse_rate(" 5/second "), (5, 5.0))
+        self.assertIsNone(parse_rate(""))
+        self.assertIsNone(parse_rate("0"))
+        with self.assertRaises(ValueError):
+            parse_rate("10/day")
+
+
+class ClientIpTests(unittest.TestCase):
+    def admission(self, trusted):
+        return AdmissionControl({}, LocalRateLimitBackend(), LoadShedder(), "X-Real-IP", parse_trusted_proxies(trusted))
+
+    def test_header_trusted_only_from_proxies(self):
+        admission = self.admission("127.0.0.1, 172.16.0.0/12")
+        headers = {"X-Real-IP": "203.0.113.7"}
+        self.assertEqual(admission.client_ip(headers, "172.18.0.5"), "203.0.113.7")
+        # клієнт, що звертається до бекенда напряму, не може підставити собі інший IP
+        self.assertEqual(admission.client_ip(headers, "198.51.100.1"), "198.51.100.1")
+        self.assertEqual(admission.client_ip({}, "172.18.0.5"), "172.18.0.5")
+
+    def test_trusted_proxies_formats(self):
+        self.assertIsNone(parse_trusted_proxies("*"))
+        self.assertEqual(parse_trusted_proxies(""), ())
+        self.assertEqual(parse_trusted_proxies("::1,10.0.0.0/8"),
+                         (ipaddress.ip_network("::1"), ipaddress.ip_network("10.0.0.0/8")))
+        self.assertEqual(self.admission("*").client_ip({"X-Real-IP": "a"}, "testclient"), "a")
+        with self.assertRaises(ValueError):
+            parse_trusted_proxies("nginx")
+
+    def test_local_limits_split_between_workers(self):
+        self.assertEqual(per_worker((120, 2.0), 4), (30, 0.5))
+        self.assertEqual(per_worker((3, 0.05), 5), (1, 0.01))
+        self.assertEqual(per_worker((120, 2.0), 1), (120, 2.0))
+        self.assertIsNone(per_worker(None, 4))
+
+
+class LocalRateLimitBackendTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.backend = LocalRateLimitBackend(max_keys=2, clock=lambda: self.now)
+
+    def test_burst_then_refill(self):
+        capacity, rate = parse_rate("3/minute")
+        self.assertEqual([self.backend.take("k", capacity, rate) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(self.backend.take("k", capacity, rate), 20)
+
+        self.now = 15
+        self.assertAlmostEqual(self.backend.take("k", capacity, rate), 5)  # 3/4 токена - ще замало
+        self.now = 20
+        self.assertEqual(self.backend.take("k", capacity, rate), 0)
+
+    def test_least_recently_used_bucket_evicted(self):
+        for key in ("a", "b"):
+            self.backend.take(key, 1, 1.0)
+        self.backend.take("c", 1, 1.0)  # "a" відкинуто - його відро знову повне
+        self.assertEqual(self.backend.take("a", 1, 1.0), 0)
+        self.assertGreater(self.backend.take("c", 1, 1.0), 0)
+
+
+class RedisRateLimitBackendTests(unittest.TestCase):
+    def test_allows_requests_when_redis_unavailable(self):
+        client = mock.Mock()
+        client.register_script.return_value = mock.Mock(side_effect=ConnectionError("redis is down"))
+        backend = RedisRateLimitBackend(client)
+        with self.assertLogs("app.admission", level="WARNING"):
+            self.assertEqual(backend.take("k", 1, 1.0), 0)
+
+
+class AdmissionMiddlewareTests(unittest.TestCase):
+    def test_blocking_backend_called_outside_event_loop(self):
+        threads = []
+
+        class Backend:
+            blocking = True
+
+            def take(self, key, capacity, rate):
+                threads.append(threading.get_ident())
+                return 0.0
+
+        admission = AdmissionControl({"tasks": {"ip": (10, 1.0)}}, Backend(), LoadShedder(), "X-Real-IP")
+        served = []
+
+        async def app(scope, receive, send):
+            served.append(threading.get_ident())
+
+        middleware = AdmissionMiddleware(app, SimpleNamespace(extensions={"admission": admission}))
+        scope = {"type": "http", "method": "GET", "path": "/api/tasks/public", "headers": [],
+                 "client": ("127.0.0.1", 50000)}
+        asyncio.run(middleware(scope, None, None))
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads, served)  # відро - у пулі потоків, маршрут - у циклі подій
+
+
+class RecentPoolWaitTests(unittest.TestCase):
+    def test_forgets_old_samples(self):
+        tracker = RecentPoolWait(window=1.0)
+        with mock.patch("app.database.time.monotonic", return_value=10.2):
+            tracker.record(0.8)
+            tracker.record(0.3)
+        with mock.patch("app.database.time.monotonic", return_value=11.5):
+            self.assertEqual(tracker.value(), 0.8)
+        with mock.patch("app.database.time.monotonic", return_value=12.1):
+            self.assertEqual(tracker.value(), 0)
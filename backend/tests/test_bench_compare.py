@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+import unittest
+from benchmarks.compare import compare, load_metrics, save_baseline
+
+
+class CompareTests(unittest.TestCase):
+    """Порівняння результатів бенчмарків з baseline"""
+
+    def write(self, data):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_pytest_benchmark_median_in_ms(self):
+        path = self.write({"benchmarks": [{"name": "test_a", "stats": {"median": 0.002, "data": [0.002]}}]})
+        self.assertEqual(load_metrics(path), {"test_a": (2.0, True)})
+
+    def test_k6_rows_latency_and_throughput(self):
+        path = self.write({"rows": [{"name": "list", "p95_ms": 12.5, "rps": 300}]})
+        self.assertEqual(load_metrics(path), {"list p95_ms": (12.5, True), "list rps": (300, False)})
+
+    def test_regression_beyond_threshold(self):
+        baseline = {"time": (10.0, True), "rps": (100.0, False), "gone": (1.0, True)}
+        current = {"time": (13.0, True), "rps": (95.0, False), "added": (1.0, True)}
+        rows, regressed = compare(baseline, current, threshold=20)
+        self.assertTrue(regressed)
+        self.assertEqual({row[0]: row[4] for row in rows},
+                         {"time": "REGRESSION", "rps": "ok", "gone": "missing", "added": "new"})
+
+    def test_faster_is_not_regression(self):
+        rows, regressed = compare({"time": (10.0, True)}, {"time": (5.0, True)}, threshold=20)
+        self.assertFalse(regressed)
+        self.assertEqual(rows[0][4], "improved")
+
+    def test_baseline_drops_raw_samples(self):
+        current = self.write({"benchmarks": [{"name": "test_a", "stats": {"median": 0.002, "data": [0.002] * 100}}]})
+        baseline = self.write({})
+        save_baseline(current, baseline)
+        with open(baseline, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["benchmarks"][0]["stats"], {"median": 0.002})
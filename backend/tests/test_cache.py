@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+from prometheus_client import REGISTRY
+from app.asgi.common import call_backend
+from app.cache import LocalCacheBackend, RedisCacheBackend
+
+
+class FakeRedis:
+    """Мінімальна заміна redis.Redis для тестів: get/set з ex/delete/scan_iter."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def scan_iter(self, match="*"):
+        prefix = match.rstrip("*")
+        return [key for key in list(self.data) if key.startswith(prefix)]
+
+
+class LocalCacheBackendTests(unittest.TestCase):
+
+    def test_lru_eviction_counts_evictions(self):
+        cache = LocalCacheBackend(max_entries=2)
+        before = REGISTRY.get_sample_value('cache_evictions_total', {'model': 'task'}) or 0
+
+        cache.set('task:1', {'id': 1}, ttl=60)
+        cache.set('task:2', {'id': 2}, ttl=60)
+        cache.get('task:1')  # task:1 стає "свіжішим" за task:2
+        cache.set('task:3', {'id': 3}, ttl=60)
+
+        self.assertEqual(cache.get('task:1'), {'id': 1})
+        self.assertIsNone(cache.get('task:2'))
+        self.assertEqual(REGISTRY.get_sample_value('cache_evictions_total', {'model': 'task'}), before + 1)
+
+    def test_ttl_expiry(self):
+        cache = LocalCacheBackend()
+        with mock.patch('app.cache.time.monotonic', return_value=100.0):
+            cache.set('user:1', {'id': 1}, ttl=5)
+        with mock.patch('app.cache.time.monotonic', return_value=104.0):
+            self.assertEqual(cache.get('user:1'), {'id': 1})
+        with mock.patch('app.cache.time.monotonic', return_value=105.0):
+            self.assertIsNone(cache.get('user:1'))
+
+
+class RedisCacheBackendTests(unittest.TestCase):
+
+    def test_roundtrip_and_delete(self):
+        cache = RedisCacheBackend(FakeRedis())
+        cache.set('task:1', {'id': 1, 'status': 'невиконана'}, ttl=30)
+        self.assertEqual(cache.get('task:1'), {'id': 1, 'status': 'невиконана'})
+        cache.delete('task:1')
+        self.assertIsNone(cache.get('task:1'))
+
+
+class CallBackendTests(unittest.TestCase):
+    """ASGI-режим: мережеві бекенди викликаються поза потоком циклу подій"""
+
+    def thread_of(self, backend):
+        async def call():
+            loop_thread = threading.get_ident()
+            return loop_thread, await call_backend(backend, threading.get_ident)
+        return asyncio.run(call())
+
+    def test_redis_backend_runs_in_threadpool(self):
+        loop_thread, called_in = self.thread_of(RedisCacheBackend(FakeRedis()))
+        self.assertNotEqual(called_in, loop_thread)
+
+    def test_local_backend_is_called_directly(self):
+        loop_thread, called_in = self.thread_of(LocalCacheBackend())
+        self.assertEqual(called_in, loop_thread)
+
+
+if __name__ == "__main__":
+    unittest.main()
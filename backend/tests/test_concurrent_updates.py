@@ -0,0 +1,62 @@
+import os
+import tempfile
+import threading
+from unittest import mock
+from tests.base import ApiTestCase
+
+
+class ConcurrentUpdateTests(ApiTestCase):
+    """
+    Багато потоків одночасно збільшують лічильник у назві однієї задачі (прочитати -> +1 -> PUT з If-Match,
+    при 409 - повтор з даними з відповіді). Жодне збільшення не має загубитися.
+    Файл SQLite замість in-memory: кожен потік працює через власне з'єднання.
+    """
+
+    THREADS = 8
+    INCREMENTS = 25
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        # Один клієнт навмисно робить сотні запитів за секунди - ліміт частоти тут не перевіряється
+        self._env = mock.patch.dict(os.environ, {'DATABASE_URL': f'sqlite:///{self.db_path}',
+                                                 'RATE_LIMIT_ENABLED': 'false'})
+        self._env.start()
+        super().setUp()
+        self.headers = self.register_and_login()
+        self.client.post('/api/tasks', json={'title': '0', 'owner_id': 1}, headers=self.headers)
+
+    def tearDown(self):
+        super().tearDown()
+        self._env.stop()
+        os.remove(self.db_path)
+
+    def increment(self, conflicts, errors):
+        client = self.app.test_client()
+        task = client.get('/api/tasks/1', headers=self.headers).json
+        done = 0
+        while done < self.INCREMENTS:
+            response = client.put('/api/tasks/1', json={'title': str(int(task['title']) + 1)},
+                                  headers={**self.headers, 'If-Match': f'"{task["version"]}"'})
+            if response.status_code == 200:
+                task, done = response.json, done + 1
+            elif response.status_code == 409:
+                task = response.json['task']
+                conflicts.append(1)
+            else:
+                errors.append(response.get_data(as_text=True))
+                return
+
+    def test_no_lost_updates(self):
+        conflicts, errors = [], []
+        threads = [threading.Thread(target=self.increment, args=(conflicts, errors)) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        task = self.client.get('/api/tasks/1', headers=self.headers).json
+        total = self.THREADS * self.INCREMENTS
+        self.assertEqual(task['title'], str(total))
+        self.assertEqual(task['version'], total + 1)
@@ -0,0 +1,54 @@
+import threading
+import time
+import unittest
+from app.events import Event, EventBuffer, EventGaps, format_sse
+
+
+class EventBufferTests(unittest.TestCase):
+    """Кільцевий буфер подій для SSE"""
+
+    def test_read_after_id_and_eviction(self):
+        buffer = EventBuffer(size=2)
+        buffer.append([Event(1, "a"), Event(2, "b"), Event(3, "c")])
+
+        self.assertEqual(buffer.read(1, timeout=0), ([Event(2, "b"), Event(3, "c")], False))
+        self.assertEqual(buffer.read(2, timeout=0), ([Event(3, "c")], False))
+        # Подія 1 витіснена: продовжити з id 0 неможливо
+        self.assertEqual(buffer.read(0, timeout=0), ([], True))
+        # id з майбутнього (наприклад, з іншого запуску процесу) теж вимагає reset
+        self.assertEqual(buffer.read(10, timeout=0), ([], True))
+
+    def test_read_waits_for_new_events(self):
+        buffer = EventBuffer(size=10)
+        timer = threading.Timer(0.05, buffer.append, args=([Event(1, "a")],))
+        timer.start()
+
+        started = time.monotonic()
+        events, reset = buffer.read(0, timeout=5)
+        self.assertEqual((events, reset), ([Event(1, "a")], False))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_gap_holds_later_events_until_commit(self):
+        gaps = EventGaps()
+        # Подія 2 ще в незавершеній транзакції (xid 100), подію 3 вже видно
+        self.assertEqual(gaps.ready(1, [Event(3, "c")], xmin=100, xmax=105), [])
+        self.assertEqual(gaps.ready(1, [Event(3, "c")], xmin=100, xmax=106), [])
+        self.assertEqual(gaps.ready(1, [Event(2, "b"), Event(3, "c")], xmin=103, xmax=107),
+                         [Event(2, "b"), Event(3, "c")])
+
+    def test_gap_is_skipped_after_rollback(self):
+        gaps = EventGaps()
+        self.assertEqual(gaps.ready(1, [Event(3, "c")], xmin=100, xmax=105), [])
+        # Усі транзакції, що виконувались тоді, завершились, а події 2 немає - її відкочено
+        self.assertEqual(gaps.ready(1, [Event(3, "c"), Event(4, "d")], xmin=105, xmax=110),
+                         [Event(3, "c"), Event(4, "d")])
+        self.assertEqual(gaps.ready(4, [Event(5, "e")], xmin=110, xmax=110), [Event(5, "e")])
+
+    def test_format_sse(self):
+        self.assertEqual(format_sse('{"op":"deleted"}', event="task", id=7),
+                         b'id: 7\nevent: task\ndata: {"op":"deleted"}\n\n')
+        self.assertEqual(format_sse(id=5, retry=3000), b"retry: 3000\nid: 5\n\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from app.cache import LocalCacheBackend
+from app.idempotency import (
+    DatabaseIdempotencyBackend, Idempotency, IdempotencyStore, RedisIdempotencyBackend, decode_record, encode_record,
+)
+from app.models import IdempotencyKey
+
+
+class FakeRedis:
+    """Мінімальна заміна redis.Redis: get/set з nx і px/delete."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+
+class IdempotencyStoreTests(unittest.TestCase):
+
+    def make_store(self, backend):
+        return IdempotencyStore(backend, "secret", ttl=60, lock_seconds=30)
+
+    def check_lifecycle(self, store):
+        fingerprint = store.fingerprint("POST", "/api/tasks", {"title": "a", "owner_id": 1})
+        self.assertEqual(store.claim("k", fingerprint), ("run", None))
+        self.assertEqual(store.claim("k", fingerprint), ("pending", None))
+        self.assertEqual(store.claim("k", "other")[0], "mismatch")
+
+        self.assertTrue(store.complete("k", fingerprint, 201, b'{"id": 1}', {"Location": "/x", "ETag": "y"}))
+        outcome, record = store.claim("k", fingerprint)
+        self.assertEqual(outcome, "replay")
+        self.assertEqual((record["status"], record["body"], record["headers"]), (201, b'{"id": 1}', {"Location": "/x"}))
+
+    def test_lifecycle_local(self):
+        self.check_lifecycle(self.make_store(LocalCacheBackend()))
+
+    def test_lifecycle_redis(self):
+        self.check_lifecycle(self.make_store(RedisIdempotencyBackend(FakeRedis())))
+
+    def database_backend(self, engine=None, clock=None):
+        if engine is None:
+            engine = create_engine("sqlite://", poolclass=StaticPool)
+            IdempotencyKey.__table__.create(engine)
+        return DatabaseIdempotencyBackend(engine, IdempotencyKey.__table__, **({"clock": clock} if clock else {}))
+
+    def test_lifecycle_database(self):
+        self.check_lifecycle(self.make_store(self.database_backend()))
+
+    def test_database_keys_shared_between_workers(self):
+        first = self.make_store(self.database_backend())
+        second = self.make_store(self.database_backend(first.backend.engine))  # інший воркер, та сама БД
+        self.assertEqual(first.claim("k", "fp"), ("run", None))
+        self.assertEqual(second.claim("k", "fp"), ("pending", None))
+        first.complete("k", "fp", 201, b"{}", {})
+        self.assertEqual(second.claim("k", "fp")[0], "replay")
+
+    def test_database_abandoned_claim_expires(self):
+        now = [100.0]
+        store = self.make_store(self.database_backend(clock=lambda: now[0]))
+        store.claim("k", "fp")
+        now[0] = 131.0
+        self.assertEqual(store.claim("k", "fp"), ("run", None))
+        store.complete("k", "fp", 201, b"{}", {})
+        now[0] = 131.0 + 61  # TTL відповіді минув - ключ знову вільний, старий рядок прибрано
+        self.assertEqual(store.claim("k", "other"), ("run", None))
+
+    def test_local_backend_refused_with_several_workers(self):
+        app = mock.Mock(config={'IDEMPOTENCY_BACKEND': 'local', 'GUNICORN_WORKERS': 4})
+        with self.assertRaises(ValueError):
+            Idempotency().init_app(app)
+
+    def test_server_error_releases_key(self):
+        store = self.make_store(LocalCacheBackend())
+        store.claim("k", "fp")
+        self.assertFalse(store.complete("k", "fp", 500, b'{"error": "db"}', {}))
+        self.assertEqual(store.claim("k", "fp"), ("run", None))
+
+    def test_abandoned_claim_expires(self):
+        store = self.make_store(LocalCacheBackend())
+        with mock.patch("app.cache.time.monotonic", return_value=100.0):
+            store.claim("k", "fp")
+        with mock.patch("app.cache.time.monotonic", return_value=131.0):  # воркер зупинився, lock_seconds минув
+            self.assertEqual(store.claim("k", "fp"), ("run", None))
+
+    def test_fingerprint_ignores_json_key_order(self):
+        store = self.make_store(LocalCacheBackend())
+        fingerprint = store.fingerprint("POST", "/api/users/register", {"username": "u", "password": "p"})
+        self.assertEqual(fingerprint, store.fingerprint("POST", "/api/users/register", {"password": "p", "username": "u"}))
+        self.assertNotEqual(fingerprint, store.fingerprint("POST", "/api/tasks", {"password": "p", "username": "u"}))
+        self.assertEqual(decode_record(encode_record(fingerprint))["status"], None)
@@ -0,0 +1,117 @@
+import json
+import threading
+from datetime import timedelta
+from app import db
+from app.jobs import JOB_HANDLERS, claim_job, cleanup_jobs, job_handler, new_job, run_job, utcnow, work
+from app.models import Job
+from tests.base import ApiTestCase
+
+# Подія зупинки воркера для test_graceful_stop_requeues_after_batch
+STOP = threading.Event()
+
+
+@job_handler("test_count")
+def count_to(payload, progress, batch_size):
+    """Тестовий обробник: "пачки" - кроки лічильника до payload["to"]; stop_at - встановити подію зупинки."""
+    done = (progress or {}).get("done", 0)
+    while done < payload["to"]:
+        done += 1
+        if payload.get("fail_at") == done:
+            raise ValueError("boom")
+        if done == payload.get("stop_at"):
+            STOP.set()
+        yield {"done": done}
+
+
+class JobQueueTests(ApiTestCase):
+    """Черга фонових задач: забирання, відновлення після зупинки воркера, помилки, прибирання"""
+
+    def setUp(self):
+        super().setUp()
+        STOP.clear()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        self.ctx.pop()
+        super().tearDown()
+
+    def add_job(self, payload, **fields):
+        job = new_job("test_count", payload)
+        for name, value in fields.items():
+            setattr(job, name, value)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+    def job(self, job_id):
+        db.session.expire_all()
+        return db.session.get(Job, job_id)
+
+    def test_claims_oldest_queued_job_once(self):
+        self.assertIsNone(claim_job(self.app.config))
+        first, second = self.add_job({"to": 1}), self.add_job({"to": 1})
+
+        self.assertEqual(claim_job(self.app.config), first)
+        self.assertEqual((self.job(first).status, self.job(first).attempts), ("running", 1))
+        self.assertEqual(claim_job(self.app.config), second)
+        self.assertIsNone(claim_job(self.app.config))
+
+    def test_runs_to_completion_with_progress(self):
+        job_id = self.add_job({"to": 3})
+        work(self.app, once=True)
+        job = self.job(job_id)
+        self.assertEqual(job.status, "done")
+        self.assertEqual(json.loads(job.result), {"done": 3})
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failure_is_recorded(self):
+        job_id = self.add_job({"to": 3, "fail_at": 2})
+        work(self.app, once=True)
+        job = self.job(job_id)
+        self.assertEqual((job.status, job.error), ("failed", "boom"))
+        self.assertEqual(json.loads(job.result), {"done": 1})  # перша пачка встигла закомітитися
+
+    def test_stale_job_resumes_from_progress(self):
+        stale = utcnow() - timedelta(seconds=self.app.config['JOBS_TIMEOUT_SECONDS'] + 1)
+        job_id = self.add_job({"to": 5}, status="running", attempts=1, heartbeat_at=stale,
+                              result=json.dumps({"done": 3}))
+        fresh = self.add_job({"to": 1}, status="running", attempts=1, heartbeat_at=utcnow())
+
+        work(self.app, once=True)
+        self.assertEqual(self.job(job_id).status, "done")
+        self.assertEqual(self.job(job_id).attempts, 2)
+        self.assertEqual(self.job(fresh).status, "running")  # воркер ще працює - не чіпаємо
+
+    def test_graceful_stop_requeues_after_batch(self):
+        job_id = self.add_job({"to": 5, "stop_at": 2})
+        work(self.app, stop=STOP)
+        job = self.job(job_id)
+        self.assertEqual((job.status, job.attempts), ("queued", 0))
+        self.assertEqual(json.loads(job.result), {"done": 2})
+
+        STOP.clear()
+        job_id_again = claim_job(self.app.config)
+        run_job(self.app.config, job_id_again)
+        self.assertEqual(json.loads(self.job(job_id).result), {"done": 5})
+
+    def test_cleanup_fails_abandoned_and_drops_expired_jobs(self):
+        config = self.app.config
+        stale = utcnow() - timedelta(seconds=config['JOBS_TIMEOUT_SECONDS'] + 1)
+        abandoned = self.add_job({"to": 1}, status="running", attempts=config['JOBS_MAX_ATTEMPTS'],
+                                 heartbeat_at=stale)
+        expired = self.add_job({"to": 1}, status="done",
+                               finished_at=utcnow() - timedelta(seconds=config['JOBS_RETENTION_SECONDS'] + 1))
+
+        self.assertIsNone(claim_job(config))
+        cleanup_jobs(config)
+        self.assertEqual(self.job(abandoned).status, "failed")
+        self.assertIsNone(self.job(expired))
+
+    def test_unknown_kind_fails(self):
+        job = new_job("no_such_kind", {})
+        db.session.add(job)
+        db.session.commit()
+        self.assertNotIn("no_such_kind", JOB_HANDLERS)
+        work(self.app, once=True)
+        self.assertEqual(self.job(job.id).status, "failed")
@@ -0,0 +1,57 @@
+import datetime
+import decimal
+import unittest
+import uuid
+from flask import Flask
+from app.json_provider import OrjsonProvider, StdlibJSONProvider, json_provider_class
+
+
+class OrjsonProviderTests(unittest.TestCase):
+    """orjson дає ті самі байти, що й стандартний провайдер Flask"""
+
+    def setUp(self):
+        app = Flask(__name__)
+        self.fast = OrjsonProvider(app)
+        self.stdlib = StdlibJSONProvider(app)
+
+    def assertSameBytes(self, obj):
+        self.assertEqual(self.fast.dumps_bytes(obj), self.stdlib.dumps_bytes(obj))
+        self.assertEqual(self.fast.dumps(obj, separators=(",", ":")), self.stdlib.dumps(obj, separators=(",", ":")))
+
+    def test_non_ascii_escaped_like_stdlib(self):
+        self.assertSameBytes([{"id": 1, "title": "Задача", "status": "невиконана", "description": None}])
+        self.assertSameBytes({"latin": "café ÿ", "emoji": "ok 😀 𝄞", "sep": "  "})
+        # \x і \U, що вже є в даних, не плутаються з результатом backslashreplace
+        self.assertSameBytes({"s": "\\x41 \\U0001 й", "t": "й\\"})
+        self.assertEqual(self.fast.dumps_bytes({"s": "невиконана"}),
+                         b'{"s":"\\u043d\\u0435\\u0432\\u0438\\u043a\\u043e\\u043d\\u0430\\u043d\\u0430"}\n')
+
+    def test_control_characters_and_quotes(self):
+        self.assertSameBytes({"s": "a\"b\\c\n\r\t\b\f\x00\x1f\x7f/"})
+
+    def test_sorted_keys_and_nesting(self):
+        self.assertSameBytes({"b": [1, 2, {"z": True, "a": False}], "a": {"y": None, "x": -5}, "c": []})
+
+    def test_types_via_flask_default(self):
+        self.assertSameBytes({
+            "created_at": datetime.datetime(2025, 1, 2, 3, 4, 5),
+            "aware": datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2025, 1, 2),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "price": decimal.Decimal("1.10"),
+        })
+
+    def test_falls_back_for_unsupported_values(self):
+        self.assertSameBytes({"big": 2 ** 70})
+        self.assertSameBytes({2: "int keys", 1: "й"})
+        self.assertEqual(self.fast.dumps({"b": 1, "a": 2}), self.stdlib.dumps({"b": 1, "a": 2}))
+        with self.assertRaises(TypeError):
+            self.fast.dumps_bytes({"x": object()})
+
+    def test_provider_selection(self):
+        self.assertIs(json_provider_class("orjson"), OrjsonProvider)
+        self.assertIs(json_provider_class("stdlib"), StdlibJSONProvider)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import unittest
+from app.passwords import PasswordHasher, PasswordHasherOverloaded, normalize_method
+
+
+class PasswordHasherTests(unittest.TestCase):
+    """Хешування паролів з обмеженою чергою"""
+
+    def test_hash_and_verify_in_process_pool(self):
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1)
+        pwhash = hasher.hash('secret')
+        self.assertTrue(pwhash.startswith('pbkdf2:sha256:1000$'))
+        self.assertTrue(hasher.verify(pwhash, 'secret'))
+        self.assertFalse(asyncio.run(hasher.verify_async(pwhash, 'wrong')))
+
+    def test_rejects_when_queue_is_full(self):
+        hasher = PasswordHasher(workers=0, max_pending=1)
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=hasher.run, args=(slow,))
+        worker.start()
+        started.wait(5)
+        with self.assertRaises(PasswordHasherOverloaded):
+            hasher.hash('secret')
+        release.set()
+        worker.join()
+        # місце в черзі звільнилось
+        self.assertTrue(hasher.verify(hasher.hash('secret'), 'secret'))
+
+    def test_zero_max_pending_means_unlimited(self):
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=0, max_pending=0)
+        pwhash = hasher.hash('secret')
+        self.assertTrue(hasher.verify(pwhash, 'secret'))
+        self.assertTrue(asyncio.run(hasher.verify_async(pwhash, 'secret')))
+
+    def test_needs_rehash_compares_full_parameters(self):
+        self.assertEqual(normalize_method('scrypt'), 'scrypt:32768:8:1')
+        hasher = PasswordHasher(method='scrypt', workers=0)
+        self.assertFalse(hasher.needs_rehash('scrypt:32768:8:1$salt$hash'))
+        self.assertTrue(hasher.needs_rehash('scrypt:16384:8:1$salt$hash'))
+        self.assertTrue(hasher.needs_rehash('pbkdf2:sha256:600000$salt$hash'))
+
+
+if __name__ == "__main__":
+    unittest.main()
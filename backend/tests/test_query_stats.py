@@ -0,0 +1,32 @@
+import unittest
+from app.query_stats import normalize_sql, endpoint_name
+
+
+class NormalizeSqlTests(unittest.TestCase):
+    def test_replaces_literals_and_parameters(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM tasks\n  WHERE owner_id = %(owner_id_1)s AND title = 'a''b' LIMIT 20"),
+            "SELECT * FROM tasks WHERE owner_id = ? AND title = ? LIMIT ?",
+        )
+        self.assertEqual(normalize_sql("UPDATE users SET username=$1 WHERE users.id = $2"),
+                         "UPDATE users SET username=? WHERE users.id = ?")
+
+    def test_collapses_in_lists(self):
+        self.assertEqual(normalize_sql("SELECT id FROM tasks WHERE id IN (?, ?, ?)"),
+                         "SELECT id FROM tasks WHERE id IN (?...)")
+        self.assertEqual(normalize_sql("DELETE FROM tasks WHERE id IN (1,2)"),
+                         "DELETE FROM tasks WHERE id IN (?...)")
+
+    def test_keeps_identifiers_with_digits(self):
+        self.assertEqual(normalize_sql("SELECT anon_1.id FROM t2"), "SELECT anon_1.id FROM t2")
+
+
+class EndpointNameTests(unittest.TestCase):
+    def test_matches_flask_endpoint(self):
+        from app.asgi import tasks
+        self.assertEqual(endpoint_name(tasks.get_tasks), "tasks.get_tasks")
+        self.assertIsNone(endpoint_name(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
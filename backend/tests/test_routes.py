@@ -1,5 +1,16 @@
+import gzip
+import itertools
+import json
+import threading
+import time
 import unittest
+from unittest import mock
+from sqlalchemy import text
 from app import create_app, db
+from app.admission import parse_rate
+from app.database import RecentPoolWait
+from app.idempotency import poll_delays, store_key
+from tests.base import ApiTestCase
 
 
 class BasicTests(unittest.TestCase):
@@ -123,5 +134,1122 @@ class BasicTests(unittest.TestCase):
             self.skipTest("Login failed, cannot create task")
 
 
+class TaskPaginationTests(ApiTestCase):
+    """Keyset-пагінація та проєкція полів для GET /api/tasks і /api/tasks/public"""
+
+    def test_pages_follow_cursor_until_end(self):
+        self.register_and_login()
+        self.seed_tasks(5)
+
+        first = self.client.get('/api/tasks/public?limit=2')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([t['id'] for t in first.json], [1, 2])
+        self.assertIn('rel="next"', first.headers['Link'])
+
+        ids, cursor = [], first.headers['X-Next-Cursor']
+        while cursor:
+            page = self.client.get(f'/api/tasks/public?limit=2&cursor={cursor}')
+            ids += [t['id'] for t in page.json]
+            cursor = page.headers.get('X-Next-Cursor')
+        self.assertEqual(ids, [3, 4, 5])
+
+    def test_after_id_and_page_size_cap(self):
+        self.app.config['TASKS_MAX_PAGE_SIZE'] = 3
+        self.register_and_login()
+        self.seed_tasks(5)
+
+        response = self.client.get('/api/tasks/public?after_id=1&limit=1000')
+        self.assertEqual([t['id'] for t in response.json], [2, 3, 4])
+        self.assertIn('X-Next-Cursor', response.headers)
+
+    def test_fields_projection(self):
+        headers = self.register_and_login()
+        self.seed_tasks(2)
+
+        response = self.client.get('/api/tasks?fields=title,status', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0], {'title': 'Задача 1', 'status': 'невиконана'})
+        self.assertNotIn('Link', response.headers)
+
+    def test_invalid_page_args_rejected(self):
+        for query in ('limit=0', 'limit=abc', 'after_id=-1', 'cursor=???', 'fields=password'):
+            response = self.client.get(f'/api/tasks/public?{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('error', response.json)
+
+
+class TaskExportTests(ApiTestCase):
+    """Потоковий експорт GET /api/tasks/export"""
+
+    def test_ndjson_export_streams_all_rows(self):
+        self.app.config['TASKS_EXPORT_BATCH_SIZE'] = 2
+        headers = self.register_and_login()
+        self.seed_tasks(5)
+
+        response = self.client.get('/api/tasks/export', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([t['id'] for t in lines], [1, 2, 3, 4, 5])
+        self.assertEqual(lines[0]['status'], 'невиконана')
+
+    def test_json_array_export_matches_list(self):
+        headers = self.register_and_login()
+        self.seed_tasks(3)
+
+        exported = self.client.get('/api/tasks/export?format=json&fields=id,title', headers=headers)
+        listed = self.client.get('/api/tasks?fields=id,title', headers=headers)
+        self.assertEqual(json.loads(exported.get_data()), listed.json)
+
+    def test_gzip_export(self):
+        headers = self.register_and_login()
+        self.seed_tasks(3)
+
+        response = self.client.get('/api/tasks/export',
+                                   headers={**headers, 'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(response.get_data()).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+
+
+class TaskBulkTests(ApiTestCase):
+    """Пакетні операції /api/tasks/bulk"""
+
+    def test_bulk_create_reports_each_item(self):
+        headers = self.register_and_login()
+        response = self.client.post('/api/tasks/bulk', json=[
+            {'title': 'Перша', 'owner_id': 1},
+            {'title': 'Без власника', 'owner_id': 42},
+            {'owner_id': 1},
+            {'title': 'Друга', 'owner_id': '1', 'status': 'виконана'},
+        ], headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['succeeded'], 2)
+        self.assertEqual([r['status'] for r in response.json['results']], [201, 400, 400, 201])
+        self.assertIn('User with id 42 does not exist', response.json['results'][1]['error'])
+        self.assertEqual(response.json['results'][3]['task'],
+                         {'id': 2, 'title': 'Друга', 'description': None, 'owner_id': 1, 'status': 'виконана',
+                          'version': 1})
+
+        tasks = self.client.get('/api/tasks', headers=headers).json
+        self.assertEqual([t['title'] for t in tasks], ['Перша', 'Друга'])
+
+    def test_bulk_update_and_delete(self):
+        headers = self.register_and_login()
+        self.seed_tasks(3)
+
+        response = self.client.put('/api/tasks/bulk', json=[
+            {'id': 1, 'status': 'виконана'},
+            {'id': 99, 'status': 'виконана'},
+            {'id': 2, 'owner_id': 7},
+        ], headers=headers)
+        self.assertEqual([r['status'] for r in response.json['results']], [200, 404, 400])
+        self.assertEqual(response.json['results'][0]['task']['status'], 'виконана')
+
+        response = self.client.delete('/api/tasks/bulk', json=[1, 3, 99, 'x'], headers=headers)
+        self.assertEqual([r['status'] for r in response.json['results']], [204, 204, 404, 400])
+        tasks = self.client.get('/api/tasks', headers=headers).json
+        self.assertEqual([t['id'] for t in tasks], [2])
+
+    def test_bulk_rejects_non_array_and_oversized_body(self):
+        self.app.config['TASKS_BULK_MAX_ITEMS'] = 2
+        headers = self.register_and_login()
+
+        self.assertEqual(self.client.post('/api/tasks/bulk', json={'title': 'x'}, headers=headers).status_code, 400)
+        response = self.client.post('/api/tasks/bulk', json=[{'title': 'x', 'owner_id': 1}] * 3, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Too many items', response.json['error'])
+
+
+class TaskFilterTests(ApiTestCase):
+    """Фільтри, сортування та пошук у GET /api/tasks і EXPLAIN-перевірка індексів"""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.register_and_login()
+        self.register_and_login('second', 'password2')
+        self.client.post('/api/tasks/bulk', json=[
+            {'title': 'Купити молоко', 'owner_id': 1, 'status': 'невиконана'},
+            {'title': 'Звіт', 'description': 'Квартальний звіт 100%', 'owner_id': 1, 'status': 'виконана'},
+            {'title': 'Ремонт', 'owner_id': 2, 'status': 'в процесі'},
+            {'title': 'Купити хліб', 'owner_id': 2, 'status': 'невиконана'},
+        ], headers=self.headers)
+
+    def ids(self, query):
+        response = self.client.get(f'/api/tasks?{query}', headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.json)
+        return [t['id'] for t in response.json]
+
+    def test_filters(self):
+        self.assertEqual(self.ids('owner_id=2'), [3, 4])
+        self.assertEqual(self.ids('owner_id=me'), [1, 2])
+        self.assertEqual(self.ids('status=виконана&status=в процесі'), [2, 3])
+        self.assertEqual(self.ids('status=невиконана,виконана&owner_id=1'), [1, 2])
+        self.assertEqual(self.ids('q=Купити'), [1, 4])
+        self.assertEqual(self.ids('q=100%'), [2])
+        self.assertEqual(self.ids('created_from=2000-01-01&created_to=2999-01-01'), [1, 2, 3, 4])
+        self.assertEqual(self.ids('created_from=2999-01-01'), [])
+
+    def test_sort_desc_with_cursor(self):
+        first = self.client.get('/api/tasks?sort=-id&limit=3', headers=self.headers)
+        self.assertEqual([t['id'] for t in first.json], [4, 3, 2])
+        cursor = first.headers['X-Next-Cursor']
+        self.assertEqual(self.ids(f'sort=-id&limit=3&cursor={cursor}'), [1])
+
+    def test_invalid_filters_rejected(self):
+        for query in ('owner_id=abc', 'sort=title', 'created_from=yesterday'):
+            response = self.client.get(f'/api/tasks?{query}', headers=self.headers)
+            self.assertEqual(response.status_code, 400, query)
+        self.assertEqual(self.client.get('/api/tasks/public?owner_id=me').status_code, 400)
+
+    def explain(self, filters, setup=()):
+        """План виконання запиту сторінки задач з даними фільтрами."""
+        from app.queries import TASK_FIELDS, select_tasks_page
+        with self.app.app_context():
+            dialect = db.engine.dialect
+            for statement in setup:
+                db.session.execute(text(statement))
+            stmt = select_tasks_page(0, 100, TASK_FIELDS, {'sort': 'id', **filters}, dialect.name)
+            sql = str(stmt.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+            prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+            return ' '.join(str(row[-1]) for row in db.session.execute(text(prefix + sql)))
+
+    def test_explain_uses_owner_status_index(self):
+        self.assertIn('ix_tasks_owner_status_id', self.explain({'owner_id': 1, 'statuses': ['виконана']}))
+        self.assertIn('ix_tasks_owner_id_id', self.explain({'owner_id': 1}))
+        self.assertIn('ix_tasks_status_id', self.explain({'statuses': ['виконана', 'в процесі']}))
+
+    def test_explain_uses_gin_index_for_search(self):
+        with self.app.app_context():
+            if db.engine.dialect.name != 'postgresql':
+                self.skipTest("GIN/tsvector індекс є лише на PostgreSQL")
+        # На кількох рядках планувальник обере seq scan, тому вимикаємо його для перевірки
+        plan = self.explain({'q': 'звіт'}, setup=['SET LOCAL enable_seqscan = off'])
+        self.assertIn('ix_tasks_search', plan)
+
+
+class CacheRouteTests(ApiTestCase):
+    """Read-through кеш для задач/користувачів та інвалідація на записі"""
+
+    def sample(self, name, model):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, {'model': model}) or 0
+
+    def test_task_read_is_cached_and_invalidated_on_update(self):
+        headers = self.register_and_login()
+        self.seed_tasks(1)
+
+        hits = self.sample('cache_hits_total', 'task')
+        self.assertEqual(self.client.get('/api/tasks/1', headers=headers).json['status'], 'невиконана')
+        self.client.get('/api/tasks/1', headers=headers)
+        self.assertEqual(self.sample('cache_hits_total', 'task'), hits + 1)
+
+        self.client.put('/api/tasks/1', json={'status': 'виконана'}, headers=headers)
+        self.assertEqual(self.client.get('/api/tasks/1', headers=headers).json['status'], 'виконана')
+
+        self.client.delete('/api/tasks/1', headers=headers)
+        self.assertEqual(self.client.get('/api/tasks/1', headers=headers).status_code, 404)
+
+    def test_me_is_served_from_cache_and_invalidated_on_update(self):
+        headers = self.register_and_login()
+
+        self.client.get('/api/users/me', headers=headers)
+        hits = self.sample('cache_hits_total', 'user')
+        self.assertEqual(self.client.get('/api/users/me', headers=headers).json['username'], 'testuser')
+        self.assertEqual(self.sample('cache_hits_total', 'user'), hits + 1)
+
+        self.client.put('/api/users/1', json={'username': 'renamed', 'password': 'x'}, headers=headers)
+        self.assertEqual(self.client.get('/api/users/me', headers=headers).json['username'], 'renamed')
+
+    def test_write_in_another_worker_is_not_served_from_stale_cache(self):
+        from app import cache
+        from app.cache import LocalCacheBackend
+        headers = self.register_and_login()
+        self.seed_tasks(1)
+        worker_a, worker_b = LocalCacheBackend(), LocalCacheBackend()
+
+        cache.init_app(self.app, backend=worker_a)
+        old = self.client.get('/api/tasks/1', headers=headers)
+        self.client.get('/api/users/1', headers=headers)
+
+        # Запис через інший воркер інвалідовує лише його кеш
+        cache.init_app(self.app, backend=worker_b)
+        self.client.put('/api/tasks/1', json={'status': 'виконана'}, headers=headers)
+        self.client.put('/api/users/1', json={'username': 'renamed', 'password': 'x'}, headers=headers)
+        new_etag = self.client.get('/api/tasks/1', headers=headers).headers['ETag']
+
+        cache.init_app(self.app, backend=worker_a)
+        response = self.client.get('/api/tasks/1', headers={**headers, 'If-None-Match': old.headers['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['status'], 'виконана')
+        self.assertEqual(response.headers['ETag'], new_etag)
+        self.assertEqual(self.client.get('/api/tasks/1', headers={**headers, 'If-None-Match': new_etag}).status_code, 304)
+        self.assertEqual(self.client.get('/api/users/1', headers=headers).json['username'], 'renamed')
+
+    def test_redis_backend_with_fake_client(self):
+        from app import cache
+        from app.cache import RedisCacheBackend
+        from tests.test_cache import FakeRedis
+        fake = FakeRedis()
+        cache.init_app(self.app, backend=RedisCacheBackend(fake))
+
+        headers = self.register_and_login()
+        self.client.get('/api/users/1', headers=headers)
+        self.assertIn('cache:user:1', fake.data)
+
+        self.client.delete('/api/users/1', headers=headers)
+        self.assertEqual(fake.data, {})
+
+
+class ConditionalGetTests(ApiTestCase):
+    """ETag / If-None-Match і заголовки Cache-Control"""
+
+    def test_public_list_returns_304_until_tasks_change(self):
+        headers = self.register_and_login()
+        self.seed_tasks(2)
+
+        first = self.client.get('/api/tasks/public')
+        etag = first.headers['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('s-maxage', first.headers['Cache-Control'])
+
+        second = self.client.get('/api/tasks/public', headers={'If-None-Match': etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.get_data(), b'')
+        self.assertEqual(second.headers['ETag'], etag)
+
+        # Інша сторінка/параметри - інший ETag
+        other = self.client.get('/api/tasks/public?limit=1', headers={'If-None-Match': etag})
+        self.assertEqual(other.status_code, 200)
+
+        self.client.post('/api/tasks', json={'title': 'Нова', 'owner_id': 1}, headers=headers)
+        third = self.client.get('/api/tasks/public', headers={'If-None-Match': etag})
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(len(third.json), 3)
+        self.assertNotEqual(third.headers['ETag'], etag)
+
+    def test_304_skips_the_list_query(self):
+        self.seed_tasks(1)
+        etag = self.client.get('/api/tasks/public').headers['ETag']
+
+        with mock.patch('app.services.tasks.select_tasks_page') as select_page:
+            response = self.client.get('/api/tasks/public', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        select_page.assert_not_called()
+
+    def test_detail_endpoints_revalidate(self):
+        headers = self.register_and_login()
+        self.seed_tasks(1)
+
+        for url in ('/api/tasks/1', '/api/users/1', '/api/users/me', '/api/users'):
+            response = self.client.get(url, headers=headers)
+            self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+            repeat = self.client.get(url, headers={**headers, 'If-None-Match': response.headers['ETag']})
+            self.assertEqual(repeat.status_code, 304, url)
+
+        etag = self.client.get('/api/tasks/1', headers=headers).headers['ETag']
+        self.client.put('/api/tasks/1', json={'status': 'виконана'}, headers=headers)
+        response = self.client.get('/api/tasks/1', headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['status'], 'виконана')
+
+
+class TaskStatsTests(ApiTestCase):
+    """Кількість задач за статусом і власником /api/tasks/stats"""
+
+    def test_counts_by_status_and_owner(self):
+        self.seed_tasks(2, owner_id=1)
+        self.seed_tasks(1, owner_id=2, status='виконана')
+
+        response = self.client.get('/api/tasks/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {
+            'total': 3,
+            'by_status': {'невиконана': 2, 'виконана': 1},
+            'by_owner': [
+                {'owner_id': 1, 'total': 2, 'by_status': {'невиконана': 2}},
+                {'owner_id': 2, 'total': 1, 'by_status': {'виконана': 1}},
+            ],
+        })
+
+    def test_stats_follow_writes(self):
+        headers = self.register_and_login()
+        self.client.post('/api/tasks/bulk', json=[{'title': f'Задача {i}', 'owner_id': 1} for i in range(3)],
+                         headers=headers)
+        etag = self.client.get('/api/tasks/stats').headers['ETag']
+        self.assertEqual(self.client.get('/api/tasks/stats', headers={'If-None-Match': etag}).status_code, 304)
+
+        self.client.put('/api/tasks/1', json={'status': 'виконана'}, headers=headers)
+        self.client.delete('/api/tasks/2', headers=headers)
+
+        response = self.client.get('/api/tasks/stats', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['by_status'], {'виконана': 1, 'невиконана': 1})
+        self.assertEqual(response.json['total'], 2)
+
+    def test_empty(self):
+        response = self.client.get('/api/tasks/stats')
+        self.assertEqual(response.json, {'total': 0, 'by_status': {}, 'by_owner': []})
+
+
+class TaskEventsTests(ApiTestCase):
+    """SSE-стрім змін задач /api/tasks/events"""
+
+    def setUp(self):
+        super().setUp()
+        # Короткий стрім, щоб тестовий клієнт дочитав відповідь до кінця
+        self.app.config['TASK_EVENTS_MAX_STREAM_SECONDS'] = 0.2
+        self.app.config['TASK_EVENTS_HEARTBEAT_SECONDS'] = 0.1
+
+    def read_stream(self, last_event_id=None):
+        """Повертає список повідомлень стріму як dict полів (id, event, data)."""
+        headers = {'Last-Event-ID': str(last_event_id)} if last_event_id is not None else {}
+        # close() звільняє місце в ліміті стрімів, як це робить WSGI-сервер
+        with self.client.get('/api/tasks/events', headers=headers) as response:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'text/event-stream')
+            body = response.get_data(as_text=True)
+        messages = []
+        for block in body.split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+            if fields:
+                messages.append(fields)
+        return messages
+
+    def test_resume_from_last_event_id(self):
+        headers = self.register_and_login()
+        start = int(self.read_stream()[0]['id'])
+
+        self.client.post('/api/tasks', json={'title': 'Нова', 'owner_id': 1}, headers=headers)
+        self.client.put('/api/tasks/1', json={'status': 'виконана'}, headers=headers)
+        self.client.delete('/api/tasks/1', headers=headers)
+
+        messages = [m for m in self.read_stream(start) if m.get('event') == 'task']
+        changes = [json.loads(m['data']) for m in messages]
+        self.assertEqual([c['op'] for c in changes], ['created', 'updated', 'deleted'])
+        self.assertEqual(changes[0]['task']['title'], 'Нова')
+        self.assertEqual(changes[1]['task']['status'], 'виконана')
+        self.assertEqual(changes[2]['task'], {'id': 1})
+
+        # Продовження з середини - лише пропущені події
+        rest = [m for m in self.read_stream(messages[0]['id']) if m.get('event') == 'task']
+        self.assertEqual([m['id'] for m in rest], [m['id'] for m in messages[1:]])
+
+    def test_bulk_changes_and_failed_writes(self):
+        headers = self.register_and_login()
+        start = int(self.read_stream()[0]['id'])
+
+        self.client.post('/api/tasks/bulk', json=[{'title': 'A', 'owner_id': 1}, {'title': 'B', 'owner_id': 99}],
+                         headers=headers)
+        self.client.post('/api/tasks', json={'title': 'C', 'owner_id': 99}, headers=headers)  # 400
+        self.client.put('/api/tasks/bulk', json=[{'id': 1, 'title': 'A2'}], headers=headers)
+        self.client.delete('/api/tasks/bulk', json=[1], headers=headers)
+
+        changes = [json.loads(m['data']) for m in self.read_stream(start) if m.get('event') == 'task']
+        self.assertEqual([(c['op'], c['task'].get('title')) for c in changes],
+                         [('created', 'A'), ('updated', 'A2'), ('deleted', None)])
+
+    def test_rolled_back_changes_are_not_published(self):
+        from app import task_events
+        start = int(self.read_stream()[0]['id'])
+        with self.app.test_request_context():
+            task_events.publish(db.session, 'created', [{'id': 1}])
+            db.session.rollback()
+        self.assertEqual([m for m in self.read_stream(start) if m.get('event') == 'task'], [])
+
+    def test_unknown_last_event_id_gets_reset(self):
+        for last_event_id in (0, 'abc'):
+            messages = self.read_stream(last_event_id)
+            self.assertEqual(messages[1]['event'], 'reset')
+            self.assertGreater(int(messages[1]['id']), 0)
+
+    def test_stream_limit(self):
+        self.app.config['TASK_EVENTS_MAX_STREAMS'] = 0
+        self.app.config['TASK_EVENTS_MAX_STREAMS_ASYNC'] = 0
+        response = self.client.get('/api/tasks/events')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+
+class PasswordHashingTests(ApiTestCase):
+    """Хешування паролів у пулі процесів: перевантаження і оновлення хешу"""
+
+    def test_overloaded_hasher_returns_503(self):
+        from app.passwords import PasswordHasher
+        self.register_and_login('user', 'secret')
+        hasher = PasswordHasher(max_pending=1)
+        hasher._slots.acquire()  # єдине місце в черзі зайняте
+        self.app.extensions['passwords'] = hasher
+        for path, username in (('/api/users/register', 'other'), ('/api/users/login', 'user')):
+            response = self.client.post(path, json={'username': username, 'password': 'secret'})
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], '1')
+            self.assertIn('error', response.json)
+
+    def test_user_update_checks_user_before_hashing(self):
+        from app.passwords import PasswordHasher
+        headers = self.register_and_login('user', 'secret')
+        hasher = PasswordHasher(max_pending=1)
+        hasher._slots.acquire()
+        self.app.extensions['passwords'] = hasher
+        # 404 і 409 не займають місця в черзі хешування
+        response = self.client.put('/api/users/99', json={'username': 'x', 'password': 'x'}, headers=headers)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.put('/api/users/1', json={'username': 'x', 'password': 'x', 'version': 5},
+                                   headers=headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json['user']['version'], 1)
+        response = self.client.put('/api/users/1', json={'username': 'x', 'password': 'x'}, headers=headers)
+        self.assertEqual(response.status_code, 503)
+
+    def test_login_rehashes_outdated_hash(self):
+        from app.models import User
+        from app.passwords import PasswordHasher
+        self.app.extensions['passwords'] = PasswordHasher(method='pbkdf2:sha256:1000', workers=0)
+        self.register_and_login('user', 'secret')
+
+        self.app.extensions['passwords'] = PasswordHasher(method='pbkdf2:sha256:2000', workers=0)
+        self.register_and_login('user', 'secret')
+        with self.app.app_context():
+            self.assertTrue(db.session.get(User, 1).password.startswith('pbkdf2:sha256:2000$'))
+        self.register_and_login('user', 'secret')
+
+
+class JWTAuthTests(ApiTestCase):
+    """Кеш розкодованих токенів, відкликання токенів і claims користувача в токені"""
+
+    def token_claims(self, headers):
+        import jwt
+        return jwt.decode(headers['Authorization'].split()[1], options={'verify_signature': False})
+
+    def test_logout_revokes_only_that_token(self):
+        headers = self.register_and_login()
+        other = self.register_and_login()
+
+        response = self.client.post('/api/users/logout', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/api/users/me', headers=headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json, {'msg': 'Token has been revoked'})
+        self.assertEqual(self.client.get('/api/users/me', headers=other).status_code, 200)
+
+    def test_revocation_from_another_worker_is_picked_up(self):
+        from app.auth import KIND_TOKEN, RevocationList
+        headers = self.register_and_login()
+        self.assertEqual(self.client.get('/api/users/me', headers=headers).status_code, 200)
+
+        # Інший воркер відкликає токен через спільну БД
+        with self.app.app_context():
+            RevocationList().revoke(db.session, KIND_TOKEN, jti=self.token_claims(headers)['jti'], expires_in=60)
+            db.session.commit()
+        self.app.extensions['jwt_auth'].revocations.sync_interval = 0
+        self.assertEqual(self.client.get('/api/users/me', headers=headers).status_code, 401)
+
+    def test_deleted_user_tokens_are_rejected(self):
+        headers = self.register_and_login('first', 'secret')
+        other = self.register_and_login('second', 'secret')
+        self.client.delete('/api/users/1', headers=other)
+        self.assertEqual(self.client.get('/api/tasks', headers=headers).status_code, 401)
+        self.assertEqual(self.client.get('/api/tasks', headers=other).status_code, 200)
+
+    def test_repeated_requests_hit_token_cache(self):
+        from prometheus_client import REGISTRY
+        headers = self.register_and_login()
+        self.client.get('/api/users/me', headers=headers)
+        hits = REGISTRY.get_sample_value('cache_hits_total', {'model': 'jwt'}) or 0
+        self.client.get('/api/users/me', headers=headers)
+        self.assertEqual(REGISTRY.get_sample_value('cache_hits_total', {'model': 'jwt'}), hits + 1)
+
+    def test_embedded_claims_serve_me_without_queries(self):
+        self.app.config['JWT_EMBED_USER_CLAIMS'] = True
+        headers = self.register_and_login()
+        self.assertEqual(self.token_claims(headers)['username'], 'testuser')
+        self.client.get('/api/users/me', headers=headers)  # синхронізація списку відкликаних
+
+        with self.count_queries() as queries:
+            response = self.client.get('/api/users/me', headers=headers)
+        self.assertEqual(response.json, {'id': 1, 'username': 'testuser', 'version': 1})
+        self.assertEqual(queries, [])
+
+        # Та сама форма й ETag, що й у відповіді з БД (GET /users/1)
+        detail = self.client.get('/api/users/1', headers=headers)
+        self.assertEqual(response.json, detail.json)
+        self.assertEqual(response.headers['ETag'], detail.headers['ETag'])
+        cached = self.client.get('/api/users/me', headers={**headers, 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+        # Після перейменування claims у старому токені застаріли - відповідь з БД
+        self.client.put('/api/users/1', json={'username': 'renamed', 'password': 'x'}, headers=headers)
+        self.assertEqual(self.client.get('/api/users/me', headers=headers).json['username'], 'renamed')
+
+
+class UsersWithTasksTests(ApiTestCase):
+    """Список користувачів із задачами /api/users?include=tasks"""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.register_and_login()
+        # Список відкликаних токенів синхронізовано - далі лише запити самого списку
+        self.app.extensions['jwt_auth'].revocations.sync_interval = float('inf')
+        self.client.get('/api/users/me', headers=self.headers)
+
+    def test_users_include_their_tasks_in_id_order(self):
+        self.seed_tasks(3, owner_id=2)
+        response = self.client.get('/api/users?include=tasks', headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([u['id'] for u in response.json], [1, 2])
+        self.assertEqual(response.json[0]['tasks'], [])
+        self.assertEqual([t['id'] for t in response.json[1]['tasks']], [1, 2, 3])
+        self.assertEqual(response.json[1]['tasks'][0],
+                         {'id': 1, 'title': 'Задача 1', 'description': 'Опис 1', 'status': 'невиконана'})
+
+    def test_tasks_limit_per_user(self):
+        self.seed_tasks(3, owner_id=2)
+        self.seed_tasks(1, owner_id=3)
+        response = self.client.get('/api/users?include=tasks&tasks_limit=2', headers=self.headers)
+
+        self.assertEqual([[t['id'] for t in u['tasks']] for u in response.json], [[], [1, 2], [4]])
+
+    def test_query_count_does_not_depend_on_user_count(self):
+        for users in (2, 20):
+            for owner_id in range(2, users + 2):
+                self.seed_tasks(2, owner_id=owner_id)
+            with self.count_queries() as queries:
+                response = self.client.get('/api/users?include=tasks', headers=self.headers)
+            self.assertEqual(len(response.json), users + 1)
+            # Версії users і tasks для ETag, користувачі, задачі
+            self.assertEqual(len(queries), 4, "\n".join(queries))
+
+    def test_etag_follows_tasks(self):
+        etag = self.client.get('/api/users?include=tasks', headers=self.headers).headers['ETag']
+        self.assertNotEqual(etag, self.client.get('/api/users', headers=self.headers).headers['ETag'])
+
+        self.client.post('/api/tasks', json={'title': 'Нова', 'owner_id': 1}, headers=self.headers)
+        response = self.client.get('/api/users?include=tasks', headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['tasks'][0]['title'], 'Нова')
+
+    def test_invalid_arguments(self):
+        for query in ('include=posts', 'tasks_limit=2', 'include=tasks&tasks_limit=0',
+                      'include=tasks&tasks_limit=x'):
+            response = self.client.get(f'/api/users?{query}', headers=self.headers)
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('error', response.json)
+
+
+class WriteQueryCountTests(ApiTestCase):
+    """Кількість SQL-запитів на запис: перевірки виконують обмеження БД, зміни - UPDATE ... RETURNING"""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.register_and_login()
+        # Рядки table_versions уже існують, список відкликаних токенів синхронізовано
+        self.client.post('/api/tasks', json={'title': 'Перша', 'owner_id': 1}, headers=self.headers)
+        self.app.extensions['jwt_auth'].revocations.sync_interval = float('inf')
+
+    def assertQueries(self, count, method, url, status, **kwargs):
+        with self.count_queries() as queries:
+            response = getattr(self.client, method)(url, headers=self.headers, **kwargs)
+        self.assertEqual(response.status_code, status, response.get_data(as_text=True))
+        self.assertEqual(len(queries), count, "\n".join(queries))
+        return response
+
+    def test_task_writes(self):
+        # INSERT/UPDATE/DELETE задачі + версія таблиці
+        self.assertQueries(2, 'post', '/api/tasks', 201, json={'title': 'Нова', 'owner_id': 1})
+        response = self.assertQueries(2, 'put', '/api/tasks/2', 200, json={'status': 'виконана'})
+        self.assertEqual(response.json['title'], 'Нова')
+        self.assertQueries(2, 'delete', '/api/tasks/2', 204)
+
+    def test_user_writes(self):
+        self.assertQueries(2, 'post', '/api/users/register', 201, json={'username': 'second', 'password': 'x'})
+        # SELECT перед хешуванням пароля + UPDATE + версія таблиці
+        response = self.assertQueries(3, 'put', '/api/users/2', 200, json={'username': 'renamed', 'password': 'y'})
+        self.assertEqual(response.json, {'id': 2, 'username': 'renamed', 'version': 2})
+
+    def test_constraint_violations_keep_messages(self):
+        response = self.assertQueries(1, 'post', '/api/tasks', 400, json={'title': 'A', 'owner_id': 99})
+        self.assertEqual(response.json, {'error': 'User with id 99 does not exist'})
+        response = self.assertQueries(1, 'put', '/api/tasks/1', 400, json={'owner_id': 99})
+        self.assertEqual(response.json, {'error': 'User with id 99 does not exist'})
+        response = self.assertQueries(1, 'post', '/api/users/register', 400,
+                                      json={'username': 'testuser', 'password': 'x'})
+        self.assertEqual(response.json, {'error': "Username 'testuser' already exists"})
+
+        self.client.post('/api/users/register', json={'username': 'second', 'password': 'x'})
+        response = self.assertQueries(2, 'put', '/api/users/2', 400, json={'username': 'testuser', 'password': 'x'})
+        self.assertEqual(response.json, {'error': "Username 'testuser' already exists"})
+
+    def test_missing_rows(self):
+        self.assertQueries(1, 'put', '/api/tasks/99', 404, json={'status': 'виконана'})
+        self.assertQueries(1, 'delete', '/api/tasks/99', 404)
+        self.assertQueries(1, 'put', '/api/users/99', 404, json={'username': 'x', 'password': 'x'})
+
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
+
+class OptimisticLockingTests(ApiTestCase):
+    """Умовні оновлення за версією: If-Match / поле version, 409 при конфлікті"""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.register_and_login()
+        self.client.post('/api/tasks', json={'title': 'Задача', 'owner_id': 1}, headers=self.headers)
+
+    def put_task(self, json, if_match=None, id=1):
+        headers = {**self.headers, 'If-Match': if_match} if if_match else self.headers
+        return self.client.put(f'/api/tasks/{id}', json=json, headers=headers)
+
+    def test_every_update_bumps_version(self):
+        self.assertEqual(self.client.get('/api/tasks/1', headers=self.headers).json['version'], 1)
+        self.assertEqual(self.put_task({'status': 'в процесі'}).json['version'], 2)
+        self.assertEqual(self.put_task({'status': 'виконана'}, if_match='"2"').json['version'], 3)
+        self.assertEqual(self.client.get('/api/tasks/1', headers=self.headers).json['version'], 3)
+        self.assertEqual(self.client.get('/api/tasks', headers=self.headers).json[0]['version'], 3)
+
+    def test_stale_version_is_rejected_with_current_task(self):
+        self.assertEqual(self.put_task({'title': 'Перша вкладка'}, if_match='"1"').status_code, 200)
+
+        response = self.put_task({'title': 'Друга вкладка', 'version': 1})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json['task']['title'], 'Перша вкладка')
+        self.assertEqual(response.json['task']['version'], 2)
+        self.assertEqual(self.client.get('/api/tasks/1', headers=self.headers).json['title'], 'Перша вкладка')
+
+    def test_conditional_update_is_single_statement(self):
+        with self.count_queries() as queries:
+            self.assertEqual(self.put_task({'status': 'виконана'}, if_match='"1"').status_code, 200)
+        updates = [q for q in queries if q.startswith('UPDATE tasks')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('tasks.version = ?', updates[0])
+        self.assertFalse([q for q in queries if 'FOR UPDATE' in q or q.startswith('SELECT')])
+
+    def test_invalid_or_missing_versions(self):
+        self.assertEqual(self.put_task({'status': 'виконана'}, if_match='W/"1"').status_code, 400)
+        self.assertEqual(self.put_task({'status': 'виконана', 'version': '1'}).status_code, 400)
+        self.assertEqual(self.put_task({'status': 'виконана', 'version': 2}, if_match='"1"').status_code, 400)
+        self.assertEqual(self.put_task({'status': 'виконана'}, if_match='"1"', id=99).status_code, 404)
+        self.assertEqual(self.put_task({'status': 'виконана'}, if_match='*').status_code, 200)
+
+    def test_user_update_conflict(self):
+        response = self.client.put('/api/users/1', json={'username': 'renamed', 'password': 'x', 'version': 1},
+                                   headers=self.headers)
+        self.assertEqual(response.json['version'], 2)
+
+        response = self.client.put('/api/users/1', json={'username': 'stale', 'password': 'x'},
+                                   headers={**self.headers, 'If-Match': '"1"'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json['user'], {'id': 1, 'username': 'renamed', 'version': 2})
+
+    def test_bulk_update_checks_each_version(self):
+        self.client.post('/api/tasks', json={'title': 'Друга', 'owner_id': 1}, headers=self.headers)
+        response = self.client.put('/api/tasks/bulk', json=[
+            {'id': 1, 'status': 'виконана', 'version': 1},
+            {'id': 2, 'status': 'виконана', 'version': 5},
+            {'id': 2, 'title': 'Без версії'},
+        ], headers=self.headers)
+
+        self.assertEqual([r['status'] for r in response.json['results']], [200, 409, 200])
+        self.assertEqual(response.json['results'][0]['task']['version'], 2)
+        self.assertIn('current version 1', response.json['results'][1]['error'])
+        self.assertEqual(response.json['results'][2]['task']['version'], 2)
+
+
+class BackgroundJobTests(ApiTestCase):
+    """Важкі операції через фонові задачі: 202, /api/jobs/<id>, виконання воркером пачками"""
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['JOBS_BATCH_SIZE'] = 10
+        self.headers = self.register_and_login()
+
+    def run_jobs(self):
+        from app.jobs import work
+        work(self.app, once=True)
+
+    def test_user_delete_cascades_in_batches(self):
+        victim = self.register_and_login('victim', 'secret')
+        self.seed_tasks(25, owner_id=2)
+        self.seed_tasks(3, owner_id=1)
+
+        response = self.client.delete('/api/users/2', headers=self.headers)
+        self.assertEqual(response.status_code, 202)
+        job = response.json['job']
+        self.assertEqual(job['status'], 'queued')
+        self.assertEqual(response.headers['Location'], f"/api/jobs/{job['id']}")
+        # Токени відкликані одразу, ще до виконання задачі
+        self.assertEqual(self.client.get('/api/tasks', headers=victim).status_code, 401)
+
+        self.run_jobs()
+        job = self.client.get(f"/api/jobs/{job['id']}", headers=self.headers).json
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['result'], {'deleted_tasks': 25, 'user_deleted': True})
+        self.assertEqual(self.client.get('/api/users/2', headers=self.headers).status_code, 404)
+        tasks = self.client.get('/api/tasks', headers=self.headers).json
+        self.assertEqual({task['owner_id'] for task in tasks}, {1})
+        self.assertEqual(len(tasks), 3)
+
+    def test_repeated_delete_returns_pending_job(self):
+        from app.models import Job
+        self.register_and_login('victim', 'secret')
+        first = self.client.delete('/api/users/2', headers=self.headers)
+        second = self.client.delete('/api/users/2', headers=self.headers)
+        self.assertEqual(second.status_code, 202)
+        self.assertEqual(second.json['job']['id'], first.json['job']['id'])
+        self.assertEqual(second.headers['Location'], first.headers['Location'])
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Job).count(), 1)
+
+    def test_user_delete_removes_tasks_created_after_last_batch(self):
+        from unittest.mock import patch
+        from app import job_handlers
+        from app.models import Task
+        self.register_and_login('victim', 'secret')
+        self.seed_tasks(15, owner_id=2)
+        response = self.client.delete('/api/users/2', headers=self.headers)
+
+        delete_tasks = job_handlers.delete_tasks
+        late = []
+
+        def delete_then_insert(condition):
+            ids = delete_tasks(condition)
+            if not ids and not late:
+                # задача з'являється, коли пачок уже немає, але користувач ще не видалений
+                late.append(Task(title="Пізня", owner_id=2))
+                db.session.add(late[0])
+                db.session.flush()
+            return ids
+
+        with patch.object(job_handlers, 'delete_tasks', side_effect=delete_then_insert):
+            self.run_jobs()
+        job = self.client.get(response.headers['Location'], headers=self.headers).json
+        self.assertEqual(job['status'], 'done', job['error'])
+        self.assertEqual(job['result'], {'deleted_tasks': 16, 'user_deleted': True})
+        self.assertEqual(self.client.get('/api/tasks', headers=self.headers).json, [])
+
+    def test_delete_missing_user_is_not_queued(self):
+        self.assertEqual(self.client.delete('/api/users/99', headers=self.headers).status_code, 404)
+
+    def test_import_reports_created_and_failed_items(self):
+        items = [{'title': f'Імпорт {i}', 'owner_id': 1} for i in range(23)]
+        items[4] = {'owner_id': 1}
+        items[15]['owner_id'] = 42
+        response = self.client.post('/api/tasks/import', json=items, headers=self.headers)
+        self.assertEqual(response.status_code, 202)
+
+        self.run_jobs()
+        job = self.client.get(response.headers['Location'], headers=self.headers).json
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['result']['processed'], 23)
+        self.assertEqual(job['result']['created'], 21)
+        self.assertEqual([e['index'] for e in job['result']['errors']], [4, 15])
+        self.assertEqual(len(self.client.get('/api/tasks', headers=self.headers).json), 21)
+
+    def test_import_rejects_invalid_body(self):
+        self.assertEqual(self.client.post('/api/tasks/import', json={}, headers=self.headers).status_code, 400)
+        self.app.config['TASKS_IMPORT_MAX_ITEMS'] = 2
+        response = self.client.post('/api/tasks/import', json=[{}, {}, {}], headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/api/jobs/99', headers=self.headers).status_code, 404)
+
+
+class QueryStatsTests(ApiTestCase):
+    """SQL-метрики на запит, X-Request-ID і JSON-журнал повільних запитів"""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.register_and_login()
+
+    def sample(self, name, endpoint):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, {'endpoint': endpoint}) or 0
+
+    def test_records_queries_per_endpoint(self):
+        self.seed_tasks(3)
+        count = self.sample('db_queries_per_request_count', 'tasks.get_tasks')
+        queries = self.sample('db_queries_per_request_sum', 'tasks.get_tasks')
+        seconds = self.sample('db_time_per_request_seconds_sum', 'tasks.get_tasks')
+
+        response = self.client.get('/api/tasks', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sample('db_queries_per_request_count', 'tasks.get_tasks'), count + 1)
+        self.assertGreater(self.sample('db_queries_per_request_sum', 'tasks.get_tasks'), queries)
+        self.assertGreater(self.sample('db_time_per_request_seconds_sum', 'tasks.get_tasks'), seconds)
+
+    def test_request_id_header(self):
+        response = self.client.get('/api/tasks', headers={**self.headers, 'X-Request-ID': 'abc-123'})
+        self.assertEqual(response.headers['X-Request-ID'], 'abc-123')
+        # без заголовка від клієнта id генерується
+        response = self.client.get('/api/tasks', headers=self.headers)
+        self.assertEqual(len(response.headers['X-Request-ID']), 32)
+
+    def test_slow_query_logged_as_json(self):
+        from app.query_stats import JsonFormatter
+        self.app.config['SQL_SLOW_QUERY_MS'] = 0
+        self.seed_tasks(1)
+        with self.assertLogs('app.slow_queries', level='WARNING') as logs:
+            self.client.get('/api/tasks/1', headers={**self.headers, 'X-Request-ID': 'slow-1'})
+
+        entries = [json.loads(JsonFormatter().format(record)) for record in logs.records]
+        entry = next(e for e in entries if 'FROM tasks' in e['sql'])
+        self.assertEqual(entry['event'], 'slow_query')
+        self.assertEqual(entry['endpoint'], 'tasks.get_task')
+        self.assertEqual(entry['request_id'], 'slow-1')
+        self.assertIsInstance(entry['duration_ms'], float)
+        self.assertNotIn("'", entry['sql'])
+
+    def test_slow_query_log_disabled(self):
+        self.app.config['SQL_SLOW_QUERY_MS'] = -1
+        with mock.patch('app.query_stats.log_slow_query') as log_slow_query:
+            self.client.get('/api/tasks', headers=self.headers)
+        log_slow_query.assert_not_called()
+
+
+class IdempotencyTests(ApiTestCase):
+    """Повтори POST з Idempotency-Key отримують збережену відповідь без повторного виконання"""
+
+    def setUp(self):
+        super().setUp()
+        self.headers = self.register_and_login()
+        self.store = self.app.extensions['idempotency']
+
+    def post_task(self, key, title='Задача', headers=None):
+        return self.client.post('/api/tasks', json={'title': title, 'owner_id': 1},
+                                headers={**(headers or self.headers), 'Idempotency-Key': key})
+
+    def test_retry_replays_response_without_insert(self):
+        from prometheus_client import REGISTRY
+        labels = {'endpoint': 'tasks.create_task', 'result': 'replayed'}
+        replayed = REGISTRY.get_sample_value('idempotency_requests_total', labels) or 0
+        first = self.post_task('key-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+
+        with self.count_queries() as queries:
+            retry = self.post_task('key-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json, first.json)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        # лише читання збереженої відповіді, без запитів до tasks
+        self.assertEqual([q for q in queries if 'idempotency_keys' not in q], [])
+        self.assertEqual(REGISTRY.get_sample_value('idempotency_requests_total', labels), replayed + 1)
+
+        self.assertEqual(self.post_task('key-2').json['id'], 2)
+        self.assertEqual(len(self.client.get('/api/tasks', headers=self.headers).json), 2)
+
+    def test_register_retry_skips_password_hashing(self):
+        credentials = {'username': 'retry', 'password': 'retrypassword'}
+        headers = {'Idempotency-Key': 'register-1'}
+        first = self.client.post('/api/users/register', json=credentials, headers=headers)
+        hasher = self.app.extensions['passwords']
+        with mock.patch.object(hasher, 'submit', wraps=hasher.submit) as submit:
+            retry = self.client.post('/api/users/register', json=credentials, headers=headers)
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry.json, first.json)
+        submit.assert_not_called()
+        # без ключа - звичайна реєстрація з перевіркою унікальності
+        self.assertEqual(self.client.post('/api/users/register', json=credentials).status_code, 400)
+
+    def test_key_reused_with_different_body(self):
+        self.post_task('key-1')
+        response = self.post_task('key-1', title='Інша задача')
+        self.assertEqual(response.status_code, 422)
+        self.assertIn('Idempotency-Key', response.json['error'])
+        self.assertEqual(self.post_task('x' * 256).status_code, 400)
+
+    def test_keys_are_scoped_per_user(self):
+        other = self.register_and_login('second', 'secondpassword')
+        self.assertEqual(self.post_task('shared').json['id'], 1)
+        response = self.post_task('shared', headers=other)
+        self.assertEqual((response.status_code, response.json['id']), (201, 2))
+        self.assertNotIn('Idempotent-Replayed', response.headers)
+
+    def test_concurrent_duplicate_waits_for_first_response(self):
+        key = store_key('tasks.create_task', '1', 'key-1')
+        fingerprint = self.store.fingerprint('POST', '/api/tasks', {'title': 'Задача', 'owner_id': 1})
+        self.assertEqual(self.store.claim(key, fingerprint), ('run', None))  # перший запит ще виконується
+
+        self.store.wait_seconds = 0.1
+        response = self.post_task('key-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+        self.store.wait_seconds = 5
+        timer = threading.Timer(0.2, self.store.complete, (key, fingerprint, 201, b'{"id": 42}', {}))
+        timer.start()
+        response = self.post_task('key-1')
+        timer.join()
+        self.assertEqual((response.status_code, response.json), (201, {'id': 42}))
+        self.assertEqual(response.headers['Idempotent-Replayed'], 'true')
+
+    def test_duplicate_over_waiter_limit_gets_409_at_once(self):
+        key = store_key('tasks.create_task', '1', 'key-1')
+        fingerprint = self.store.fingerprint('POST', '/api/tasks', {'title': 'Задача', 'owner_id': 1})
+        self.store.claim(key, fingerprint)
+        self.store.wait_seconds = 5
+        self.app.config['IDEMPOTENCY_MAX_WAITERS'] = 0
+        self.app.config['IDEMPOTENCY_MAX_WAITERS_ASYNC'] = 0
+
+        started = time.monotonic()
+        response = self.post_task('key-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_poll_delays_back_off(self):
+        self.assertEqual(list(itertools.islice(poll_delays(60), 6)), [0.05, 0.1, 0.2, 0.4, 0.5, 0.5])
+        self.assertEqual(list(poll_delays(0)), [])
+
+
+class AdmissionTests(ApiTestCase):
+    """Ліміти частоти (429) і скидання навантаження (503)"""
+
+    def admission(self):
+        return self.app.extensions['admission']
+
+    def set_limit(self, group, key, rate):
+        self.admission().limits.setdefault(group, {})[key] = parse_rate(rate)
+
+    def test_anonymous_requests_limited_per_ip(self):
+        self.set_limit('users', 'ip', '3/minute')
+        self.admission().trusted_proxies = None  # тестовий клієнт - у ролі nginx
+        credentials = {'username': 'nobody', 'password': 'wrong'}
+        for _ in range(3):
+            self.assertEqual(self.client.post('/api/users/login', json=credentials).status_code, 401)
+
+        response = self.client.post('/api/users/login', json=credentials)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json, {'error': 'Too many requests, retry later'})
+        self.assertEqual(response.headers['Retry-After'], '20')
+        # інший IP (nginx передає його в X-Real-IP) та інша група мають власні відра
+        response = self.client.post('/api/users/login', json=credentials, headers={'X-Real-IP': '10.0.0.2'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get('/api/tasks/public').status_code, 200)
+
+    def test_ip_header_ignored_from_untrusted_peer(self):
+        self.set_limit('tasks', 'ip', '1/minute')
+        self.admission().trusted_proxies = ()
+        self.assertEqual(self.client.get('/api/tasks/public', headers={'X-Real-IP': '10.0.0.2'}).status_code, 200)
+        response = self.client.get('/api/tasks/public', headers={'X-Real-IP': '10.0.0.3'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_authenticated_requests_limited_per_user(self):
+        first = self.register_and_login()
+        second = self.register_and_login('second', 'secondpassword')
+        self.set_limit('tasks', 'user', '2/minute')
+        self.set_limit('tasks', 'ip', '1/minute')
+
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/tasks', headers=first).status_code, 200)
+        self.assertEqual(self.client.get('/api/tasks', headers=first).status_code, 429)
+        self.assertEqual(self.client.get('/api/tasks', headers=second).status_code, 200)
+        # авторизовані запити не витрачали ліміт IP
+        self.assertEqual(self.client.get('/api/tasks/public').status_code, 200)
+        self.assertEqual(self.client.get('/api/tasks/public').status_code, 429)
+
+    def test_sheds_requests_over_in_flight_limit(self):
+        shedder = self.admission().shedder
+        shedder.max_in_flight = 1
+        self.assertEqual(self.client.get('/api/tasks/public').status_code, 200)
+
+        shedder.in_flight = 1  # інший запит ще обробляється
+        response = self.client.get('/api/tasks/public')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json, {'error': 'Server is overloaded, retry later'})
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(self.client.get('/api/health/live').status_code, 200)
+
+        shedder.in_flight = 0
+        self.assertEqual(self.client.get('/api/tasks/public').status_code, 200)
+        self.assertEqual(shedder.in_flight, 0)
+
+    def test_sheds_while_pool_wait_is_high(self):
+        shedder = self.admission().shedder
+        shedder.pool_wait = RecentPoolWait(window=60)
+        shedder.pool_wait.record(shedder.max_pool_wait + 0.1)
+        self.assertEqual(self.client.get('/api/tasks/public').status_code, 503)
+        self.assertEqual(self.client.get('/api/health/ready').status_code, 200)
+
+
+class HealthTests(ApiTestCase):
+    """/api/health/live без I/O і /api/health/ready з кешованим станом БД"""
+
+    def readiness(self):
+        return self.app.extensions['readiness']
+
+    def test_live_does_not_touch_database(self):
+        with self.count_queries() as queries, \
+                mock.patch('app.readiness.DatabaseReadiness.refresh') as refresh:
+            response = self.client.get('/api/health/live')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'status': 'ok'})
+        self.assertEqual(queries, [])
+        refresh.assert_not_called()
+
+    def test_ready(self):
+        for path in ('/api/health/ready', '/api/health/full'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json['status'], 'ok')
+            self.assertEqual(response.json['db'], 'connected')
+            self.assertIsInstance(response.json['latency_ms'], float)
+            self.assertIn('pool', response.json)
+
+    def test_result_cached_between_probes(self):
+        self.client.get('/api/health/ready')
+        with mock.patch('app.readiness.DatabaseReadiness.refresh') as refresh:
+            for _ in range(3):
+                self.assertEqual(self.client.get('/api/health/ready').status_code, 200)
+        refresh.assert_not_called()
+
+    def test_stale_result_refreshed_in_background(self):
+        self.client.get('/api/health/ready')
+        state = self.readiness()
+        with mock.patch('app.readiness.PROBE_SQL', text("SELECT * FROM missing_table")):
+            state.retry_at = 0
+            # застарілий результат віддається одразу, не чекаючи фонової перевірки
+            threads, probe_started = [], threading.Event()
+            start_refresh, refresh = state.refresh_in_background, state.refresh
+            with mock.patch.object(state, 'refresh_in_background', lambda: threads.append(start_refresh())), \
+                    mock.patch.object(state, 'refresh', lambda: probe_started.wait(5) and refresh()):
+                response = self.client.get('/api/health/ready')
+                self.assertEqual(response.status_code, 200)
+                probe_started.set()
+                threads[0].join(5)
+
+            response = self.client.get('/api/health/ready')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json['status'], 'error')
+            self.assertGreater(response.json['retry_in'], 0)
+            self.assertEqual(state.backoff.failures, 1)
+
+        state.retry_at = 0
+        state.refresh_in_background().join(5)
+        self.assertEqual(self.client.get('/api/health/ready').status_code, 200)
+
+
+class JsonEncoderTests(ApiTestCase):
+    """Списки задач і користувачів побайтово однакові з orjson і stdlib"""
+
+    def test_list_bodies_identical(self):
+        from app.json_provider import OrjsonProvider, StdlibJSONProvider
+        headers = self.register_and_login()
+        self.client.post('/api/users/register', json={'username': 'Олена', 'password': 'x'})
+        self.seed_tasks(5)
+
+        bodies = {}
+        for provider in (OrjsonProvider, StdlibJSONProvider):
+            self.app.json = provider(self.app)
+            bodies[provider] = [
+                self.client.get(path, headers=headers).get_data()
+                for path in ('/api/tasks', '/api/tasks?fields=title,status', '/api/users', '/api/tasks/1')
+            ]
+        self.assertEqual(bodies[OrjsonProvider], bodies[StdlibJSONProvider])
+        self.assertIn(b'"status":"\\u043d\\u0435\\u0432', bodies[OrjsonProvider][0])
+        self.assertIn(b'"username":"\\u041e', bodies[OrjsonProvider][2])
@@ -0,0 +1,15 @@
+import unittest
+from tests import test_routes
+from tests.base import AsyncModeMixin
+
+
+# Ті самі тести API (tests/test_routes.py), але проти ASGI-режиму (app/asgi).
+# Класи генеруються автоматично, тож нові тести в test_routes.py перевіряють обидва режими.
+for _name, _case in vars(test_routes).items():
+    if isinstance(_case, type) and issubclass(_case, unittest.TestCase):
+        globals()[f"Async{_name}"] = type(f"Async{_name}", (AsyncModeMixin, _case), {})
+del _name, _case
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from prometheus_client import CollectorRegistry
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.task_stats import TASK_STATS_TRIGGERS, TaskStatsCollector, select_task_stats
+from tests.base import ApiTestCase
+
+
+class SelectTaskStatsTests(unittest.TestCase):
+    """Джерело лічильників залежить від БД"""
+
+    def test_postgresql_reads_summary_table(self):
+        sql = str(select_task_stats("postgresql").compile(dialect=postgresql.dialect()))
+        self.assertIn("FROM task_stats", sql)
+        self.assertNotIn("GROUP BY", sql)
+
+    def test_sqlite_groups_tasks(self):
+        sql = str(select_task_stats("sqlite").compile(dialect=sqlite.dialect()))
+        self.assertIn("FROM tasks GROUP BY tasks.owner_id, tasks.status", sql)
+
+    def test_triggers_cover_every_write(self):
+        for op in ("INSERT", "UPDATE", "DELETE", "TRUNCATE"):
+            self.assertIn(f"AFTER {op} ON tasks", TASK_STATS_TRIGGERS)
+
+
+class TaskStatsCollectorTests(ApiTestCase):
+    """Метрики tasks_by_status / tasks_by_owner"""
+
+    def collect(self):
+        registry = CollectorRegistry()
+        registry.register(TaskStatsCollector(self.app))
+        return registry
+
+    def test_gauges_match_stats(self):
+        self.seed_tasks(2, owner_id=1)
+        self.seed_tasks(3, owner_id=2, status='виконана')
+        registry = self.collect()
+
+        self.assertEqual(registry.get_sample_value('tasks_by_status', {'status': 'невиконана'}), 2)
+        self.assertEqual(registry.get_sample_value('tasks_by_status', {'status': 'виконана'}), 3)
+        self.assertEqual(registry.get_sample_value('tasks_by_owner', {'owner_id': '2'}), 3)
+
+    def test_owner_labels_are_limited(self):
+        self.app.config['TASK_STATS_METRICS_MAX_OWNERS'] = 1
+        self.seed_tasks(1, owner_id=1)
+        self.seed_tasks(2, owner_id=2)
+        registry = self.collect()
+
+        self.assertEqual(registry.get_sample_value('tasks_by_owner', {'owner_id': '2'}), 2)
+        self.assertIsNone(registry.get_sample_value('tasks_by_owner', {'owner_id': '1'}))
+
+    def test_registration_does_not_query_the_database(self):
+        with self.app.app_context():
+            db.drop_all()
+        registry = CollectorRegistry(auto_describe=True)
+        registry.register(TaskStatsCollector(self.app))
+        # Таблиці немає - scrape віддає метрики без значень замість помилки
+        self.assertIsNone(registry.get_sample_value('tasks_by_status', {'status': 'невиконана'}))
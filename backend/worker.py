@@ -0,0 +1,21 @@
+import logging
+import signal
+import threading
+from app import create_app
+from app.jobs import work
+
+
+# --- Воркер фонових задач (app/jobs.py) ---
+# Окремий процес поруч із веб-сервером: python worker.py (у Docker - сервіс worker).
+# Кілька воркерів можна запускати паралельно - задачі розподіляє SKIP LOCKED.
+# SIGTERM/SIGINT: воркер доробляє поточну пачку і повертає задачу в чергу з її прогресом.
+
+app = create_app()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *args: stop.set())
+    app.logger.info("Job worker started")
+    work(app, stop)
@@ -6,7 +6,8 @@ CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
     username VARCHAR(80) UNIQUE NOT NULL,
     password VARCHAR(255) NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1
 );
 
 CREATE TABLE IF NOT EXISTS tasks (
@@ -15,9 +16,135 @@ CREATE TABLE IF NOT EXISTS tasks (
     description TEXT,
     owner_id INT REFERENCES users(id),
     status VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+-- Версія рядка для оптимістичного блокування (PUT з If-Match); для вже створених таблиць
+ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+-- Версії таблиць для ETag (збільшуються бекендом у транзакції разом зі зміною даних)
+CREATE TABLE IF NOT EXISTS table_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO table_versions (name, version) VALUES ('tasks', 0), ('users', 0)
+    ON CONFLICT (name) DO NOTHING;
+
+-- Журнал змін задач для SSE-стріму /api/tasks/events (бекенд зберігає лише останні події)
+CREATE TABLE IF NOT EXISTS task_events (
+    id BIGSERIAL PRIMARY KEY,
+    data TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Відкликані JWT (logout, видалення користувача); час - unix-секунди, як iat/exp у токені
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(10) NOT NULL,
+    jti VARCHAR(36),
+    user_id INTEGER,
+    issued_before BIGINT NOT NULL,
+    expires_at BIGINT
+);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens (expires_at);
+
+-- Збережені відповіді POST-запитів з Idempotency-Key (спільні для всіх воркерів); expires_at - unix-секунди.
+-- Має збігатися з backend/app/models.py (IdempotencyKey)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(512) PRIMARY KEY,
+    value BYTEA NOT NULL,
+    expires_at DOUBLE PRECISION NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+-- Черга фонових задач (видалення користувача, імпорт); воркер забирає їх через FOR UPDATE SKIP LOCKED.
+-- Має збігатися з backend/app/models.py (Job)
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_by INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_id ON jobs (status, id);
+
+-- Кількість задач за (owner_id, status) для /api/tasks/stats; підтримується тригерами на tasks.
+-- Має збігатися з backend/app/models.py (task_stats) і backend/app/task_stats.py (TASK_STATS_TRIGGERS)
+CREATE TABLE IF NOT EXISTS task_stats (
+    owner_id INT,
+    status VARCHAR(50),
+    count BIGINT NOT NULL DEFAULT 0,
+    CONSTRAINT uq_task_stats_owner_status UNIQUE NULLS NOT DISTINCT (owner_id, status)
+);
+
+CREATE OR REPLACE FUNCTION task_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    -- ORDER BY: паралельні транзакції блокують рядки task_stats в одному порядку (без deadlock)
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO task_stats (owner_id, status, count)
+        SELECT owner_id, status, count(*) FROM new_rows
+        GROUP BY owner_id, status ORDER BY owner_id, status
+        ON CONFLICT (owner_id, status) DO UPDATE SET count = task_stats.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO task_stats (owner_id, status, count)
+        SELECT owner_id, status, -count(*) FROM old_rows
+        GROUP BY owner_id, status ORDER BY owner_id, status
+        ON CONFLICT (owner_id, status) DO UPDATE SET count = task_stats.count + EXCLUDED.count;
+    ELSE
+        -- UPDATE: лише групи, кількість у яких змінилась (зміна title/description нічого не пише)
+        INSERT INTO task_stats (owner_id, status, count)
+        SELECT owner_id, status, sum(delta) FROM (
+            SELECT owner_id, status, 1 AS delta FROM new_rows
+            UNION ALL
+            SELECT owner_id, status, -1 FROM old_rows
+        ) changes
+        GROUP BY owner_id, status HAVING sum(delta) <> 0 ORDER BY owner_id, status
+        ON CONFLICT (owner_id, status) DO UPDATE SET count = task_stats.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION task_stats_reset() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM task_stats;
+    RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE TRIGGER tasks_stats_insert AFTER INSERT ON tasks
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply();
+CREATE OR REPLACE TRIGGER tasks_stats_update AFTER UPDATE ON tasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply();
+CREATE OR REPLACE TRIGGER tasks_stats_delete AFTER DELETE ON tasks
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION task_stats_apply();
+CREATE OR REPLACE TRIGGER tasks_stats_truncate AFTER TRUNCATE ON tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION task_stats_reset();
+
+-- Лічильники для задач, що вже є в таблиці (тригери рахують лише нові зміни)
+INSERT INTO task_stats (owner_id, status, count)
+SELECT owner_id, status, count(*) FROM tasks GROUP BY owner_id, status
+ON CONFLICT (owner_id, status) DO NOTHING;
+
+-- Індекси під фільтри списку задач (GET /api/tasks?owner_id=&status=&q=...)
+-- Мають збігатися з індексами у backend/app/models.py
+CREATE INDEX IF NOT EXISTS ix_tasks_owner_status_id ON tasks (owner_id, status, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_owner_id_id ON tasks (owner_id, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_status_id ON tasks (status, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_created_at ON tasks (created_at);
+CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks
+    USING gin (to_tsvector('simple'::regconfig, (coalesce(title, '') || ' ') || coalesce(description, '')));
+
 -- Видаємо права користувачу limited_user
 GRANT CONNECT ON DATABASE app_db TO limited_user;
 GRANT USAGE ON SCHEMA public TO limited_user;
@@ -1,5 +1,5 @@
 import React from 'react';
-import { render, screen, waitFor } from '@testing-library/react';
+import { render, screen, waitFor, fireEvent } from '@testing-library/react';
 import '@testing-library/jest-dom';
 import App from './App';
 import axios from 'axios';
@@ -34,4 +34,34 @@ describe('App component', () => {
     }
   });
 
+  test('loads further pages on demand', async () => {
+    axios.get.mockReset();
+    axios.get
+      .mockResolvedValueOnce({ status: 200, data: [{ id: 1, title: 'Перша', status: 'невиконана' }],
+                               headers: { 'x-next-cursor': 'c1' } })
+      .mockResolvedValueOnce({ status: 200, data: [{ id: 2, title: 'Друга', status: 'виконана' }], headers: {} });
+
+    render(<App />);
+    await screen.findByText('Перша - невиконана');
+    expect(axios.get).toHaveBeenCalledTimes(1);  // лише перша сторінка
+
+    fireEvent.click(screen.getByText('Завантажити ще'));
+    await screen.findByText('Друга - виконана');
+    expect(axios.get).toHaveBeenLastCalledWith('/api/tasks/public', expect.objectContaining({ params: { cursor: 'c1' } }));
+    expect(screen.queryByText('Завантажити ще')).not.toBeInTheDocument();
+  });
+
+  test('retries the page after 429 using Retry-After', async () => {
+    axios.get.mockReset();
+    axios.get
+      .mockResolvedValueOnce({ status: 429, data: { error: 'Too many requests, retry later' },
+                               headers: { 'retry-after': '0' } })
+      .mockResolvedValueOnce({ status: 200, data: [{ id: 3, title: 'Третя', status: 'невиконана' }], headers: {} });
+
+    render(<App />);
+    await screen.findByText('Третя - невиконана');
+    expect(axios.get).toHaveBeenCalledTimes(2);
+    expect(screen.queryByText(/Забагато запитів/)).not.toBeInTheDocument();
+  });
+
 });
@@ -1,29 +1,277 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 
-const TaskList = () => {
-  const [tasks, setTasks] = useState([]);
+// Повтор після помилки (перепідключення стріму, 429 на сторінці списку): експоненційна затримка (мс)
+// з випадковим розкидом, якщо сервер не вказав Retry-After
+const RETRY_MIN = 1000;
+const RETRY_MAX = 60000;
 
-  useEffect(() => {
+// Скільки разів повторювати запит сторінки після 429, перш ніж показати "спробуйте пізніше"
+const PAGE_RETRIES = 3;
+
+// Retry-After (секунди або HTTP-дата) -> мс; fallback, якщо заголовка немає
+const retryAfterMs = (value, fallback) => {
+  if (value === null || value === undefined || value === '') {
+    return fallback;
+  }
+  const seconds = Number(value);
+  if (Number.isFinite(seconds) && seconds >= 0) {
+    return seconds * 1000;
+  }
+  const date = Date.parse(value);
+  return Number.isNaN(date) ? fallback : Math.max(0, date - Date.now());
+};
+
+const backoff = attempt => {
+  const delay = Math.min(RETRY_MAX, RETRY_MIN * 2 ** attempt);
+  return delay / 2 + Math.random() * delay / 2;
+};
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+// Відповіді по кожній сторінці з їхніми ETag: якщо сторінка не змінилась,
+// бекенд відповідає 304 без тіла, і ми беремо дані звідси
+const pageCache = new Map();
+
+const fetchPage = async (cursor) => {
+  const key = cursor || '';
+  const cached = pageCache.get(key);
+
+  // 429 (ліміт запитів, зокрема спільний для всіх за одним NAT) - чекаємо Retry-After і повторюємо
+  let response;
+  for (let attempt = 0; ; attempt += 1) {
     // Використовуємо ім'я контейнера бекенду для Docker network
     //axios.get('http://localhost:5000/api/tasks/public')
-    axios.get('/api/tasks/public')
-      .then(response => {
-        setTasks(response.data);
+    response = await axios.get('/api/tasks/public', {
+      params: cursor ? { cursor } : {},
+      headers: cached ? { 'If-None-Match': cached.etag } : {},
+      validateStatus: status => (status >= 200 && status < 300) || status === 304 || status === 429
+    });
+    if (response.status !== 429) {
+      break;
+    }
+    if (attempt >= PAGE_RETRIES) {
+      const error = new Error('Too many requests');
+      error.response = response;
+      throw error;
+    }
+    const retryAfter = (response.headers || {})['retry-after'];
+    await sleep(Math.min(RETRY_MAX, retryAfterMs(retryAfter, backoff(attempt))));
+  }
+
+  if (response.status === 304 && cached) {
+    return cached;
+  }
+
+  const headers = response.headers || {};
+  const page = { data: response.data, etag: headers['etag'], nextCursor: headers['x-next-cursor'] };
+  if (page.etag) {
+    pageCache.set(key, page);
+  }
+  return page;
+};
+
+// Стрім змін /api/tasks/events (Server-Sent Events), прочитаний через fetch: на відміну від EventSource,
+// видно статус відповіді, тож після 503 (ліміт стрімів на процес) або 429 клієнт чекає Retry-After
+// і перепідключається, а не закриває стрім назавжди. Продовження - з Last-Event-ID.
+// Повертає функцію, що закриває стрім.
+const openTaskStream = ({ onTask, onReset }) => {
+  const controller = new AbortController();
+  let lastEventId = null;
+  let retry = 3000;  // поле retry: зі стріму - затримка після звичайного закриття з'єднання сервером
+  let attempt = 0;
+  let timer = null;
+
+  const dispatch = block => {
+    let event = 'message';
+    let id = null;
+    const data = [];
+    for (const line of block.split('\n')) {
+      if (!line || line.startsWith(':')) {
+        continue;  // порожній рядок або коментар (heartbeat)
+      }
+      const colon = line.indexOf(':');
+      const field = colon === -1 ? line : line.slice(0, colon);
+      const value = colon === -1 ? '' : line.slice(colon + 1).replace(/^ /, '');
+      if (field === 'event') {
+        event = value;
+      } else if (field === 'data') {
+        data.push(value);
+      } else if (field === 'id') {
+        id = value;
+      } else if (field === 'retry' && /^\d+$/.test(value)) {
+        retry = Number(value);
+      }
+    }
+    if (id !== null) {
+      lastEventId = id;
+    }
+    if (event === 'task' && data.length) {
+      onTask(JSON.parse(data.join('\n')));
+    } else if (event === 'reset') {
+      onReset();
+    }
+  };
+
+  const connect = async () => {
+    let delay;
+    try {
+      const response = await window.fetch('/api/tasks/events', {
+        headers: { Accept: 'text/event-stream', ...(lastEventId !== null ? { 'Last-Event-ID': lastEventId } : {}) },
+        cache: 'no-store',
+        signal: controller.signal,
+      });
+      if (!response.ok || !response.body) {
+        delay = retryAfterMs(response.headers.get('Retry-After'), backoff(attempt));
+        attempt += 1;
+      } else {
+        attempt = 0;
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) {
+            break;
+          }
+          buffer += decoder.decode(value, { stream: true }).replace(/\r\n?/g, '\n');
+          let end;
+          while ((end = buffer.indexOf('\n\n')) !== -1) {
+            dispatch(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+        }
+        delay = retry;  // сервер закрив стрім (TASK_EVENTS_MAX_STREAM_SECONDS)
+      }
+    } catch (error) {
+      if (controller.signal.aborted) {
+        return;
+      }
+      delay = backoff(attempt);  // мережева помилка або розрив посеред стріму
+      attempt += 1;
+    }
+    if (!controller.signal.aborted) {
+      timer = setTimeout(connect, delay);
+    }
+  };
+
+  connect();
+  return () => {
+    controller.abort();
+    clearTimeout(timer);
+  };
+};
+
+// Бекенд віддає задачі сторінками (по id): курсор наступної сторінки приходить у заголовку X-Next-Cursor.
+// Спочатку завантажується лише перша сторінка, наступні - кнопкою "Завантажити ще",
+// тож відкриття сторінки не тягне всю таблицю. list - { tasks, nextCursor }.
+const EMPTY_LIST = { tasks: [], nextCursor: null };
+
+const pageToList = page => ({ tasks: page.data, nextCursor: page.nextCursor || null });
+
+// Застосовує одну зміну з /api/tasks/events до завантаженої частини списку
+const applyTaskEvent = (list, { op, task }) => {
+  const { tasks, nextCursor } = list;
+  if (op === 'deleted') {
+    return { ...list, tasks: tasks.filter(t => t.id !== task.id) };
+  }
+  const index = tasks.findIndex(t => t.id === task.id);
+  if (index === -1) {
+    // нові задачі мають більший id: у кінець, якщо список уже завантажено до кінця,
+    // інакше задача прийде з однією з наступних сторінок
+    return nextCursor ? list : { ...list, tasks: [...tasks, task] };
+  }
+  const next = [...tasks];
+  next[index] = task;
+  return { ...list, tasks: next };
+};
+
+const TaskList = () => {
+  const [list, setList] = useState(EMPTY_LIST);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [throttled, setThrottled] = useState(false);
+
+  const onError = error => {
+    if (error.response && error.response.status === 429) {
+      setThrottled(true);
+    }
+    console.error('Сталася помилка під час отримання задач!', error);
+  };
+
+  const loadMore = () => {
+    if (!list.nextCursor || loadingMore) {
+      return;
+    }
+    setLoadingMore(true);
+    setThrottled(false);
+    fetchPage(list.nextCursor)
+      .then(page => {
+        setList(current => {
+          const known = new Set(current.tasks.map(t => t.id));
+          // задачі, що вже прийшли стрімом, не дублюються
+          const tasks = current.tasks.concat(page.data.filter(t => !known.has(t.id)));
+          return { tasks, nextCursor: page.nextCursor || null };
+        });
+      })
+      .catch(onError)
+      .finally(() => setLoadingMore(false));
+  };
+
+  useEffect(() => {
+    let closeStream = null;
+    let loaded = false;
+    let queued = [];  // зміни, що прийшли під час завантаження списку
+
+    const load = () => fetchPage(null)
+      .then(page => {
+        setList(queued.reduce(applyTaskEvent, pageToList(page)));
+        queued = [];
+        loaded = true;
+        setThrottled(false);
       })
-      .catch(error => {
-        console.error('Сталася помилка під час отримання задач!', error);
+      .catch(onError);
+
+    // Стрім змін: перша сторінка завантажується один раз, далі застосовуються лише зміни.
+    // Без fetch зі стрімами (старі браузери) список просто не оновлюється наживо.
+    if (typeof window.fetch === 'function' && typeof window.ReadableStream === 'function') {
+      closeStream = openTaskStream({
+        onTask: change => {
+          if (loaded) {
+            setList(current => applyTaskEvent(current, change));
+          } else {
+            queued.push(change);
+          }
+        },
+        // Сервер не може продовжити з нашого Last-Event-ID - перечитуємо список з першої сторінки
+        onReset: () => {
+          loaded = false;
+          load();
+        },
       });
+    }
+
+    load();
+    return () => {
+      if (closeStream) {
+        closeStream();
+      }
+    };
   }, []);
 
   return (
     <div>
       <h1>Список задач</h1>
       <ul>
-        {tasks.map(task => (
+        {list.tasks.map(task => (
           <li key={task.id}>{task.title} - {task.status}</li>
         ))}
       </ul>
+      {throttled && <p>Забагато запитів, спробуйте пізніше.</p>}
+      {list.nextCursor && (
+        <button onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Завантаження...' : 'Завантажити ще'}
+        </button>
+      )}
     </div>
   );
 };
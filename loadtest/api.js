@@ -0,0 +1,117 @@
+import http from 'k6/http';
+import { check } from 'k6';
+
+// --- Навантажувальний тест списків задач: байти в мережі та латентність ---
+// Сценарії виконуються послідовно, кожен DURATION секунд з VUS віртуальними користувачами:
+//   - public_identity / public_gzip - GET /api/tasks/public (мікрокеш nginx) без стиснення / з gzip;
+//   - tasks_identity / tasks_gzip   - GET /api/tasks з JWT (без кешу: keep-alive до бекенда + gzip).
+// Порівняння "до/після": той самий сценарій проти бекенда напряму (BASE_URL=http://backend:5000 -
+// без стиснення і кешу) та через nginx (BASE_URL=https://nginx), або проти попередньої версії nginx.conf.
+// Запуск: docker compose --profile loadtest run --rm k6
+//         docker compose --profile loadtest run --rm -e BASE_URL=http://backend:5000 k6
+
+const BASE_URL = __ENV.BASE_URL || 'https://nginx';
+const VUS = Number(__ENV.VUS || 20);
+const DURATION = Number(__ENV.DURATION || 30);   // секунд на сценарій
+const PAGE_SIZE = Number(__ENV.PAGE_SIZE || 100);
+const SEED_TASKS = Number(__ENV.SEED_TASKS || 1000);
+
+const SCENARIOS = ['public_identity', 'public_gzip', 'tasks_identity', 'tasks_gzip'];
+
+function scenario(name, index) {
+    return {
+        executor: 'constant-vus',
+        exec: name.startsWith('public') ? 'publicTasks' : 'userTasks',
+        vus: VUS,
+        duration: `${DURATION}s`,
+        startTime: `${index * (DURATION + 2)}s`,
+        env: { ENCODING: name.endsWith('gzip') ? 'gzip' : 'identity' },
+    };
+}
+
+// Порогові значення задані лише для того, щоб k6 рахував метрики окремо для кожного сценарію
+const thresholds = {};
+for (const name of SCENARIOS) {
+    thresholds[`http_req_duration{scenario:${name}}`] = ['p(99)>=0'];
+    thresholds[`http_reqs{scenario:${name}}`] = ['count>=0'];
+    thresholds[`data_received{scenario:${name}}`] = ['count>=0'];
+}
+
+export const options = {
+    scenarios: Object.fromEntries(SCENARIOS.map((name, index) => [name, scenario(name, index)])),
+    thresholds,
+    insecureSkipTLSVerify: true,   // самопідписаний сертифікат nginx
+    discardResponseBodies: true,
+    summaryTrendStats: ['avg', 'p(50)', 'p(95)', 'p(99)'],
+};
+
+const JSON_HEADERS = { 'Content-Type': 'application/json' };
+
+// Користувач і SEED_TASKS його задач, щоб списки були непорожні
+export function setup() {
+    const username = `k6_${Date.now()}`;
+    const credentials = JSON.stringify({ username, password: 'k6-password' });
+    const registered = http.post(`${BASE_URL}/api/users/register`, credentials,
+        { headers: JSON_HEADERS, responseType: 'text' });
+    check(registered, { 'registered': (r) => r.status === 201 });
+    const userId = registered.json('user.id');
+
+    const login = http.post(`${BASE_URL}/api/users/login`, credentials,
+        { headers: JSON_HEADERS, responseType: 'text' });
+    const token = login.json('access_token');
+    const auth = { ...JSON_HEADERS, Authorization: `Bearer ${token}` };
+
+    for (let created = 0; created < SEED_TASKS; created += 500) {
+        const batch = [];
+        for (let i = created; i < Math.min(created + 500, SEED_TASKS); i++) {
+            batch.push({ title: `k6 task ${i}`, description: 'Навантажувальний тест: опис задачі', owner_id: userId });
+        }
+        http.post(`${BASE_URL}/api/tasks/bulk`, JSON.stringify(batch), { headers: auth });
+    }
+    return { token };
+}
+
+export function publicTasks() {
+    const res = http.get(`${BASE_URL}/api/tasks/public?limit=${PAGE_SIZE}`,
+        { headers: { 'Accept-Encoding': __ENV.ENCODING } });
+    check(res, { 'status 200': (r) => r.status === 200 });
+}
+
+export function userTasks(data) {
+    const res = http.get(`${BASE_URL}/api/tasks?limit=${PAGE_SIZE}`, {
+        headers: { 'Accept-Encoding': __ENV.ENCODING, Authorization: `Bearer ${data.token}` },
+    });
+    check(res, { 'status 200': (r) => r.status === 200 });
+}
+
+// Підсумок: запити, латентність і байти на відповідь (з заголовками, TLS і стисненням) для кожного сценарію
+export function handleSummary(data) {
+    const metric = (name, scenarioName) => data.metrics[`${name}{scenario:${scenarioName}}`].values;
+    const rows = SCENARIOS.map((name) => {
+        const requests = metric('http_reqs', name).count;
+        const duration = metric('http_req_duration', name);
+        return {
+            scenario: name,
+            requests,
+            rps: Math.round(requests / DURATION),
+            p50_ms: +duration['p(50)'].toFixed(1),
+            p95_ms: +duration['p(95)'].toFixed(1),
+            p99_ms: +duration['p(99)'].toFixed(1),
+            bytes_per_request: requests ? Math.round(metric('data_received', name).count / requests) : 0,
+        };
+    });
+
+    const lines = [`${BASE_URL}, ${VUS} VUs, ${DURATION}s per scenario, page size ${PAGE_SIZE}`,
+        'scenario'.padEnd(18) + ['requests', 'rps', 'p50, ms', 'p95, ms', 'p99, ms', 'bytes/req']
+            .map((h) => h.padStart(11)).join('')];
+    for (const row of rows) {
+        lines.push(row.scenario.padEnd(18) + [row.requests, row.rps, row.p50_ms, row.p95_ms, row.p99_ms,
+            row.bytes_per_request].map((v) => String(v).padStart(11)).join(''));
+    }
+
+    const summary = { stdout: lines.join('\n') + '\n' };
+    if (__ENV.RESULTS) {
+        summary[__ENV.RESULTS] = JSON.stringify({ base_url: BASE_URL, vus: VUS, duration: DURATION, rows }, null, 2);
+    }
+    return summary;
+}
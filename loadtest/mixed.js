@@ -0,0 +1,137 @@
+import http from 'k6/http';
+import { check } from 'k6';
+
+// --- Змішане навантаження: логін, списки, створення й оновлення задач ---
+// VUS віртуальних користувачів DURATION секунд; кожна ітерація - одна операція, обрана з вагами WEIGHTS.
+// Користувачі - з генератора даних (python -m benchmarks.seed): VU n логіниться як bench_user_{n % SEED_USERS}.
+// Підсумок (RESULTS) - у тому ж форматі, що й loadtest/api.js, порівняння з baseline:
+//     python -m benchmarks.compare baseline.json ../logs/loadtest/mixed.json
+// Запуск: docker compose exec backend python -m benchmarks.seed --users 1000 --tasks 100000
+//         docker compose --profile loadtest run --rm -e RESULTS=/results/mixed.json k6 run /scripts/mixed.js
+
+const BASE_URL = __ENV.BASE_URL || 'https://nginx';
+const VUS = Number(__ENV.VUS || 20);
+const DURATION = Number(__ENV.DURATION || 60);
+const PAGE_SIZE = Number(__ENV.PAGE_SIZE || 100);
+const SEED_USERS = Number(__ENV.SEED_USERS || 1000);
+const SEED_PASSWORD = __ENV.SEED_PASSWORD || 'benchpassword';
+
+// Частки операцій (відносні ваги)
+const WEIGHTS = { login: 5, list: 60, create: 20, update: 15 };
+const OPERATIONS = Object.keys(WEIGHTS);
+const TOTAL_WEIGHT = OPERATIONS.reduce((sum, op) => sum + WEIGHTS[op], 0);
+
+// Порогові значення задані лише для того, щоб k6 рахував метрики окремо для кожної операції
+const thresholds = {};
+for (const op of OPERATIONS) {
+    thresholds[`http_req_duration{op:${op}}`] = ['p(99)>=0'];
+    thresholds[`http_reqs{op:${op}}`] = ['count>=0'];
+}
+
+export const options = {
+    scenarios: {
+        mixed: { executor: 'constant-vus', vus: VUS, duration: `${DURATION}s` },
+    },
+    thresholds,
+    insecureSkipTLSVerify: true,   // самопідписаний сертифікат nginx
+    summaryTrendStats: ['avg', 'p(50)', 'p(95)', 'p(99)'],
+};
+
+const JSON_HEADERS = { 'Content-Type': 'application/json' };
+
+// Стан VU: токен, id користувача і id створених ним задач (для оновлень)
+let session = null;
+
+function login() {
+    const username = `bench_user_${(__VU - 1) % SEED_USERS}`;
+    const res = http.post(`${BASE_URL}/api/users/login`, JSON.stringify({ username, password: SEED_PASSWORD }),
+        { headers: JSON_HEADERS, tags: { op: 'login' } });
+    check(res, { 'login 200': (r) => r.status === 200 });
+    return res.status === 200 ? res.json('access_token') : null;
+}
+
+function start() {
+    const token = login();
+    if (!token) {
+        return null;
+    }
+    const auth = { ...JSON_HEADERS, Authorization: `Bearer ${token}` };
+    const me = http.get(`${BASE_URL}/api/users/me`, { headers: auth, tags: { op: 'setup' } });
+    return { auth, userId: me.json('id'), taskIds: [] };
+}
+
+function pick() {
+    let roll = Math.random() * TOTAL_WEIGHT;
+    for (const op of OPERATIONS) {
+        roll -= WEIGHTS[op];
+        if (roll < 0) {
+            return op;
+        }
+    }
+    return OPERATIONS[OPERATIONS.length - 1];
+}
+
+function createTask() {
+    const res = http.post(`${BASE_URL}/api/tasks`, JSON.stringify({
+        title: `k6 task ${__VU}-${__ITER}`, description: 'Змішане навантаження: опис задачі', owner_id: session.userId,
+    }), { headers: session.auth, tags: { op: 'create' } });
+    check(res, { 'create 201': (r) => r.status === 201 });
+    if (res.status === 201) {
+        session.taskIds.push(res.json('id'));
+    }
+}
+
+export default function () {
+    if (!session) {
+        session = start();
+        if (!session) {
+            return;
+        }
+    }
+
+    const op = pick();
+    if (op === 'login') {
+        login();
+    } else if (op === 'list') {
+        const res = http.get(`${BASE_URL}/api/tasks?owner_id=me&limit=${PAGE_SIZE}`,
+            { headers: session.auth, tags: { op: 'list' } });
+        check(res, { 'list 200': (r) => r.status === 200 });
+    } else if (op === 'create' || session.taskIds.length === 0) {
+        createTask();
+    } else {
+        const id = session.taskIds[Math.floor(Math.random() * session.taskIds.length)];
+        const res = http.put(`${BASE_URL}/api/tasks/${id}`, JSON.stringify({ status: 'в процесі' }),
+            { headers: session.auth, tags: { op: 'update' } });
+        check(res, { 'update 200': (r) => r.status === 200 });
+    }
+}
+
+// Підсумок: запити, req/s і латентність кожної операції
+export function handleSummary(data) {
+    const rows = OPERATIONS.map((op) => {
+        const requests = data.metrics[`http_reqs{op:${op}}`].values.count;
+        const duration = data.metrics[`http_req_duration{op:${op}}`].values;
+        return {
+            name: op,
+            requests,
+            rps: +(requests / DURATION).toFixed(1),
+            p50_ms: +duration['p(50)'].toFixed(1),
+            p95_ms: +duration['p(95)'].toFixed(1),
+            p99_ms: +duration['p(99)'].toFixed(1),
+        };
+    });
+
+    const lines = [`${BASE_URL}, ${VUS} VUs, ${DURATION}s, weights ${JSON.stringify(WEIGHTS)}`,
+        'operation'.padEnd(12) + ['requests', 'rps', 'p50, ms', 'p95, ms', 'p99, ms']
+            .map((h) => h.padStart(11)).join('')];
+    for (const row of rows) {
+        lines.push(row.name.padEnd(12) + [row.requests, row.rps, row.p50_ms, row.p95_ms, row.p99_ms]
+            .map((v) => String(v).padStart(11)).join(''));
+    }
+
+    const summary = { stdout: lines.join('\n') + '\n' };
+    if (__ENV.RESULTS) {
+        summary[__ENV.RESULTS] = JSON.stringify({ base_url: BASE_URL, vus: VUS, duration: DURATION, rows }, null, 2);
+    }
+    return summary;
+}
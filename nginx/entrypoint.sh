@@ -10,4 +10,27 @@ if [ ! -f /etc/nginx/certs/cert.pem ] || [ ! -f /etc/nginx/certs/key.pem ]; then
     -out /etc/nginx/certs/cert.pem
 fi
 
-exec nginx -g "daemon off;"
\ No newline at end of file
+# Мікрокеш /api/tasks/public (див. nginx.conf): NGINX_MICROCACHE=on | off
+if [ "${NGINX_MICROCACHE:-on}" = "on" ]; then
+  cat > /etc/nginx/microcache.conf <<'CONF'
+proxy_cache microcache;
+proxy_cache_key $scheme$request_method$host$request_uri;
+# Час життя - з Cache-Control бекенда (s-maxage); якщо заголовка немає - 1 с
+proxy_cache_valid 200 1s;
+# Один запит до бекенда на ключ, решта чекають на його відповідь
+proxy_cache_lock on;
+proxy_cache_lock_timeout 2s;
+# Поки запис оновлюється або бекенд недоступний - віддаємо застарілий
+proxy_cache_use_stale updating error timeout http_500 http_502 http_503 http_504;
+proxy_cache_background_update on;
+proxy_cache_revalidate on;
+# X-Request-ID з кешованої відповіді належить іншому запиту
+proxy_hide_header X-Request-ID;
+add_header X-Request-ID $req_id always;
+add_header X-Cache-Status $upstream_cache_status always;
+CONF
+else
+  echo "proxy_cache off;" > /etc/nginx/microcache.conf
+fi
+
+exec nginx -g "daemon off;"